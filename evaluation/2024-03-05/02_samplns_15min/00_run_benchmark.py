@@ -67,6 +67,7 @@ RESULT_FOLDER = Path(config["samplns_15min"]["algbench_results"])
 ITERATIONS = config["samplns_15min"]["iterations"]
 ITERATION_TIME_LIMIT = config["samplns_15min"]["iteration_time_limit"]
 TIME_LIMIT = config["samplns_15min"]["time_limit"]
+SOLVER_PROFILE = config["samplns_15min"].get("solver_profile", "default")
 benchmark = Benchmark(str(RESULT_FOLDER), save_output=True, hide_output=False)
 
 logging.getLogger("SampLNS").addHandler(logging.StreamHandler())
@@ -123,6 +124,7 @@ def run_distributed(instance_name: str, rep: int):
         iterations=ITERATIONS,
         iteration_time_limit=ITERATION_TIME_LIMIT,
         time_limit=TIME_LIMIT,
+        solver_profile=SOLVER_PROFILE,
         verify=True,
         fast_verify=True,
         rep=rep,
@@ -137,6 +139,7 @@ def run_samplns(
     verify,
     fast_verify,
     rep: int,
+    solver_profile: str = "default",
 ):
     """
     Running SampLNS on an initial sample.
@@ -167,6 +170,7 @@ def run_samplns(
             initial_solution=sample,
             neighborhood_selector=RandomNeighborhood(),
             observer=logger,
+            solver_profile=solver_profile,
         )
 
         solver.optimize(
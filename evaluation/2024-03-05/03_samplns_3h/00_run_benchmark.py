@@ -68,6 +68,7 @@ RESULT_FOLDER = Path(config[EXPERIMENT]["algbench_results"])
 ITERATIONS = config[EXPERIMENT]["iterations"]
 ITERATION_TIME_LIMIT = config[EXPERIMENT]["iteration_time_limit"]
 TIME_LIMIT = config[EXPERIMENT]["time_limit"]
+SOLVER_PROFILE = config[EXPERIMENT].get("solver_profile", "default")
 CDS_ITERATION_TIME_LIMIT = config[EXPERIMENT]["cds_iteration_time_limit"]
 benchmark = Benchmark(str(RESULT_FOLDER), save_output=True, hide_output=False)
 
@@ -126,6 +127,7 @@ def run_distributed(instance_name: str, rep: int):
         iteration_time_limit=ITERATION_TIME_LIMIT,
         cds_iteration_time_limit=CDS_ITERATION_TIME_LIMIT,
         time_limit=TIME_LIMIT,
+        solver_profile=SOLVER_PROFILE,
         verify=True,
         fast_verify=True,
         rep=rep,
@@ -141,6 +143,7 @@ def run_samplns(
     fast_verify,
     cds_iteration_time_limit,
     rep: int,
+    solver_profile: str = "default",
 ):
     """
     Running SampLNS on an initial sample.
@@ -171,6 +174,7 @@ def run_samplns(
             initial_solution=sample,
             neighborhood_selector=RandomNeighborhood(),
             observer=logger,
+            solver_profile=solver_profile,
             cds_iteration_time_limit=cds_iteration_time_limit,
         )
 
@@ -0,0 +1,186 @@
+#ifndef ALG_SCP_BITSET_HPP
+#define ALG_SCP_BITSET_HPP
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <cstdlib>
+#include <new>
+#include <vector>
+
+#if defined(_MSC_VER)
+#include <intrin.h>
+#include <malloc.h>
+#endif
+
+namespace samplns {
+
+/// @brief Number of set bits of a word.
+inline size_t popcount64(uint64_t word) {
+#if defined(_MSC_VER)
+  return static_cast<size_t>(__popcnt64(word));
+#else
+  return static_cast<size_t>(__builtin_popcountll(word));
+#endif
+}
+
+/// @brief Index of the lowest set bit of a word, which must not be zero.
+inline size_t count_trailing_zeros64(uint64_t word) {
+#if defined(_MSC_VER)
+  unsigned long index;
+  _BitScanForward64(&index, word);
+  return static_cast<size_t>(index);
+#else
+  return static_cast<size_t>(__builtin_ctzll(word));
+#endif
+}
+
+/// @brief Calls f(offset + index) for every set bit of the word, in ascending
+/// order.
+template <typename F>
+inline void for_each_bit_in_word(uint64_t word, size_t offset, F &&f) {
+  for (; word; word &= word - 1) {
+    f(offset + count_trailing_zeros64(word));
+  }
+}
+
+/// @brief Calls pred(offset + index) for the set bits of the word in ascending
+/// order, until it returns true. Returns if it did.
+template <typename F>
+inline bool find_bit_in_word(uint64_t word, size_t offset, F &&pred) {
+  for (; word; word &= word - 1) {
+    if (pred(offset + count_trailing_zeros64(word))) {
+      return true;
+    }
+  }
+  return false;
+}
+
+/// @brief Calls f(index) for every set bit of the words, in ascending order.
+template <typename F>
+inline void for_each_bit(const uint64_t *words, size_t num_words, F &&f) {
+  for (size_t w = 0; w < num_words; w++) {
+    for_each_bit_in_word(words[w], w * 64, f);
+  }
+}
+
+/// @brief Calls f(index) for every set bit of the words with an index of at
+/// least `first`, in ascending order.
+template <typename F>
+inline void for_each_bit_from(const uint64_t *words, size_t num_words,
+                              size_t first, F &&f) {
+  const size_t first_word = first >> 6;
+  if (first_word >= num_words) {
+    return;
+  }
+  for_each_bit_in_word(words[first_word] & (~uint64_t(0) << (first & 63)),
+                       first_word * 64, f);
+  for (size_t w = first_word + 1; w < num_words; w++) {
+    for_each_bit_in_word(words[w], w * 64, f);
+  }
+}
+
+/// @brief An allocator for word arrays whose rows should start at cache lines.
+template <typename T, size_t Alignment> struct AlignedAllocator {
+  using value_type = T;
+  template <typename U> struct rebind {
+    using other = AlignedAllocator<U, Alignment>;
+  };
+
+  AlignedAllocator() = default;
+  template <typename U>
+  AlignedAllocator(const AlignedAllocator<U, Alignment> &) {}
+
+  T *allocate(size_t n) {
+    const size_t bytes =
+        ((n * sizeof(T) + Alignment - 1) / Alignment) * Alignment;
+#if defined(_MSC_VER)
+    void *ptr = _aligned_malloc(bytes == 0 ? Alignment : bytes, Alignment);
+#else
+    void *ptr = std::aligned_alloc(Alignment, bytes == 0 ? Alignment : bytes);
+#endif
+    if (ptr == nullptr) {
+      throw std::bad_alloc();
+    }
+    return static_cast<T *>(ptr);
+  }
+
+  void deallocate(T *ptr, size_t) {
+#if defined(_MSC_VER)
+    _aligned_free(ptr);
+#else
+    std::free(ptr);
+#endif
+  }
+
+  template <typename U>
+  bool operator==(const AlignedAllocator<U, Alignment> &) const {
+    return true;
+  }
+  template <typename U>
+  bool operator!=(const AlignedAllocator<U, Alignment> &) const {
+    return false;
+  }
+};
+
+/// @brief A dynamic bitset of fixed size, stored in 64-bit words. Bits beyond
+/// the size are always zero, such that word-wise operations are exact.
+class Bitset {
+public:
+  Bitset() = default;
+  explicit Bitset(size_t n) : size_(n), words_((n + 63) / 64, 0) {}
+
+  inline size_t size() const { return size_; }
+  inline size_t num_words() const { return words_.size(); }
+  inline const uint64_t *words() const { return words_.data(); }
+  inline uint64_t *words() { return words_.data(); }
+
+  inline bool test(size_t i) const { return (words_[i >> 6] >> (i & 63)) & 1; }
+  inline void set(size_t i) { words_[i >> 6] |= uint64_t(1) << (i & 63); }
+  inline void reset(size_t i) { words_[i >> 6] &= ~(uint64_t(1) << (i & 63)); }
+
+  inline void clear() { std::fill(words_.begin(), words_.end(), 0); }
+
+  size_t count() const {
+    size_t cnt = 0;
+    for (const auto word : words_) {
+      cnt += popcount64(word);
+    }
+    return cnt;
+  }
+
+  bool any() const {
+    for (const auto word : words_) {
+      if (word) {
+        return true;
+      }
+    }
+    return false;
+  }
+
+  /// @brief this &= words (of the same length)
+  inline void intersect(const uint64_t *words) {
+    for (size_t w = 0; w < words_.size(); w++) {
+      words_[w] &= words[w];
+    }
+  }
+
+  /// @brief this |= words (of the same length)
+  inline void unite(const uint64_t *words) {
+    for (size_t w = 0; w < words_.size(); w++) {
+      words_[w] |= words[w];
+    }
+  }
+
+  template <typename F> void for_each(F &&f) const {
+    for_each_bit(words_.data(), words_.size(), f);
+  }
+
+private:
+  size_t size_ = 0;
+  std::vector<uint64_t> words_;
+};
+
+} // namespace samplns
+
+#endif
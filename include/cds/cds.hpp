@@ -7,8 +7,12 @@
 #include "parser.hpp"
 #include <atomic>
 #include <condition_variable>
+#include <memory>
 #include <mutex>
+#include <stdexcept>
 #include <thread>
+#include <unordered_map>
+#include <vector>
 
 using namespace samplns;
 using Edge = samplns::feature_pair;
@@ -54,9 +58,11 @@ private:
 class CDSSolverInterface {
 public:
   CDSSolverInterface(TransactionGraph *graph, std::vector<Edge> subgraph = {},
-                     bool use_heur = false, bool be_smart = true)
+                     bool use_heur = false, bool be_smart = true,
+                     std::shared_ptr<CDSBackend> backend = nullptr)
       : graph(graph), subgraph(subgraph), use_heur(use_heur),
-        solver(*graph, std::vector<Edge>(), subgraph, be_smart) {
+        solver(*graph, std::vector<Edge>(), subgraph, be_smart,
+               std::move(backend)) {
     // seed the rng with system time
     const auto seed = std::time(0);
     std::srand(seed);
@@ -78,6 +84,16 @@ public:
     return solver.get_iteration_statistics();
   }
 
+  /// @brief Reuses the solver for another subgraph (empty for the whole
+  /// graph). Only the edges of the subgraph are validated, and the backend,
+  /// e.g., the Gurobi environment, is kept.
+  void set_subgraph(std::vector<Edge> edges) {
+    std::lock_guard<std::mutex> lock(ensure_threadsafety_mtx);
+    solver.set_subgraph(edges);
+    subgraph = std::move(edges);
+    is_optimal = false;
+  }
+
   CDSSolver &get_internal_solver() { return solver; }
 
   bool has_optimal_solution() const { return is_optimal; }
@@ -85,23 +101,38 @@ public:
 private:
   bool is_optimal = false;
   const TransactionGraph *graph;
-  const std::vector<Edge> subgraph;
+  std::vector<Edge> subgraph;
   const bool use_heur;
   CDSSolver solver; // solver based on LNS approach
   std::mutex ensure_threadsafety_mtx;
 };
 
 /// @brief This class is designed to be directly used through the python
-/// interface, but all the computations to be executed in a seperate daemon
-/// thread (in C++)
+/// interface, but all the computations to be executed in seperate daemon
+/// threads (in C++). Every worker thread runs its own LNS, such that the
+/// workers explore different neighborhoods. Better solutions are published
+/// lock-free by exchanging a pointer to the best solution, and every worker
+/// continues from the best published solution in its next iteration.
 class AsyncCDSSolverInterface {
 public:
-  AsyncCDSSolverInterface(TransactionGraph *graph)
-      : graph(graph), solver(graph) {
-    std::function<void(const std::vector<Edge> &)> callback =
-        std::bind(&AsyncCDSSolverInterface::update_best_solution, this,
-                  std::placeholders::_1);
-    solver.get_internal_solver().add_better_solution_callback(callback);
+  using BackendFactory = std::function<std::shared_ptr<CDSBackend>()>;
+
+  AsyncCDSSolverInterface(TransactionGraph *graph, size_t num_threads = 1,
+                          const BackendFactory &make_backend = nullptr)
+      : graph(graph) {
+    if (num_threads == 0) {
+      throw std::invalid_argument("The CDS solver needs at least one thread.");
+    }
+    for (size_t i = 0; i < num_threads; i++) {
+      solvers.push_back(std::make_unique<CDSSolverInterface>(
+          graph, std::vector<Edge>(), false, true,
+          make_backend ? make_backend() : nullptr));
+      std::function<void(const std::vector<Edge> &)> callback =
+          std::bind(&AsyncCDSSolverInterface::update_best_solution, this,
+                    std::placeholders::_1);
+      solvers.back()->get_internal_solver().add_better_solution_callback(
+          callback);
+    }
   }
 
   bool start(std::vector<Edge> initial_solution, double iteration_timelimit);
@@ -110,60 +141,90 @@ public:
     if (do_stop.load())
       return;
 
-    // signal worker thread to stop
+    // signal worker threads to stop
     do_stop.store(true);
 
-    // wait for the worker thread to unlock the guard (by that signaling that it
-    // terminated)
+    // wait for the last worker thread to unlock the guard (by that signaling
+    // that all terminated)
     spawn_thread_guard.wait();
 
     // unlock the guard again
     spawn_thread_guard.notify();
   }
 
+  /// @brief Publishes the solution if it is larger than the best one.
   void update_best_solution(const std::vector<Edge> &solution) {
-    std::unique_lock<std::mutex> lock(data_mtx);
-    this->best_solution = solution;
+    auto candidate = std::make_shared<const std::vector<Edge>>(solution);
+    auto current = std::atomic_load(&best_solution);
+    while (!current || candidate->size() > current->size()) {
+      if (std::atomic_compare_exchange_weak(&best_solution, &current,
+                                            candidate)) {
+        break;
+      }
+    }
   }
 
-  void worker_optimize(std::vector<Edge> solution) {
-    // std::cout << "AsyncCDSLNS: Got initial solution of size " <<
-    // solution.size()
-    //          << "." << std::endl;
-    while (!this->do_stop.load() && !this->solver.has_optimal_solution()) {
-      this->solver.optimize(solution, 1, this->time_limit.load(), false);
+  void worker_optimize(size_t worker, std::vector<Edge> solution) {
+    auto &solver = *solvers[worker];
+    while (!this->do_stop.load() && !this->optimal.load()) {
+      // continue from the best solution of all workers
+      auto best = std::atomic_load(&best_solution);
+      if (best && best->size() > solution.size()) {
+        solution = *best;
+      }
+      solver.optimize(solution, 1, this->time_limit.load(), false);
+      if (solver.has_optimal_solution()) {
+        this->optimal.store(true);
+      }
+    }
+    if (--running_workers == 0) {
+      this->spawn_thread_guard.notify();
     }
-    this->spawn_thread_guard.notify();
-    // std::cout << "CDS LNS Worker thread stopped!" << std::endl;
   }
 
   std::vector<Edge> get_best_solution() {
-    std::unique_lock<std::mutex> lock(data_mtx);
-    auto sol = this->best_solution;
-    if (!graph->are_edges_clique_disjoint(sol)) {
+    auto best = std::atomic_load(&best_solution);
+    if (!best) {
+      return {};
+    }
+    if (!graph->are_edges_clique_disjoint(*best)) {
       throw std::runtime_error("The solution saved in the AsyncCDSSolver is "
                                "invalid! (Not disjoint)");
     }
-    return sol;
+    return *best;
   }
 
-  const auto get_iteration_statistics() {
+  /// @brief The iteration statistics of all workers, with the index of the
+  /// worker as "worker".
+  std::vector<std::unordered_map<std::string, int64_t>>
+  get_iteration_statistics() {
     std::unique_lock<std::mutex> lock(data_mtx);
-    const auto stats = solver.get_iteration_statistics();
+    std::vector<std::unordered_map<std::string, int64_t>> stats;
+    for (size_t i = 0; i < solvers.size(); i++) {
+      for (auto iteration : solvers[i]->get_iteration_statistics()) {
+        iteration["worker"] = static_cast<int64_t>(i);
+        stats.push_back(std::move(iteration));
+      }
+    }
     return stats;
   }
 
+  size_t count_threads() const { return solvers.size(); }
+
 private:
   const TransactionGraph *graph;
-  CDSSolverInterface solver; // solver based on LNS approach
-  std::vector<Edge> best_solution;
+  // solvers based on LNS approach, one per worker
+  std::vector<std::unique_ptr<CDSSolverInterface>> solvers;
+  std::shared_ptr<const std::vector<Edge>> best_solution;
 
   // synchronization variables
   std::atomic<bool> do_stop{false};
+  std::atomic<bool> optimal{false};
+  std::atomic<size_t> running_workers{0};
   std::atomic<double> time_limit{60.0};
   std::mutex data_mtx;
   Semaphore spawn_thread_guard{
-      1}; // assures that only one worker can exist at a time. Can't be
+      1}; // assures that only one set of workers can exist at a time. Can't be
           // mutex as it is modified by multiple threads.
 };
 
@@ -0,0 +1,119 @@
+#ifndef ALG_SCP_CDS_BACKEND_HPP
+#define ALG_SCP_CDS_BACKEND_HPP
+
+#include "../graph.hpp"
+#include "../instance.hpp"
+#include "cds_conflict_cliques.hpp"
+#include <chrono>
+#include <functional>
+#include <stdexcept>
+#include <unordered_set>
+#include <utility>
+#include <vector>
+
+namespace samplns {
+
+/// @brief A solver for the CDS model on the free edges of a neighborhood,
+/// i.e., for selecting a maximum number of edges such that no two of them are
+/// in a common clique.
+class CDSBackend {
+public:
+  virtual ~CDSBackend() = default;
+
+  /// @brief Computes a CDS within the edges. Returns the initial solution if
+  /// no (better) solution could be found within the time limit.
+  virtual std::vector<feature_pair>
+  solve(const std::vector<feature_pair> &edges, double timelimit,
+        const std::vector<feature_pair> &initial_solution) = 0;
+
+  /// @brief If the last solution is proven to be optimal.
+  virtual bool is_optimal() const = 0;
+
+  /// @brief The solver specific status of the last solve.
+  virtual int status() const = 0;
+
+  /// @brief Time for building the last model in milliseconds.
+  int64_t last_build_time() const { return build_time_ms; }
+
+  /// @brief Number of clique constraints of the last model.
+  size_t last_num_constraints() const { return num_constraints; }
+
+protected:
+  int64_t build_time_ms = 0;
+  size_t num_constraints = 0;
+};
+
+/// @brief A backend that passes the model to a function, e.g., a CP-SAT model
+/// in Python. The function gets the number of edges, the cliques of edges (as
+/// indices) of which at most one can be selected, the indices of the edges of
+/// the initial solution as hint, and the time limit. It returns the indices of
+/// the selected edges (empty if no solution was found) and if the solution is
+/// optimal.
+class CDSCallbackBackend : public CDSBackend {
+public:
+  using Callback = std::function<std::pair<std::vector<size_t>, bool>(
+      size_t, const std::vector<std::vector<size_t>> &,
+      const std::vector<size_t> &, double)>;
+
+  CDSCallbackBackend(const TransactionGraph &graph, Callback callback)
+      : graph(graph), callback(std::move(callback)) {}
+
+  std::vector<feature_pair>
+  solve(const std::vector<feature_pair> &edges, double timelimit,
+        const std::vector<feature_pair> &initial_solution) override {
+    build_time_ms = 0;
+    num_constraints = 0;
+    optimal = false;
+    if (timelimit <= 0.0) {
+      return initial_solution;
+    }
+    auto tstart = std::chrono::steady_clock::now();
+    const auto cliques = cds_conflict_cliques(graph, edges);
+    std::unordered_set<feature_pair> initial(initial_solution.begin(),
+                                             initial_solution.end());
+    std::vector<size_t> hint;
+    for (size_t i = 0; i < edges.size(); i++) {
+      if (initial.count(edges[i])) {
+        hint.push_back(i);
+      }
+    }
+    num_constraints = cliques.size();
+    build_time_ms = std::chrono::duration_cast<std::chrono::milliseconds>(
+                        std::chrono::steady_clock::now() - tstart)
+                        .count();
+    const double remaining = timelimit - build_time_ms / 1000.0;
+    if (remaining <= 0) {
+      // Out of time
+      return initial_solution;
+    }
+
+    const auto [selected, is_optimal] =
+        callback(edges.size(), cliques, hint, remaining);
+    if (selected.empty()) {
+      return initial_solution;
+    }
+    std::vector<feature_pair> solution;
+    solution.reserve(selected.size());
+    for (const auto i : selected) {
+      if (i >= edges.size()) {
+        throw std::out_of_range("The CDS backend selected an unknown edge.");
+      }
+      solution.push_back(edges[i]);
+    }
+    optimal = is_optimal;
+    return solution;
+  }
+
+  bool is_optimal() const override { return optimal; }
+
+  int status() const override { return static_cast<int>(optimal); }
+
+private:
+  const TransactionGraph &graph;
+  Callback callback;
+  bool optimal = false;
+};
+
+} // namespace samplns
+
+#endif
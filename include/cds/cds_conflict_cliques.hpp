@@ -0,0 +1,203 @@
+#ifndef ALG_SCP_CDS_CONFLICT_CLIQUES_HPP
+#define ALG_SCP_CDS_CONFLICT_CLIQUES_HPP
+
+#include "../bitset.hpp"
+#include "../graph.hpp"
+#include "../instance.hpp"
+
+#include <algorithm>
+#include <vector>
+
+namespace samplns {
+
+/// @brief Computes the constraints of a CDS model on the given edges: sets of
+/// edges (as indices into `edges`) of which at most one can be selected.
+///
+/// Two edges e = (u, v) and f = (p, q) conflict iff u, v, p, q form a clique.
+/// Instead of one constraint per conflicting pair, the conflicts are covered
+/// by cliques of the graph: for every edge e, the conflicting edges are the
+/// edges within K(e) = N(u) ∩ N(v) ∪ {u, v}, and every conflicting pair that is
+/// not yet covered by a previous clique is greedily extended to a large clique
+/// containing further uncovered conflicting edges of e. All edges within a
+/// clique pairwise conflict. Everything is computed on bitsets over the nodes
+/// of the edges: the neighborhoods in the graph, the neighborhoods in the
+/// edges, and the node pairs already covered together with e.
+/// The edges have to be edges of the graph.
+inline std::vector<std::vector<size_t>>
+cds_conflict_cliques(const TransactionGraph &graph,
+                     const std::vector<feature_pair> &edges) {
+  // local node indices
+  std::vector<int64_t> local_index(graph.count_nodes(), -1);
+  std::vector<feature_id> nodes;
+  Bitset node_mask(graph.count_nodes());
+  for (const auto &[p, q] : edges) {
+    for (const auto x : {p, q}) {
+      const auto i = graph.lit_to_index(x);
+      if (local_index[i] < 0) {
+        local_index[i] = static_cast<int64_t>(nodes.size());
+        nodes.push_back(x);
+        node_mask.set(i);
+      }
+    }
+  }
+  const size_t m = nodes.size();
+  const size_t words = (m + 63) / 64;
+
+  // closed neighborhoods N(x) ∪ {x} within the nodes
+  std::vector<Bitset> closed_nbrs(m, Bitset(m));
+  for (size_t a = 0; a < m; a++) {
+    Bitset row(graph.count_nodes());
+    std::copy(graph.neighbor_row(nodes[a]),
+              graph.neighbor_row(nodes[a]) + graph.row_words(), row.words());
+    row.intersect(node_mask.words());
+    row.for_each([&](size_t i) { closed_nbrs[a].set(local_index[i]); });
+    closed_nbrs[a].set(a);
+  }
+
+  // neighborhoods in the edges, and the incident edges (other endpoint, edge
+  // index) sorted by the other endpoint
+  std::vector<Bitset> edge_nbrs(m, Bitset(m));
+  std::vector<std::vector<std::pair<size_t, size_t>>> incident(m);
+  std::vector<std::pair<size_t, size_t>> endpoints(edges.size());
+  for (size_t j = 0; j < edges.size(); j++) {
+    const size_t a = local_index[graph.lit_to_index(edges[j].first)];
+    const size_t b = local_index[graph.lit_to_index(edges[j].second)];
+    endpoints[j] = {a, b};
+    edge_nbrs[a].set(b);
+    edge_nbrs[b].set(a);
+    incident[a].push_back({b, j});
+    incident[b].push_back({a, j});
+  }
+  for (auto &inc : incident) {
+    std::sort(inc.begin(), inc.end());
+  }
+  auto edge_index = [&](size_t a, size_t b) {
+    return std::lower_bound(incident[a].begin(), incident[a].end(),
+                            std::make_pair(b, size_t(0)))
+        ->second;
+  };
+  // the bits of the word w greater than a
+  auto above = [](size_t a, size_t w) {
+    if (w != a / 64) {
+      return ~uint64_t(0);
+    }
+    return ~((uint64_t(2) << (a % 64)) - 1);
+  };
+
+  std::vector<std::vector<size_t>> cliques;
+  std::vector<std::vector<size_t>> clique_nodes;
+  // the emitted cliques containing each edge
+  std::vector<std::vector<size_t>> edge_cliques(edges.size());
+  // covered[a] contains b iff e and (a, b) are in a common clique
+  std::vector<Bitset> covered(m, Bitset(m));
+  Bitset clique_mask(m);
+  auto cover = [&](const std::vector<size_t> &clique) {
+    for (const auto a : clique) {
+      clique_mask.set(a);
+    }
+    for (const auto a : clique) {
+      covered[a].unite(clique_mask.words());
+    }
+    for (const auto a : clique) {
+      clique_mask.reset(a);
+    }
+  };
+
+  for (size_t i = 0; i < edges.size(); i++) {
+    const auto [u, v] = endpoints[i];
+    Bitset candidates = closed_nbrs[u];
+    candidates.intersect(closed_nbrs[v].words());
+    cover({u, v});
+    for (const auto c : edge_cliques[i]) {
+      cover(clique_nodes[c]);
+    }
+
+    // Finds an uncovered edge (x, y) with x, y in the extension and x not in
+    // the clique, for x from the given node on. As the extension only
+    // shrinks while growing a clique, the nodes before x need not be
+    // checked again.
+    auto find_extending_edge = [&](const Bitset &clique,
+                                   const Bitset &extension, size_t &x,
+                                   size_t &y) {
+      for (size_t wx = x / 64; wx < words; wx++) {
+        uint64_t xs = extension.words()[wx] & ~clique.words()[wx];
+        if (wx == x / 64) {
+          xs &= ~((uint64_t(1) << (x % 64)) - 1); // from x on
+        }
+        const bool found = find_bit_in_word(xs, wx * 64, [&](size_t next) {
+          x = next;
+          for (size_t w = 0; w < words; w++) {
+            const uint64_t ys = edge_nbrs[x].words()[w] & extension.words()[w] &
+                                ~covered[x].words()[w];
+            if (ys) {
+              y = w * 64 + count_trailing_zeros64(ys);
+              return true;
+            }
+          }
+          return false;
+        });
+        if (found) {
+          return true;
+        }
+      }
+      return false;
+    };
+
+    // every uncovered conflicting edge (a, b) with a < b
+    candidates.for_each([&](size_t a) {
+      for (size_t w = a / 64; w < words; w++) {
+        auto uncovered = [&]() {
+          return edge_nbrs[a].words()[w] & candidates.words()[w] &
+                 ~covered[a].words()[w] & above(a, w);
+        };
+        // the lowest uncovered edge, as the covered pairs grow with each clique
+        for (uint64_t word = uncovered(); word; word = uncovered()) {
+          const size_t b = w * 64 + count_trailing_zeros64(word);
+
+          // grow a clique from e and (a, b)
+          Bitset clique(m);
+          Bitset extension = candidates;
+          for (const auto x : {u, v, a, b}) {
+            clique.set(x);
+            extension.intersect(closed_nbrs[x].words());
+          }
+          size_t x = 0, y;
+          while (find_extending_edge(clique, extension, x, y)) {
+            clique.set(x);
+            clique.set(y);
+            extension.intersect(closed_nbrs[x].words());
+            extension.intersect(closed_nbrs[y].words());
+          }
+
+          // all edges within the clique
+          const size_t id = cliques.size();
+          std::vector<size_t> members;
+          std::vector<size_t> clique_edges;
+          clique.for_each([&](size_t x) {
+            members.push_back(x);
+            for (size_t w2 = x / 64; w2 < words; w2++) {
+              for_each_bit_in_word(edge_nbrs[x].words()[w2] &
+                                       clique.words()[w2] & above(x, w2),
+                                   w2 * 64, [&](size_t y) {
+                                     const size_t j = edge_index(x, y);
+                                     clique_edges.push_back(j);
+                                     edge_cliques[j].push_back(id);
+                                   });
+            }
+          });
+          cover(members);
+          cliques.push_back(std::move(clique_edges));
+          clique_nodes.push_back(std::move(members));
+        }
+      }
+    });
+
+    // reset the covered pairs, which are all within K(e)
+    candidates.for_each([&](size_t a) { covered[a].clear(); });
+  }
+  return cliques;
+}
+
+} // namespace samplns
+
+#endif
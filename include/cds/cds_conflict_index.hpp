@@ -0,0 +1,158 @@
+#ifndef ALG_SCP_CDS_CONFLICT_INDEX_HPP
+#define ALG_SCP_CDS_CONFLICT_INDEX_HPP
+
+#include "../bitset.hpp"
+#include "../graph.hpp"
+#include "../instance.hpp"
+
+#include <unordered_map>
+#include <vector>
+
+namespace samplns {
+
+/// @brief Incrementally maintained index of the edges blocked by a (partial)
+/// CDS, answering if an edge is clique disjoint to all edges of the CDS.
+///
+/// Two edges e = (u, v) and f = (p, q) are in a common clique iff u and v are
+/// both in B(f) = N(p) ∩ N(q) ∪ {p, q}. Every edge f of the CDS gets a slot,
+/// and every literal x a bitset of the slots with x ∈ B(f). An edge (u, v) is
+/// thus compatible iff the slot bitsets of u and v do not intersect, which
+/// takes |CDS|/64 word operations instead of |CDS| clique checks.
+class CDSConflictIndex {
+public:
+  CDSConflictIndex(const TransactionGraph &graph)
+      : graph(graph), num_nodes(graph.count_nodes()) {}
+
+  /// @brief Checks if the edge is clique disjoint to all edges of the index.
+  bool is_compatible(const feature_pair &edge) const {
+    const auto &[u, v] = edge;
+    if (!graph.has_edge(u, v)) {
+      // B(f) only characterizes the conflicts of edges of the graph
+      for (const auto &[f, slot] : slots) {
+        if (!graph.are_edges_clique_disjoint(edge, f)) {
+          return false;
+        }
+      }
+      return true;
+    }
+    const auto *row_u = slot_row(u);
+    const auto *row_v = slot_row(v);
+    for (size_t w = 0; w < words_per_row; w++) {
+      if (row_u[w] & row_v[w]) {
+        return false;
+      }
+    }
+    return true;
+  }
+
+  /// @brief Calls f(conflicting_edge) for every edge of the index that is not
+  /// clique disjoint to the given edge.
+  template <typename F>
+  void for_each_conflict(const feature_pair &edge, F &&f) const {
+    const auto &[u, v] = edge;
+    if (!graph.has_edge(u, v)) {
+      for (const auto &[other, slot] : slots) {
+        if (!graph.are_edges_clique_disjoint(edge, other)) {
+          f(other);
+        }
+      }
+      return;
+    }
+    const auto *row_u = slot_row(u);
+    const auto *row_v = slot_row(v);
+    for (size_t w = 0; w < words_per_row; w++) {
+      for_each_bit_in_word(row_u[w] & row_v[w], w * 64,
+                           [&](size_t slot) { f(slot_edges[slot]); });
+    }
+  }
+
+  /// @brief Adds an edge to the CDS. Does nothing if it is already contained.
+  void insert(const feature_pair &edge) {
+    if (slots.count(edge)) {
+      return;
+    }
+    size_t slot;
+    if (!free_slots.empty()) {
+      slot = free_slots.back();
+      free_slots.pop_back();
+      slot_edges[slot] = edge;
+    } else {
+      slot = slot_edges.size();
+      slot_edges.push_back(edge);
+      if (slot >= words_per_row * 64) {
+        grow();
+      }
+    }
+    slots[edge] = slot;
+    set_slot(edge, slot, true);
+  }
+
+  /// @brief Removes an edge from the CDS.
+  /// @return False if the edge was not contained.
+  bool remove(const feature_pair &edge) {
+    auto it = slots.find(edge);
+    if (it == slots.end()) {
+      return false;
+    }
+    const size_t slot = it->second;
+    set_slot(edge, slot, false);
+    slots.erase(it);
+    free_slots.push_back(slot);
+    return true;
+  }
+
+  bool contains(const feature_pair &edge) const { return slots.count(edge); }
+
+  size_t size() const { return slots.size(); }
+
+  void clear() {
+    slots.clear();
+    slot_edges.clear();
+    free_slots.clear();
+    std::fill(data.begin(), data.end(), 0);
+  }
+
+private:
+  inline const uint64_t *slot_row(feature_id lit) const {
+    return data.data() + graph.lit_to_index(lit) * words_per_row;
+  }
+
+  /// @brief Sets or clears the slot bit of all literals in B(edge).
+  void set_slot(const feature_pair &edge, size_t slot, bool value) {
+    const auto &[p, q] = edge;
+    const size_t word = slot >> 6;
+    const uint64_t mask = uint64_t(1) << (slot & 63);
+    auto update = [&](size_t node) {
+      auto &w = data[node * words_per_row + word];
+      w = value ? (w | mask) : (w & ~mask);
+    };
+    graph.common_neighbors(p, q).for_each(update);
+    update(graph.lit_to_index(p));
+    update(graph.lit_to_index(q));
+  }
+
+  /// @brief Doubles the number of slots per literal.
+  void grow() {
+    const size_t new_words = std::max<size_t>(1, 2 * words_per_row);
+    std::vector<uint64_t> new_data(num_nodes * new_words, 0);
+    for (size_t i = 0; i < num_nodes; i++) {
+      std::copy(data.begin() + i * words_per_row,
+                data.begin() + (i + 1) * words_per_row,
+                new_data.begin() + i * new_words);
+    }
+    data.swap(new_data);
+    words_per_row = new_words;
+  }
+
+  const TransactionGraph &graph;
+  const size_t num_nodes;
+  size_t words_per_row = 0;
+  std::vector<uint64_t> data; // num_nodes x words_per_row slot bitsets
+  std::vector<feature_pair> slot_edges;
+  std::vector<size_t> free_slots;
+  std::unordered_map<feature_pair, size_t> slots;
+};
+
+} // namespace samplns
+
+#endif
@@ -3,8 +3,10 @@
 
 #include "../graph.hpp"
 #include "../instance.hpp"
+#include "cds_conflict_index.hpp"
 #include "cds_operations.hpp"
 
+#include <algorithm>
 #include <unordered_map>
 #include <vector>
 
@@ -54,7 +56,7 @@ private:
 
 class IndependentSet {
 public:
-  IndependentSet(const TransactionGraph &graph) : graph(graph) {}
+  IndependentSet(const TransactionGraph &graph) : conflicts(graph) {}
 
   void add_if_independent(const feature_pair &e) {
     if (is_independent(e)) {
@@ -63,28 +65,46 @@ public:
   }
 
   bool is_independent(const feature_pair &e) {
-    for (const auto &f : solution) {
-      if (!graph.are_edges_clique_disjoint(e, f)) {
-        return false;
-      }
-    }
-    return true;
+    return conflicts.is_compatible(e);
   }
 
   const std::vector<feature_pair> get() { return solution; }
 
 private:
-  void add(const feature_pair &e) { solution.push_back(e); }
+  void add(const feature_pair &e) {
+    solution.push_back(e);
+    conflicts.insert(e);
+  }
 
-  const TransactionGraph &graph;
+  CDSConflictIndex conflicts;
   std::vector<feature_pair> solution;
 };
 
+/// @brief Sorts the tuples stably and ascending by a key in [0, max_key] with
+/// buckets, i.e., in O(|tuples| + max_key).
+template <typename KeyFunction>
+void bucket_sort(std::vector<feature_pair> &tuples, size_t max_key,
+                 KeyFunction key) {
+  std::vector<size_t> bucket_start(max_key + 2, 0);
+  for (const auto &e : tuples) {
+    bucket_start[key(e) + 1]++;
+  }
+  for (size_t k = 1; k < bucket_start.size(); k++) {
+    bucket_start[k] += bucket_start[k - 1];
+  }
+  std::vector<feature_pair> sorted(tuples.size());
+  for (const auto &e : tuples) {
+    sorted[bucket_start[key(e)]++] = e;
+  }
+  tuples.swap(sorted);
+}
+
 class GreedyCDS {
 public:
   GreedyCDS(const TransactionGraph &graph,
             std::vector<std::vector<feature_id>> sample)
-      : graph(graph), cover_counters(graph.count_nodes()) {
+      : graph(graph), cover_counters(graph.count_nodes()),
+        max_cover(sample.size()) {
     do_sort = sample.size() > 0;
     // std::cout << "GREEDY CDS: Using " << sample.size()
     //           << " configurations to count covering." << std::endl;
@@ -99,8 +119,13 @@ public:
     }
   }
 
+  /// @brief Computes a maximal CDS of the subgraph (empty for the whole
+  /// graph) greedily.
+  /// @param seed Independent tuples of the subgraph that are taken first, e.g.,
+  /// a known CDS restricted to the subgraph.
   std::vector<feature_pair>
-  optimize(const std::vector<feature_pair> &subgraph) {
+  optimize(const std::vector<feature_pair> &subgraph,
+           const std::vector<feature_pair> &seed = {}) {
 
     std::vector<feature_pair> feasible_tuples;
     if (subgraph.empty()) {
@@ -112,27 +137,43 @@ public:
     // std::cout << "GREEDY CDS: considering " << feasible_tuples.size()
     //          << " tuples!" << std::endl;
 
-    // sort tuples ascending by cover counters
-    std::shuffle(feasible_tuples.begin(), feasible_tuples.end(), rng());
-    // std::cout << "GREEDY CDS: Shuffling done." << std::endl;
-    if (do_sort) {
-      std::stable_sort(feasible_tuples.begin(), feasible_tuples.end(),
-                       [&](const feature_pair &a, const feature_pair b) {
-                         const auto &[p, q] = a;
-                         const auto &[u, v] = b;
-                         return cover_counters.get(p, q) <
-                                cover_counters.get(u, v);
-                       });
-      // std::cout << "GREEDY CDS: Sorting done." << std::endl;
-    } else {
-      // std::cout << "GREEDY CDS: Sorting skipped." << std::endl;
-    }
-
     // construct cds
     IndependentSet cds(graph);
-    for (const auto &e : feasible_tuples) {
+    for (const auto &e : seed) {
       cds.add_if_independent(e);
     }
+    std::shuffle(feasible_tuples.begin(), feasible_tuples.end(), rng());
+    if (!do_sort) {
+      for (const auto &e : feasible_tuples) {
+        cds.add_if_independent(e);
+      }
+    }
+    // Min-degree greedy in rounds: the undecided tuples are ordered ascending
+    // by cover counters, with ties broken by the number of undecided tuples at
+    // their literals (a proxy for their degrees in the conflict graph), and
+    // then randomly. A fraction of them is decided in this order, the tuples
+    // blocked by the CDS are dropped, which updates the degrees, and the
+    // remaining ones are ordered again. As every round decides a constant
+    // fraction of the tuples, all rounds take linear time in total.
+    while (do_sort) {
+      feasible_tuples.erase(std::remove_if(feasible_tuples.begin(),
+                                           feasible_tuples.end(),
+                                           [&](const feature_pair &e) {
+                                             return !cds.is_independent(e);
+                                           }),
+                            feasible_tuples.end());
+      if (feasible_tuples.empty()) {
+        break;
+      }
+      order_by_residual_degrees(feasible_tuples);
+      const size_t round_size =
+          std::max<size_t>(1, feasible_tuples.size() / ROUND_DIVISOR);
+      for (size_t i = 0; i < round_size; i++) {
+        cds.add_if_independent(feasible_tuples[i]);
+      }
+      feasible_tuples.erase(feasible_tuples.begin(),
+                            feasible_tuples.begin() + round_size);
+    }
 
     const auto &solution = cds.get();
 
@@ -145,9 +186,33 @@ public:
   }
 
 private:
+  /// @brief Sorts the tuples stably by the number of tuples at their literals
+  /// and then by their cover counters.
+  void order_by_residual_degrees(std::vector<feature_pair> &tuples) {
+    residual_degrees.assign(graph.count_nodes(), 0);
+    for (const auto &[p, q] : tuples) {
+      residual_degrees[graph.lit_to_index(p)]++;
+      residual_degrees[graph.lit_to_index(q)]++;
+    }
+    const size_t max_degree =
+        *std::max_element(residual_degrees.begin(), residual_degrees.end());
+    bucket_sort(tuples, 2 * max_degree, [&](const feature_pair &e) {
+      return residual_degrees[graph.lit_to_index(e.first)] +
+             residual_degrees[graph.lit_to_index(e.second)];
+    });
+    bucket_sort(tuples, max_cover, [&](const feature_pair &e) {
+      return static_cast<size_t>(cover_counters.get(e.first, e.second));
+    });
+  }
+
+  // 1/ROUND_DIVISOR of the undecided tuples is decided per round
+  static constexpr size_t ROUND_DIVISOR = 8;
+
   bool do_sort;
   const TransactionGraph &graph;
   CounterMatrix cover_counters;
+  size_t max_cover;                     // upper bound on the cover counters
+  std::vector<size_t> residual_degrees; // undecided tuples per literal
 };
 
 #endif
@@ -5,6 +5,7 @@
 #include "../instance.hpp"
 #include "../lns.hpp"
 #include "../mis/mis_ip.hpp"
+#include "cds_conflict_index.hpp"
 #include <chrono>
 #include <random>
 #include <unordered_map>
@@ -210,15 +211,19 @@ public:
     current_cds.reserve(current_cds.size() + edges.size());
     uint64_t total_conflicts = 0;
 
+    CDSConflictIndex conflicts(graph);
+    for (const auto &existing_edge : current_cds) {
+      conflicts.insert(existing_edge);
+    }
+
     for (const auto &new_edge : edges) {
       bool add_edge = true;
-      for (const auto &existing_edge : current_cds) {
-        if (!graph.are_edges_clique_disjoint(new_edge, existing_edge)) {
-          nb_selector->report_collision(existing_edge);
-          add_edge = false;
-          total_conflicts++;
-        }
-      }
+      conflicts.for_each_conflict(
+          new_edge, [&](const feature_pair &existing_edge) {
+            nb_selector->report_collision(existing_edge);
+            add_edge = false;
+            total_conflicts++;
+          });
       if (add_edge) {
         added_edges.push_back(new_edge);
       }
@@ -244,25 +249,20 @@ public:
     return edges.size();
   }
 
+  /// @brief Computes a clique cover of the complement graph, unless the cover
+  /// of a previous restart is still up to date.
   void update_cliques() {
-    auto maximal_cliques = graph.complement_clique_heuristic();
-
-    size_t s_og = 0;
-    for (const auto &clique : cliques) {
-      s_og = std::max(s_og, clique.size());
+    if (!cliques.empty() &&
+        cliques_modifications == graph.count_modifications()) {
+      return;
     }
+    // the local CDS around the nodes may have changed with the graph
+    cached_node_cds.clear();
+    cliques_modifications = graph.count_modifications();
+    cliques = graph.complement_clique_heuristic(); // sorted by size
 
-    size_t s_new = 0;
-    for (const auto &clique : maximal_cliques) {
-      s_new = std::max(s_new, clique.size());
-    }
-
-    if (s_new > s_og) {
-      cliques = maximal_cliques;
-
-      std::cout << "Updated set of cliques! Largest one has size " << s_new
-                << std::endl;
-    }
+    std::cout << "Updated set of cliques! Largest one has size "
+              << cliques.front().size() << std::endl;
   }
 
 private:
@@ -272,6 +272,7 @@ private:
   MISNodeSelector *nb_selector;
   std::unordered_map<feature_id, std::vector<feature_pair>> cached_node_cds;
   std::vector<std::vector<feature_id>> cliques;
+  uint64_t cliques_modifications = 0; // of the graph when cliques were built
 };
 } // namespace samplns
 
@@ -3,16 +3,20 @@
 
 #include "../graph.hpp"
 #include "../instance.hpp"
+#include "cds_backend.hpp"
+#include "cds_conflict_cliques.hpp"
 #include "gurobi_c++.h"
 #include <chrono>
 #include <fmt/core.h>
 #include <iostream>
 #include <string>
-#include <unordered_map>
+#include <unordered_set>
+#include <vector>
 
 namespace samplns {
 
-class CDSIP {
+/// @brief The CDS model solved with Gurobi.
+class CDSIP : public CDSBackend {
 public:
   CDSIP(const TransactionGraph &graph, bool verbose = true)
       : graph(graph), verbose(verbose) {
@@ -20,12 +24,17 @@ public:
     env.start();
   }
 
-  int status() { return grb_status; }
+  int status() const override { return grb_status; }
+
+  bool is_optimal() const override { return grb_status == GRB_OPTIMAL; }
 
   std::vector<feature_pair>
   solve(const std::vector<feature_pair> &edge_subgraph,
         double timelimit = INFINITY,
-        const std::vector<feature_pair> &initial_solution = {}) {
+        const std::vector<feature_pair> &initial_solution = {}) override {
+    grb_status = 0;
+    build_time_ms = 0;
+    num_constraints = 0;
     if (timelimit <= 0.0) {
       return initial_solution;
     }
@@ -33,8 +42,6 @@ public:
       // measure model building time
       auto tstart = std::chrono::steady_clock::now();
 
-      // prepare needed data structures
-      const auto nodes = graph.unique_nodes_from_edgelist(edge_subgraph);
       const auto &edges = edge_subgraph;
 
       // Create an empty model
@@ -45,64 +52,40 @@ public:
 
       // Create boolean variable for every edge and weight it with 1.0 for
       // objective
-      std::unordered_map<feature_pair, GRBVar> edge_vars;
+      std::unordered_set<feature_pair> initial(initial_solution.begin(),
+                                               initial_solution.end());
+      std::vector<GRBVar> edge_vars;
+      edge_vars.reserve(edges.size());
       for (const auto &e : edges) {
         const auto &[p, q] = e;
         std::string vname = fmt::format("edgevar_{0}_{1}", p, q);
         GRBVar v = model.addVar(0.0, 1.0, 1.0, GRB_BINARY, vname);
-        edge_vars[{p, q}] = v;
-        edge_vars[{q, p}] = v;
-        if (initial_solution.size() > 0) {
-          bool activated =
-              std::find(initial_solution.cbegin(), initial_solution.cend(),
-                        e) != initial_solution.cend();
-          v.set(GRB_DoubleAttr_Start, static_cast<double>(activated));
+        if (!initial_solution.empty()) {
+          v.set(GRB_DoubleAttr_Start, static_cast<double>(initial.count(e)));
         }
+        edge_vars.push_back(v);
       }
 
-      // edge constraints [parallel edges]
-      for (size_t i = 0; i < edges.size(); i++) {
-        const auto &[p, q] = edges[i];
-
-        for (size_t j = i + 1; j < edges.size(); j++) {
-          const auto &[u, v] = edges[j];
-          const bool edges_disjoint = p != u && p != v && q != u && q != v;
-          if (edges_disjoint) {
-            int edge_sum = graph.has_edge(p, v) + graph.has_edge(q, u) +
-                           graph.has_edge(p, u) + graph.has_edge(q, v);
-            if (edge_sum == 4) {
-              // p, q, u, v form clique -> only one can be selected
-              model.addConstr(edge_vars[{p, q}] + edge_vars[{u, v}] <= 1);
-            }
-          }
+      // Edges within a clique of the graph -> only one can be selected.
+      // Covers all pairs of edges that share a node of a triangle or span
+      // a clique of four nodes.
+      const auto cliques = cds_conflict_cliques(graph, edges);
+      for (const auto &clique : cliques) {
+        GRBLinExpr sum;
+        for (const auto j : clique) {
+          sum += edge_vars[j];
         }
+        model.addConstr(sum <= 1);
       }
+      num_constraints = cliques.size();
 
-      // node constraints [triangle]
-      for (feature_id p : nodes) {
-        auto neighbors = graph.get_neighbors(p, edges);
-        std::sort(neighbors.begin(), neighbors.end());
-
-        for (size_t i = 0; i < neighbors.size(); i++) {
-          auto u = neighbors[i];
-          for (size_t j = i + 1; j < neighbors.size(); j++) {
-            auto v = neighbors[j];
-            if (graph.has_edge(u, v)) {
-              // p, u, v form clique -> only one edge can be selected
-              model.addConstr(edge_vars[{p, u}] + edge_vars[{p, v}] <= 1);
-            }
-          }
-        }
-      }
+      auto tstop = std::chrono::steady_clock::now();
+      build_time_ms =
+          std::chrono::duration_cast<std::chrono::milliseconds>(tstop - tstart)
+              .count();
 
       if (!isinf(timelimit)) {
-        auto tstop = std::chrono::steady_clock::now();
-        double dt = std::chrono::duration_cast<std::chrono::milliseconds>(
-                        tstop - tstart)
-                        .count() /
-                    1000.0;
-        // std::cout << "Building the model took " << dt << " seconds." <<
-        // std::endl;
+        double dt = build_time_ms / 1000.0;
         auto timelimit_ = timelimit - dt;
         if (timelimit_ <= 0) {
           // Out of time
@@ -120,11 +103,11 @@ public:
       if (model.get(GRB_IntAttr_SolCount) > 0) {
         // extract and return IP solution
         std::vector<feature_pair> solution;
-        for (const auto &e : edges) {
-          auto val = edge_vars[e].get(GRB_DoubleAttr_X);
+        for (size_t i = 0; i < edges.size(); i++) {
+          auto val = edge_vars[i].get(GRB_DoubleAttr_X);
 
           if (val > 0.9) {
-            solution.push_back(e);
+            solution.push_back(edges[i]);
           }
         }
         return solution;
@@ -143,7 +126,7 @@ public:
 
 private:
   GRBEnv env = GRBEnv(true);
-  int grb_status;
+  int grb_status = 0;
   const TransactionGraph &graph;
   const bool verbose;
 };
@@ -5,6 +5,7 @@
 #include <iomanip>
 #include <iostream>
 #include <memory>
+#include <optional>
 #include <random>
 #include <unordered_set>
 #include <vector>
@@ -12,11 +13,120 @@
 #include "../graph.hpp"
 #include "../instance.hpp"
 #include "../lns.hpp"
+#include "cds_backend.hpp"
 #include "cds_ip.hpp"
 #include "cds_operations.hpp"
 
 namespace samplns {
 
+/// @brief The free edges of a CDS neighborhood, i.e., the edges that are
+/// clique disjoint to all fixed edges. Fixing an edge (p, q) removes all edges
+/// with both endpoints in N(p) ∩ N(q) ∪ {p, q}. With many free edges, they are
+/// stored as bitset rows of the adjacency matrix, such that fixing an edge is a
+/// word-wise AND. Once few edges remain, they are moved to a list, which is
+/// filtered directly.
+class FreeEdgeSet {
+public:
+  /// @brief All edges of the graph are free.
+  FreeEdgeSet(const TransactionGraph &graph)
+      : graph(&graph), words(graph.row_words()), use_rows(true) {
+    const size_t n = graph.count_nodes();
+    rows.resize(n * words);
+    size_t count = 0;
+    for (size_t i = 0; i < n; i++) {
+      const auto *row = graph.neighbor_row(graph.index_to_lit(i));
+      std::copy(row, row + words, rows.begin() + i * words);
+      for (size_t w = 0; w < words; w++) {
+        count += popcount64(row[w]);
+      }
+    }
+    num_edges = count / 2;
+    switch_to_list_if_small();
+  }
+
+  /// @brief Only the given edges are free.
+  FreeEdgeSet(const TransactionGraph &graph,
+              const std::vector<feature_pair> &edges)
+      : graph(&graph), words(graph.row_words()), use_rows(false),
+        num_edges(edges.size()), edges(edges) {}
+
+  /// @brief Removes all edges that are not clique disjoint to the edge.
+  void fix(const feature_pair &edge) {
+    const auto &[p, q] = edge;
+    auto blocked = graph->common_neighbors(p, q);
+    blocked.set(graph->lit_to_index(p));
+    blocked.set(graph->lit_to_index(q));
+    if (use_rows) {
+      size_t removed = 0;
+      const auto *mask = blocked.words();
+      blocked.for_each([&](size_t i) {
+        auto *row = rows.data() + i * words;
+        for (size_t w = 0; w < words; w++) {
+          removed += popcount64(row[w] & mask[w]);
+          row[w] &= ~mask[w];
+        }
+      });
+      num_edges -= removed / 2; // every edge is in two rows
+      switch_to_list_if_small();
+    } else {
+      // An edge of the graph conflicts iff both endpoints are blocked. Edges
+      // of a subgraph that are not part of the graph are checked explicitly.
+      auto it = std::remove_if(edges.begin(), edges.end(), [&](const auto &e) {
+        if (!graph->has_edge(e.first, e.second)) {
+          return !graph->are_edges_clique_disjoint(e, edge);
+        }
+        return blocked.test(graph->lit_to_index(e.first)) &&
+               blocked.test(graph->lit_to_index(e.second));
+      });
+      edges.erase(it, edges.end());
+      num_edges = edges.size();
+    }
+  }
+
+  size_t size() const { return num_edges; }
+
+  std::vector<feature_pair> to_vector() const {
+    if (!use_rows) {
+      return edges;
+    }
+    std::vector<feature_pair> result;
+    result.reserve(num_edges);
+    for_each_row_edge(
+        [&](feature_id u, feature_id v) { result.push_back({u, v}); });
+    return result;
+  }
+
+private:
+  template <typename F> void for_each_row_edge(F &&f) const {
+    const size_t n = graph->count_nodes();
+    for (size_t i = 0; i < n; i++) {
+      const auto *row = rows.data() + i * words;
+      const feature_id u = graph->index_to_lit(i);
+      // only the upper triangle, i.e., bits > i
+      for_each_bit_from(row, words, i + 1,
+                        [&](size_t j) { f(u, graph->index_to_lit(j)); });
+    }
+  }
+
+  /// @brief Filtering a list is cheaper than updating the rows once the list
+  /// is not larger than the rows.
+  void switch_to_list_if_small() {
+    if (use_rows && num_edges <= rows.size()) {
+      edges = to_vector();
+      use_rows = false;
+      rows.clear();
+      rows.shrink_to_fit();
+    }
+  }
+
+  const TransactionGraph *graph;
+  size_t words;
+  bool use_rows;
+  size_t num_edges = 0;
+  std::vector<uint64_t> rows;
+  std::vector<feature_pair> edges;
+};
+
 class CDSNeighborhoodSelector
     : public NeighborhoodSelector<TransactionGraph, std::vector<feature_pair>> {
 public:
@@ -24,28 +134,16 @@ public:
                           const std::vector<feature_pair> &initial_solution,
                           const std::vector<feature_pair> &subgraph,
                           bool be_smart = true)
-      : NeighborhoodSelector(graph), best_solution(initial_solution),
-        subgraph(subgraph), be_smart(be_smart) {
-
-    // subgraph validity check
-    for (const auto &[p, q] : subgraph) {
-      if (!graph.has_edge(p, q)) {
-        throw std::runtime_error("The subgraph contains edges that are not "
-                                 "present in the transaction graph!");
-      }
-    }
+      : NeighborhoodSelector(graph), be_smart(be_smart) {
+    set_subgraph(subgraph);
+    best_solution = initial_solution;
 
     // solution contained in subgraph check
-    if (subgraph.size() > 0) {
+    if (!this->subgraph.empty()) {
+      const std::unordered_set<feature_pair> edges(this->subgraph.cbegin(),
+                                                   this->subgraph.cend());
       for (const auto &[p, q] : initial_solution) {
-        bool contained = false;
-        for (const auto &[u, v] : subgraph) {
-          if ((p == u && q == v) || (p == v && q == u)) {
-            contained = true;
-            break;
-          }
-        }
-        if (!contained) {
+        if (edges.count({p, q}) == 0 && edges.count({q, p}) == 0) {
           throw std::runtime_error(
               "The inital solution contains edges that are not "
               "present in the given subgraph!");
@@ -54,6 +152,25 @@ public:
     }
   }
 
+  /// @brief Restricts the neighborhoods to a new subgraph (empty for the whole
+  /// graph) and forgets the solutions of the previous one. The learned
+  /// neighborhood size is kept, as it depends on the solver rather than the
+  /// subgraph.
+  void set_subgraph(const std::vector<feature_pair> &edges) {
+    // subgraph validity check
+    for (const auto &[p, q] : edges) {
+      if (!graph.has_edge(p, q)) {
+        throw std::runtime_error("The subgraph contains edges that are not "
+                                 "present in the transaction graph!");
+      }
+    }
+    subgraph.assign(edges.cbegin(), edges.cend());
+    best_solution.clear();
+    solution_pool.clear();
+    stagnation_counter = 0;
+    edges_to_add_seq = 1;
+  }
+
   void feedback(Neighborhood<std::vector<feature_pair>> &neighborhood,
                 const std::vector<feature_pair> &solution,
                 double time_utilization, double nb_utilization) override {
@@ -119,7 +236,7 @@ public:
       }
     } else {
       // choose solution by chance
-      initial_solution = solution_pool[std::rand() % solution_pool.size()];
+      initial_solution = solution_pool[rng()() % solution_pool.size()];
       if (initial_solution.empty()) {
         throw std::runtime_error("Pool solution is empty!");
       }
@@ -137,48 +254,59 @@ public:
     std::shuffle(initial_solution.begin(), initial_solution.end(), rng());
 
     std::vector<feature_pair> fixed_edges;
-    std::vector<feature_pair> remaining_edges;
+    std::optional<FreeEdgeSet> free_edges;
 
     if (subgraph.empty()) {
       // select random edge as first fixed edge, calc remaining edges
+      free_edges.emplace(graph);
       fixed_edges.push_back(initial_solution.back());
+      free_edges->fix(initial_solution.back());
       initial_solution.pop_back();
-      remaining_edges = graph.get_edges([&](const feature_pair &edge) {
-        return this->is_remaining_edge(edge, fixed_edges);
-      });
     } else {
       // only consider subgraph
-      remaining_edges = subgraph;
+      free_edges.emplace(graph, subgraph);
     }
 
-    std::vector<feature_pair> remaining_edges_cpy = remaining_edges;
+    std::optional<FreeEdgeSet> free_edges_cpy;
     size_t edges_added_in_iter = 0;
 
-    // iteratively select next random edge, update remaining edges in place
-    while (!initial_solution.empty() &&
-           remaining_edges.size() > max_free_edges) {
-      remaining_edges_cpy = remaining_edges;
+    // iteratively select next random edges and remove the conflicting edges
+    while (!initial_solution.empty() && free_edges->size() > max_free_edges) {
+      // only cheap to copy if small, otherwise rebuilt if needed
+      free_edges_cpy.reset();
+      if (free_edges->size() <= COPY_FREE_EDGES_CAP) {
+        free_edges_cpy = free_edges;
+      }
       edges_added_in_iter = 0;
       for (size_t i = 0; i < edges_to_add_seq && !initial_solution.empty();
            i++) {
         fixed_edges.push_back(initial_solution.back());
+        free_edges->fix(initial_solution.back());
         initial_solution.pop_back();
         edges_added_in_iter++;
       }
-      update_remaining_edges(fixed_edges, remaining_edges);
     }
 
     // Restore penultimate step if all edges were eliminated
-    if (remaining_edges.empty()) {
-      // std::cout << "Erased all edges. Restoring "
-      //              "penultimate state."
-      //           << std::endl;
+    if (free_edges->size() == 0 && edges_added_in_iter > 0) {
       for (size_t i = 0; i < edges_added_in_iter; i++) {
         initial_solution.push_back(fixed_edges.back());
         fixed_edges.pop_back();
       }
-      remaining_edges = remaining_edges_cpy;
+      if (!free_edges_cpy) {
+        if (subgraph.empty()) {
+          free_edges_cpy.emplace(graph);
+        } else {
+          free_edges_cpy.emplace(graph, subgraph);
+        }
+        for (const auto &edge : fixed_edges) {
+          free_edges_cpy->fix(edge);
+        }
+      }
+      free_edges = std::move(free_edges_cpy);
     }
+    auto remaining_edges = free_edges->to_vector();
+    free_edges.reset();
 
     // erase random edges if remaining_edges are still too many
     if (remaining_edges.size() > max_free_edges) {
@@ -187,13 +315,11 @@ public:
 
       // erase all edges from initial_solution from remaining_edges
       if (initial_solution.size() > 0) {
-        auto new_end =
-            std::remove_if(remaining_edges.begin(), remaining_edges.end(),
-                           [&](const feature_pair &e) {
-                             auto itr = std::find(initial_solution.cbegin(),
-                                                  initial_solution.cend(), e);
-                             return itr != initial_solution.cend();
-                           });
+        const std::unordered_set<feature_pair> unfixed(
+            initial_solution.cbegin(), initial_solution.cend());
+        auto new_end = std::remove_if(
+            remaining_edges.begin(), remaining_edges.end(),
+            [&](const feature_pair &e) { return unfixed.count(e) > 0; });
         size_t new_len = std::distance(remaining_edges.begin(), new_end);
         if (new_len != remaining_edges.size() - initial_solution.size()) {
           throw std::runtime_error(
@@ -205,7 +331,8 @@ public:
 
       // erase random edges, reappend initial solution edges
       std::shuffle(remaining_edges.begin(), remaining_edges.end(), rng());
-      remaining_edges.resize(max_free_edges - initial_solution.size());
+      remaining_edges.resize(max_free_edges -
+                             std::min(max_free_edges, initial_solution.size()));
       remaining_edges.insert(remaining_edges.end(), initial_solution.cbegin(),
                              initial_solution.cend());
       // std::cout << " edges." << std::endl;
@@ -244,29 +371,8 @@ private:
     }
   }
 
-  void update_remaining_edges(const std::vector<feature_pair> &fixed_edges,
-                              std::vector<feature_pair> &remaining_edges) {
-    // (efficiently) remove all elements from list of remaining edges that are
-    // not feasible anymore
-    auto it =
-        std::remove_if(remaining_edges.begin(), remaining_edges.end(),
-                       [&](const feature_pair &edge) {
-                         return !this->is_remaining_edge(edge, fixed_edges);
-                       });
-    remaining_edges.resize(std::distance(remaining_edges.begin(), it));
-  }
-
-  [[nodiscard]] inline bool
-  is_remaining_edge(const feature_pair &edge,
-                    const std::vector<feature_pair> &fixed_edges) const {
-    return std::all_of(fixed_edges.cbegin(), fixed_edges.cend(),
-                       [&edge, this](const auto &o_edge) {
-                         return this->graph.are_edges_clique_disjoint(edge,
-                                                                      o_edge);
-                       });
-  }
-
   const size_t FREE_EDGES_LOW_CAP = 250;
+  const size_t COPY_FREE_EDGES_CAP = 1'000'000;
   const size_t STAGNATION_THRESHOLD = 5;
   const size_t SOLUTION_POOL_SIZE = STAGNATION_THRESHOLD * 4;
 
@@ -277,7 +383,7 @@ private:
   std::vector<std::vector<feature_pair>> solution_pool;
 
   const TransactionGraph &graph = instance;
-  const std::vector<feature_pair> subgraph;
+  std::vector<feature_pair> subgraph;
   const bool be_smart; // toggle for experiments
 };
 
@@ -287,18 +393,30 @@ public:
   CDSSolver(const TransactionGraph &graph,
             const std::vector<feature_pair> &initial_solution,
             const std::vector<feature_pair> &subgraph = {},
-            bool nbhd_selector_be_smart = true)
+            bool nbhd_selector_be_smart = true,
+            std::shared_ptr<CDSBackend> backend = nullptr)
       : LowerBoundLNS(new CDSNeighborhoodSelector(graph, initial_solution,
                                                   subgraph,
                                                   nbhd_selector_be_smart),
                       initial_solution),
-        graph(graph), be_smart(nbhd_selector_be_smart) {}
+        graph(graph), be_smart(nbhd_selector_be_smart),
+        backend(backend ? std::move(backend)
+                        : std::make_shared<CDSIP>(graph, false)) {}
 
   [[nodiscard]] int64_t
   get_solution_score(const std::vector<feature_pair> &solution) const override {
     return (int64_t)solution.size();
   }
 
+  /// @brief Prepares the solver for a new subgraph (empty for the whole
+  /// graph), keeping the backend and the tuning of the neighborhood selector.
+  void set_subgraph(const std::vector<feature_pair> &subgraph) {
+    static_cast<CDSNeighborhoodSelector &>(get_neighborhood_selector())
+        .set_subgraph(subgraph);
+    reset();
+    proven_optimal = false;
+  }
+
   [[nodiscard]] bool is_optimal_solution(
       const std::vector<feature_pair> &solution) const override {
     return this->proven_optimal;
@@ -330,20 +448,23 @@ public:
     //             << std::endl;
     // }
 
-    // solve ip
-    auto solution = ip_model.solve(edge_subgraph, timelimit, hints);
+    // solve the model
+    auto solution = backend->solve(edge_subgraph, timelimit, hints);
+    set_iteration_statistic("model_build_time", backend->last_build_time());
+    set_iteration_statistic("model_constraints",
+                            backend->last_num_constraints());
     if (solution.empty()) {
       return neighborhood.fixed_solution;
     }
 
-    set_iteration_statistic("grb_status", ip_model.status());
+    set_iteration_statistic("solver_status", backend->status());
 
     // check validity of solution (debugging)
     cds_check_solution(graph, solution);
 
     // check optimality
     if (neighborhood.fixed_solution.empty()) {
-      proven_optimal |= (ip_model.status() == GRB_OPTIMAL);
+      proven_optimal |= backend->is_optimal();
     }
     set_iteration_statistic("proven_optimal",
                             static_cast<int64_t>(proven_optimal));
@@ -364,8 +485,8 @@ private:
   bool proven_optimal = false;
 
   const TransactionGraph &graph;
-  CDSIP ip_model = CDSIP(graph, false); // not verbose
   const bool be_smart;
+  std::shared_ptr<CDSBackend> backend; // by default Gurobi, not verbose
 };
 } // namespace samplns
 
@@ -1,9 +1,11 @@
 #ifndef ALG_SCP_GRAPH_HPP
 #define ALG_SCP_GRAPH_HPP
 
+#include "bitset.hpp"
 #include "instance.hpp"
 
 #include <algorithm>
+#include <cassert>
 #include <fmt/core.h>
 #include <functional>
 #include <iostream>
@@ -19,43 +21,85 @@ namespace samplns {
 
 static constexpr size_t gauss(size_t n) { return n * (n + 1) / 2; };
 
-/// @brief An adjacency matrix in lower triangular form. Its main goal
-/// is to achieve high memory efficiency and low access times because
-/// of a long, continuous stripe of memory
-class TriangularMatrix {
+/// @brief A symmetric adjacency matrix with one bitset row per node. The rows
+/// are padded to full cache lines, such that neighborhoods can be intersected
+/// and counted word-wise.
+class BitMatrix {
 public:
-  TriangularMatrix(size_t n) : size_(n), data_(gauss(n), false) {}
+  static constexpr size_t ALIGNMENT = 64; // bytes, one cache line
 
-  inline bool get(size_t i, size_t j) const { return data_[index(i, j)]; }
+  BitMatrix(size_t n)
+      : size_(n), stride_(round_up((n + 63) / 64, ALIGNMENT / 8)),
+        data_(n * stride_, 0) {}
 
+  inline bool get(size_t i, size_t j) const {
+    return (row(i)[j >> 6] >> (j & 63)) & 1;
+  }
+
+  /// @brief Sets the entries (i, j) and (j, i).
   inline void set(size_t i, size_t j, bool value) {
-    data_[index(i, j)] = value;
+    if (i == j)
+      throw std::runtime_error(
+          "Error: Call to BitMatrix::set with identical node indeces! "
+          "(Edge from node to itself does not exist!)");
+    set_bit(i, j, value);
+    set_bit(j, i, value);
   }
 
-  inline void flip() { data_.flip(); }
+  /// @brief Complements all entries except for the diagonal.
+  void flip() {
+    const size_t words = (size_ + 63) / 64;
+    for (size_t i = 0; i < size_; i++) {
+      auto *r = row(i);
+      for (size_t w = 0; w < words; w++) {
+        r[w] = ~r[w];
+      }
+      if (size_ % 64 != 0) {
+        r[words - 1] &= (uint64_t(1) << (size_ % 64)) - 1;
+      }
+      set_bit(i, i, false);
+    }
+  }
 
   inline size_t size() const { return size_; }
 
+  /// @brief The number of words of a row that contain entries.
+  inline size_t row_words() const { return (size_ + 63) / 64; }
+
+  inline const uint64_t *row(size_t i) const {
+    return data_.data() + i * stride_;
+  }
+
 private:
-  inline size_t index(int i, int j) const {
-    if (i == j)
-      throw std::runtime_error(
-          "Error: Call to TriangularMatrix::index with identical node indeces! "
-          "(Edge from node to itself does not exist!)");
-    if (i > j)
-      std::swap(i, j);
-    return i * size_ - (i * (i + 1)) / 2 + j;
+  static constexpr size_t round_up(size_t x, size_t m) {
+    return ((x + m - 1) / m) * m;
+  }
+
+  inline uint64_t *row(size_t i) { return data_.data() + i * stride_; }
+
+  inline void set_bit(size_t i, size_t j, bool value) {
+    const uint64_t mask = uint64_t(1) << (j & 63);
+    if (value) {
+      row(i)[j >> 6] |= mask;
+    } else {
+      row(i)[j >> 6] &= ~mask;
+    }
   }
 
   size_t size_;
-  std::vector<bool> data_;
+  size_t stride_; // words per row
+  std::vector<uint64_t, AlignedAllocator<uint64_t, ALIGNMENT>> data_;
 };
 
+/// @brief The graph of feasible literal pairs. The adjacency matrix has one
+/// bitset row per literal, in the order -num_vars, ..., -1, 1, ..., num_vars,
+/// so most queries are word-wise operations on these rows.
 class TransactionGraph {
 public:
   TransactionGraph(uint64_t num_vars)
       : num_vars(num_vars), num_nodes(num_vars * 2),
-        num_cells(gauss(num_nodes - 1)), adjacency_matrix(num_nodes) {
+        num_cells(gauss(num_nodes - 1)), adjacency_matrix(num_nodes),
+        degrees(num_nodes, 0) {
     // std::cout << "Transaction graph built." << std::endl;
   }
 
@@ -79,8 +123,13 @@ public:
     const auto i = lit_to_index(lit1);
     const auto j = lit_to_index(lit2);
     bool edge_added = !this->adjacency_matrix.get(i, j);
-    this->num_edges += edge_added;
-    this->adjacency_matrix.set(i, j, true);
+    if (edge_added) {
+      this->num_edges++;
+      this->degrees[i]++;
+      this->degrees[j]++;
+      this->modifications++;
+      this->adjacency_matrix.set(i, j, true);
+    }
     return edge_added;
   }
 
@@ -117,14 +166,30 @@ public:
     const auto i = lit_to_index(lit1);
     const auto j = lit_to_index(lit2);
     bool edge_removed = this->adjacency_matrix.get(i, j);
-    this->num_edges -= edge_removed;
-    this->adjacency_matrix.set(i, j, false);
+    if (edge_removed) {
+      this->num_edges--;
+      this->degrees[i]--;
+      this->degrees[j]--;
+      this->modifications++;
+      this->adjacency_matrix.set(i, j, false);
+    }
     return edge_removed;
   }
 
   /// @brief Flips every bit in the adjacency matrix. This causes the graph to
   /// become the complement of itself.
-  void complement() { this->adjacency_matrix.flip(); }
+  void complement() {
+    this->adjacency_matrix.flip();
+    this->num_edges = this->num_cells - this->num_edges;
+    for (auto &degree : this->degrees) {
+      degree = this->num_nodes - 1 - degree;
+    }
+    this->modifications++;
+  }
+
+  /// @brief The number of modifications of the graph so far, such that
+  /// structures derived from the graph can be cached until it changes.
+  inline uint64_t count_modifications() const { return this->modifications; }
 
   /// @brief For debugging purposes. Exports a "dotgraph" representation of the
   /// graph. This can be used to draw the graph using e.g. graphviz.
@@ -198,8 +263,6 @@ public:
         if (i == 0 || j == 0)
           continue;
 
-        assert(lits_to_indices(i, j) == lits_to_indices(j, i));
-
         bool i_j_confl = (confl_map[i].find(j) != confl_map[i].end());
         (void)i_j_confl;
         bool j_i_confl = (confl_map[j].find(i) != confl_map[j].end());
@@ -243,37 +306,53 @@ public:
   /// @return The list of nodes adjacent to the literal node.
   std::vector<feature_id> get_neighbors(feature_id lit) const {
     std::vector<feature_id> neighbors;
-
-    for (feature_id i = -(feature_id)this->num_vars;
-         i <= (feature_id)this->num_vars; i++) {
-      if (i == lit || i == 0)
-        continue;
-
-      if (has_edge(i, lit)) {
-        neighbors.push_back(i);
-      }
-    }
-
+    for_each_bit(neighbor_row(lit), adjacency_matrix.row_words(),
+                 [&](size_t j) { neighbors.push_back(index_to_lit(j)); });
     return neighbors;
   }
 
   /// @brief Counts the number of nodes adjacent to the given literal node.
+  /// The degrees are maintained by the modifications, so this is a constant
+  /// time operation.
   /// @param lit The literal node.
-  /// @return The list of nodes adjacent to the literal node.
-  size_t count_neighbors(feature_id lit) const {
+  /// @return The number of nodes adjacent to the literal node.
+  inline size_t count_neighbors(feature_id lit) const {
+    return degrees[lit_to_index(lit)];
+  }
 
+  /// @brief Counts the nodes adjacent to both given literal nodes.
+  size_t count_common_neighbors(feature_id lit1, feature_id lit2) const {
+    const auto *row1 = neighbor_row(lit1);
+    const auto *row2 = neighbor_row(lit2);
     size_t cnt = 0;
+    for (size_t w = 0; w < adjacency_matrix.row_words(); w++) {
+      cnt += popcount64(row1[w] & row2[w]);
+    }
+    return cnt;
+  }
 
-    for (feature_id i = -(feature_id)this->num_vars;
-         i <= (feature_id)this->num_vars; i++) {
-      if (i == 0 || i == lit)
-        continue;
-      cnt += has_edge(i, lit);
+  /// @brief The nodes adjacent to both given literal nodes as bitset over the
+  /// node indices (see `lit_to_index`).
+  Bitset common_neighbors(feature_id lit1, feature_id lit2) const {
+    Bitset common(num_nodes);
+    auto *words = common.words();
+    const auto *row1 = neighbor_row(lit1);
+    const auto *row2 = neighbor_row(lit2);
+    for (size_t w = 0; w < adjacency_matrix.row_words(); w++) {
+      words[w] = row1[w] & row2[w];
     }
+    return common;
+  }
 
-    return cnt;
+  /// @brief The packed adjacency row of a literal node, with
+  /// `count_nodes()` bits indexed by `lit_to_index`.
+  inline const uint64_t *neighbor_row(feature_id lit) const {
+    return adjacency_matrix.row(lit_to_index(lit));
   }
 
+  /// @brief The number of 64-bit words of a row of `neighbor_row`.
+  inline size_t row_words() const { return adjacency_matrix.row_words(); }
+
   /// @brief Finds all neighbors of the literal node that are contained in the
   /// given list of nodes (subgraph).
   /// @param lit The literal node.
@@ -320,17 +399,15 @@ public:
   /// @return The list of nodes adjacent to the literal node (incident to an
   /// edge passed as parameter).
   std::vector<feature_id> get_non_neighbors(feature_id lit) const {
-    std::vector<feature_id> neighbors;
-    for (feature_id i = -(feature_id)this->num_vars;
-         i <= (feature_id)this->num_vars; i++) {
-      if (i == lit || i == 0)
-        continue;
-
-      if (!has_edge(i, lit)) {
-        neighbors.push_back(i);
+    std::vector<feature_id> non_neighbors;
+    const auto *row = neighbor_row(lit);
+    const size_t self = lit_to_index(lit);
+    for (size_t j = 0; j < num_nodes; j++) {
+      if (j != self && !((row[j >> 6] >> (j & 63)) & 1)) {
+        non_neighbors.push_back(index_to_lit(j));
       }
     }
-    return neighbors;
+    return non_neighbors;
   }
 
   /// @brief Builds a vector with all unique edges of the graph that pass the
@@ -339,35 +416,32 @@ public:
   std::vector<feature_pair>
   get_edges(const std::function<bool(const feature_pair &)> &predicate) const {
     std::vector<feature_pair> edges;
-
-    for (feature_id i = -this->num_vars; i <= (feature_id)this->num_vars; i++) {
-      for (feature_id j = i + 1; j <= (feature_id)this->num_vars; j++) {
-        if (i != 0 && j != 0) {
-          if (has_edge(i, j) && predicate({i, j})) {
-            edges.push_back({i, j});
-          }
-        }
+    for_each_edge([&](feature_id i, feature_id j) {
+      if (predicate({i, j})) {
+        edges.push_back({i, j});
       }
-    }
-
+    });
     return edges;
   }
 
+  /// @brief Calls f(i, j) for every edge with i < j, in ascending order.
+  template <typename F> void for_each_edge(F &&f) const {
+    const size_t words = adjacency_matrix.row_words();
+    for (size_t i = 0; i < num_nodes; i++) {
+      const auto *row = adjacency_matrix.row(i);
+      const feature_id lit_i = index_to_lit(i);
+      // only the upper triangle, i.e., bits > i
+      for_each_bit_from(row, words, i + 1,
+                        [&](size_t j) { f(lit_i, index_to_lit(j)); });
+    }
+  }
+
   /// @brief Builds a vector with all unique edges of the graph.
   /// @return The vector containing all edges.
   std::vector<feature_pair> get_all_edges() const {
     std::vector<feature_pair> edges;
-
-    for (feature_id i = -this->num_vars; i <= (feature_id)this->num_vars; i++) {
-      for (feature_id j = i + 1; j <= (feature_id)this->num_vars; j++) {
-        if (i != 0 && j != 0) {
-          if (has_edge(i, j)) {
-            edges.push_back({i, j});
-          }
-        }
-      }
-    }
-
+    edges.reserve(num_edges);
+    for_each_edge([&](feature_id i, feature_id j) { edges.push_back({i, j}); });
     return edges;
   }
 
@@ -435,9 +509,18 @@ public:
   /// @return False, if any two edges of the vector are in a clique. True, if
   /// all edges are disjoint.
   bool are_edges_clique_disjoint(const std::vector<feature_pair> &edges) const {
+    // Two edges without common endpoint are in a clique iff both endpoints of
+    // the second edge are common neighbors of the first one.
     for (size_t i = 0; i < edges.size(); i++) {
+      const auto &[u, v] = edges[i];
+      const auto common = common_neighbors(u, v);
       for (size_t j = i + 1; j < edges.size(); j++) {
-        if (!are_edges_clique_disjoint(edges[i], edges[j])) {
+        const auto &[p, q] = edges[j];
+        if (u != p && v != p && u != q && v != q) {
+          if (common.test(lit_to_index(p)) && common.test(lit_to_index(q))) {
+            return false;
+          }
+        } else if (!are_edges_clique_disjoint(edges[i], edges[j])) {
           return false;
         }
       }
@@ -464,22 +547,33 @@ public:
     std::mt19937 random_generator(rd());
 
     // sort ascending by number of neighbors, so that first element has highest
-    // amount of non-neighbors
+    // amount of non-neighbors. The degrees are below num_nodes, so the
+    // vertices are sorted stably with one bucket per degree.
     std::shuffle(vertices.begin(), vertices.end(), random_generator);
-    std::stable_sort(vertices.begin(), vertices.end(),
-                     [&](const feature_id &v, const feature_id &u) {
-                       return count_neighbors(v) < count_neighbors(u);
-                     });
+    std::vector<size_t> bucket_start(num_nodes + 1, 0);
+    for (const auto &v : vertices) {
+      bucket_start[count_neighbors(v) + 1]++;
+    }
+    for (size_t d = 1; d < bucket_start.size(); d++) {
+      bucket_start[d] += bucket_start[d - 1];
+    }
+    std::vector<feature_id> sorted_vertices(vertices.size());
+    for (const auto &v : vertices) {
+      sorted_vertices[bucket_start[count_neighbors(v)]++] = v;
+    }
+    vertices.swap(sorted_vertices);
 
     std::vector<std::vector<feature_id>> cliques(num_cliques);
+    // union of the neighbors of each clique: a node can be added iff it is not
+    // adjacent to any node of the clique
+    std::vector<Bitset> clique_neighbors(num_cliques, Bitset(num_nodes));
 
     for (const auto &v : vertices) {
-      for (auto &clique : cliques) {
-        bool all_non_neighbors =
-            std::all_of(clique.cbegin(), clique.cend(),
-                        [&](const feature_id &u) { return !has_edge(u, v); });
-        if (clique.empty() || all_non_neighbors) {
-          clique.push_back(v);
+      const size_t index_v = lit_to_index(v);
+      for (size_t c = 0; c < num_cliques; c++) {
+        if (cliques[c].empty() || !clique_neighbors[c].test(index_v)) {
+          cliques[c].push_back(v);
+          clique_neighbors[c].unite(neighbor_row(v));
           break;
         }
       }
@@ -501,7 +595,6 @@ public:
     return cliques;
   }
 
-private:
   /// @brief Calculates the encoded index of the literal.
   /// @param lit The literal. Negated literals are the variable (>=1) multiplied
   /// with -1.
@@ -514,12 +607,21 @@ private:
     return (size_t)(lit + this->num_vars - is_pos);
   }
 
+  /// @brief The literal of a row/column index (inverse of `lit_to_index`).
+  inline feature_id index_to_lit(size_t index) const {
+    const auto lit = (feature_id)index - (feature_id)this->num_vars;
+    return lit >= 0 ? lit + 1 : lit;
+  }
+
+private:
   const size_t num_vars;
   const size_t num_nodes;
   const size_t num_cells; // the number of "cells" in the matrix (also maximum
                           // number of edges in the graph)
   size_t num_edges = 0;
-  TriangularMatrix adjacency_matrix;
+  BitMatrix adjacency_matrix;
+  std::vector<size_t> degrees; // by lit_to_index
+  uint64_t modifications = 0;
 };
 } // namespace samplns
 
@@ -2,6 +2,8 @@
 #define ALG_SCP_INSTANCE_HPP
 
 #include "nlohmann/json.hpp"
+#include <cstdint>
+#include <cstdlib>
 #include <string>
 #include <utility>
 #include <vector>
@@ -59,6 +61,33 @@ public:
 
 static_assert(std::is_signed<feature_id>());
 
+/**
+ * Packed 64-bit id of a tuple, as used by the Python code
+ * (samplns.utils.tuple_id). The literal index of the (zero-based) feature f
+ * with value v is 2*f+v and the id of the literal indices a < b is (a<<32)|b.
+ */
+using tuple_id = int64_t;
+
+inline tuple_id to_tuple_id(const FeatureTuple &t) {
+  auto literal_index = [](feature_id lit) -> int64_t {
+    return 2 * (static_cast<int64_t>(std::abs(lit)) - 1) + (lit > 0 ? 1 : 0);
+  };
+  int64_t a = literal_index(t.first);
+  int64_t b = literal_index(t.second);
+  if (a > b) {
+    std::swap(a, b);
+  }
+  return (a << 32) | b;
+}
+
+inline FeatureTuple from_tuple_id(tuple_id id) {
+  auto literal = [](int64_t literal_index) -> feature_id {
+    const auto f = static_cast<feature_id>(literal_index / 2 + 1);
+    return literal_index % 2 == 1 ? f : -f;
+  };
+  return FeatureTuple(literal(id >> 32), literal(id & 0xFFFFFFFF));
+}
+
 using feature_pair =
     FeatureTuple; // used for encoding pairs of literals. May represent
                   // an edge in a literal graph or just "coordinates"
@@ -195,7 +195,20 @@ public:
 
   const auto &get_iteration_statistics() const { return iteration_statistics; }
 
+  /// @brief Forgets the best solution, the optimality and the iteration
+  /// statistics, such that the LNS can be reused for another run.
+  virtual void reset() {
+    this->optimal_ = false;
+    this->best_solution = solution_type();
+    this->iteration_statistics.clear();
+  }
+
 protected:
+  NeighborhoodSelector<instance_type, solution_type> &
+  get_neighborhood_selector() {
+    return *nb_selector;
+  }
+
   void set_iteration_statistic(std::string key, int64_t value) {
     this->iteration_statistics.back().insert_or_assign(key, value);
   }
@@ -254,6 +267,11 @@ public:
     return get_solution_score(solution) > lb;
   }
 
+  void reset() override {
+    ModularLNS<instance_type, solution_type>::reset();
+    this->lb = INT64_MIN;
+  }
+
 private:
   void update_lb(int64_t value) {
     if (value > this->lb && this->verbose) {
@@ -8,8 +8,9 @@ import logging
 from importlib.metadata import version
 
 from samplns.baseline import BaselineAlgorithm
+from samplns.cds import CDS_BACKENDS, CpSatCdsBackend
 from samplns.instances import parse
-from samplns.lns import RandomNeighborhood
+from samplns.lns import SOLVER_PROFILES, RandomNeighborhood
 from samplns.simple import SampLns
 
 
@@ -77,6 +78,49 @@ def get_parser():
         type=int,
     )
 
+    parser.add_argument(
+        "--samplns-reuse-model",
+        action="store_true",
+        help="Keep the CP-SAT model alive between iterations instead of rebuilding it.",
+    )
+
+    parser.add_argument(
+        "--samplns-parallel-neighborhoods",
+        type=int,
+        default=1,
+        help="Number of neighborhoods optimized concurrently per iteration.",
+    )
+
+    parser.add_argument(
+        "--samplns-solver-profile",
+        type=str,
+        default="default",
+        choices=list(SOLVER_PROFILES),
+        help="Profile of the CP-SAT parameters, e.g., the number of workers.",
+    )
+
+    parser.add_argument(
+        "--cds-backend",
+        type=str,
+        default="gurobi",
+        choices=list(CDS_BACKENDS),
+        help="Solver of the lower bound computation. Use 'cpsat' without a Gurobi license.",
+    )
+
+    parser.add_argument(
+        "--cds-workers",
+        type=int,
+        default=1,
+        help="Number of workers of the lower bound computation with the 'cpsat' backend.",
+    )
+
+    parser.add_argument(
+        "--cds-threads",
+        type=int,
+        default=1,
+        help="Number of worker threads of the lower bound computation.",
+    )
+
     parser.add_argument(
         "-v", "--version", action="version", version=f"samplns {version('samplns')}"
     )
@@ -132,6 +176,15 @@ def main():
         neighborhood_selector=RandomNeighborhood(logger=logger),
         logger=logger,
         cds_iteration_time_limit=args.cds_iteration_timelimit,
+        reuse_model=args.samplns_reuse_model,
+        parallel_neighborhoods=args.samplns_parallel_neighborhoods,
+        solver_profile=args.samplns_solver_profile,
+        cds_backend=(
+            CpSatCdsBackend(num_workers=args.cds_workers)
+            if args.cds_backend == "cpsat"
+            else args.cds_backend
+        ),
+        cds_threads=args.cds_threads,
     )
 
     solver.optimize(
@@ -6,6 +6,7 @@ conflict. The most trivial conflict is between a tuple that contains
 """
 # flake8: noqa F401
 from ._cds_bindings import CDSNodeHeuristic, GreedyCds, LnsCds, TransactionGraph
+from .backend import CDS_BACKENDS, CpSatCdsBackend
 from .base import CdsAlgorithm
 from .cds_lns import CdsLns
 
@@ -16,4 +17,6 @@ __all__ = [
     "LnsCds",
     "TransactionGraph",
     "GreedyCds",
+    "CpSatCdsBackend",
+    "CDS_BACKENDS",
 ]
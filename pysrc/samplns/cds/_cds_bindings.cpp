@@ -3,6 +3,7 @@
 //
 
 #include "cds/cds.hpp"
+#include "cds/cds_backend.hpp"
 #include "cds/cds_greedy.hpp"
 #include "cds/cds_heuristic.hpp"
 #include "cds/cds_ip.hpp"
@@ -10,11 +11,49 @@
 #include <fmt/core.h>
 #include <pybind11/functional.h> // automatic conversion of lambdas/functions?
 #include <pybind11/iostream.h>
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h> // automatic conversion of vectors
 
 static const std::vector<Edge> FULL_GRAPH = {};
 
+// Tuples in the packed format of samplns.utils.tuple_id.
+using TupleIds =
+    pybind11::array_t<samplns::tuple_id,
+                      pybind11::array::c_style | pybind11::array::forcecast>;
+
+static std::vector<samplns::FeatureTuple> from_tuple_ids(const TupleIds &ids) {
+  if (ids.ndim() != 1) {
+    throw std::invalid_argument("Tuple ids have to be one-dimensional.");
+  }
+  std::vector<samplns::FeatureTuple> tuples;
+  tuples.reserve(ids.shape(0));
+  const auto *data = ids.data();
+  for (pybind11::ssize_t i = 0; i < ids.shape(0); i++) {
+    tuples.push_back(samplns::from_tuple_id(data[i]));
+  }
+  return tuples;
+}
+
+// Gurobi (CDSIP) if no function for solving the model is given.
+static std::shared_ptr<samplns::CDSBackend>
+make_backend(TransactionGraph *graph,
+             const samplns::CDSCallbackBackend::Callback &callback) {
+  if (!callback) {
+    return nullptr;
+  }
+  return std::make_shared<samplns::CDSCallbackBackend>(*graph, callback);
+}
+
+static TupleIds to_tuple_ids(const std::vector<samplns::FeatureTuple> &tuples) {
+  TupleIds ids(static_cast<pybind11::ssize_t>(tuples.size()));
+  auto *data = ids.mutable_data();
+  for (size_t i = 0; i < tuples.size(); i++) {
+    data[i] = samplns::to_tuple_id(tuples[i]);
+  }
+  return ids;
+}
+
 PYBIND11_MODULE(_cds_bindings, m) {
   namespace py = pybind11;
   using namespace samplns;
@@ -57,6 +96,17 @@ PYBIND11_MODULE(_cds_bindings, m) {
       .def("add_valid_configuration",
            &TransactionGraph::add_valid_configuration)
       .def("from_conflicts", &TransactionGraph::from_conflicts)
+      .def(
+          "has_tuple_ids",
+          [](const TransactionGraph &graph, const TupleIds &ids) {
+            for (const auto &t : from_tuple_ids(ids)) {
+              if (!graph.has_edge(t.first, t.second)) {
+                return false;
+              }
+            }
+            return true;
+          },
+          "Check if all tuples (given as tuple ids) are edges.")
       .def("are_edges_clique_disjoint",
            [&](const TransactionGraph *graph,
                const std::vector<feature_pair> cds) {
@@ -66,13 +116,46 @@ PYBIND11_MODULE(_cds_bindings, m) {
   // CDS Solver
   py::class_<CDSSolverInterface>(
       m, "LnsCds", "A large neighborhood search algorithm for computing a CDS")
-      .def(py::init<TransactionGraph *, std::vector<Edge>, bool, bool>(),
+      .def(py::init([](TransactionGraph *graph, std::vector<Edge> subgraph,
+                       bool use_heur, bool be_smart,
+                       const CDSCallbackBackend::Callback &backend) {
+             return new CDSSolverInterface(graph, subgraph, use_heur, be_smart,
+                                           make_backend(graph, backend));
+           }),
            py::arg("graph"), py::arg("subgraph") = FULL_GRAPH,
-           py::arg("use_heur") = true,
-           py::arg("be_smart") = true) // size constructor
+           py::arg("use_heur") = true, py::arg("be_smart") = true,
+           py::arg("backend") = py::none()) // size constructor
+      .def(py::init([](TransactionGraph *graph, const TupleIds &subgraph_ids,
+                       bool use_heur, bool be_smart,
+                       const CDSCallbackBackend::Callback &backend) {
+             return new CDSSolverInterface(graph, from_tuple_ids(subgraph_ids),
+                                           use_heur, be_smart,
+                                           make_backend(graph, backend));
+           }),
+           py::arg("graph"), py::arg("subgraph_tuple_ids"),
+           py::arg("use_heur") = true, py::arg("be_smart") = true,
+           py::arg("backend") = py::none())
       .def("optimize", &CDSSolverInterface::optimize,
            py::arg("initial_solution"), py::arg("max_iterations") = 15,
            py::arg("time_limit") = 60.0, py::arg("verbose") = false)
+      .def(
+          "optimize_tuple_ids",
+          [](CDSSolverInterface &self, const TupleIds &initial_solution,
+             unsigned int max_iterations, double time_limit, bool verbose) {
+            return to_tuple_ids(self.optimize(from_tuple_ids(initial_solution),
+                                              max_iterations, time_limit,
+                                              verbose));
+          },
+          py::arg("initial_solution"), py::arg("max_iterations") = 15,
+          py::arg("time_limit") = 60.0, py::arg("verbose") = false)
+      .def("set_subgraph", &CDSSolverInterface::set_subgraph,
+           py::arg("subgraph"))
+      .def(
+          "set_subgraph_tuple_ids",
+          [](CDSSolverInterface &self, const TupleIds &subgraph_ids) {
+            self.set_subgraph(from_tuple_ids(subgraph_ids));
+          },
+          py::arg("subgraph_tuple_ids"))
       .def("get_iteration_statistics",
            &CDSSolverInterface::get_iteration_statistics);
 
@@ -80,13 +163,30 @@ PYBIND11_MODULE(_cds_bindings, m) {
   py::class_<AsyncCDSSolverInterface>(
       m, "AsyncLnsCds",
       "A large neighborhood search algorithm for computing a CDS")
-      .def(py::init<TransactionGraph *>())
+      .def(py::init([](TransactionGraph *graph,
+                       const CDSCallbackBackend::Callback &backend,
+                       size_t num_threads) {
+             // every worker needs its own backend
+             return new AsyncCDSSolverInterface(
+                 graph, num_threads,
+                 [graph, backend]() { return make_backend(graph, backend); });
+           }),
+           py::arg("graph"), py::arg("backend") = py::none(),
+           py::arg("num_threads") = 1)
+      .def("count_threads", &AsyncCDSSolverInterface::count_threads)
       .def("get_best_solution", &AsyncCDSSolverInterface::get_best_solution)
+      .def("get_best_solution_tuple_ids",
+           [](AsyncCDSSolverInterface &self) {
+             return to_tuple_ids(self.get_best_solution());
+           })
       .def("get_iteration_statistics",
            &AsyncCDSSolverInterface::get_iteration_statistics)
       .def("start", &AsyncCDSSolverInterface::start,
            py::arg("initial_solution"), py::arg("time_limit") = 60.0)
-      .def("stop", &AsyncCDSSolverInterface::stop);
+      // the worker may need the GIL to finish an iteration with a Python
+      // backend
+      .def("stop", &AsyncCDSSolverInterface::stop,
+           py::call_guard<py::gil_scoped_release>());
 
   // Heuristic Solver (exposed for experiments)
   py::class_<CDSNodeHeuristic>(
@@ -104,7 +204,17 @@ PYBIND11_MODULE(_cds_bindings, m) {
                         "A greedy search algorithm for computing a CDS")
       .def(py::init<const TransactionGraph &,
                     const std::vector<std::vector<feature_id>> &>())
-      .def("optimize", &GreedyCDS::optimize, py::arg("feature_pairs"));
+      .def("optimize", &GreedyCDS::optimize, py::arg("feature_pairs"),
+           py::arg("seed") = FULL_GRAPH)
+      .def(
+          "optimize_tuple_ids",
+          [](GreedyCDS &self, const TupleIds &tuple_ids,
+             const std::optional<TupleIds> &seed) {
+            return to_tuple_ids(
+                self.optimize(from_tuple_ids(tuple_ids),
+                              seed ? from_tuple_ids(*seed) : FULL_GRAPH));
+          },
+          py::arg("tuple_ids"), py::arg("seed") = py::none());
 
   // gurobi exception
   static py::exception<GRBException> exc(m, "GRBException");
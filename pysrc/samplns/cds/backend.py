@@ -0,0 +1,85 @@
+"""
+Solvers for the CDS model of the neighborhoods of the CDS LNS. By default, the
+model is solved by Gurobi in C++. Alternatively, the model can be passed to a
+Python function, e.g., to solve it with CP-SAT on machines without a Gurobi
+license.
+"""
+import math
+import typing
+
+from ortools.sat.python import cp_model
+
+# (number of edges, cliques of edge indices, hint, time limit) -> (selected edge
+# indices, optimal). At most one edge of each clique can be selected.
+CdsBackend = typing.Callable[
+    [int, typing.List[typing.List[int]], typing.List[int], float],
+    typing.Tuple[typing.List[int], bool],
+]
+
+
+class CpSatCdsBackend:
+    """
+    Solves the CDS model of a neighborhood with CP-SAT.
+    """
+
+    def __init__(self, num_workers: int = 1, log_search_progress: bool = False):
+        """
+        :param num_workers: The number of workers of CP-SAT. The default leaves
+            the other CPUs to the sample LNS.
+        :param log_search_progress: Print the log of CP-SAT.
+        """
+        if num_workers < 1:
+            msg = "The CDS backend needs at least one worker."
+            raise ValueError(msg)
+        self.num_workers = num_workers
+        self.log_search_progress = log_search_progress
+
+    def __call__(
+        self,
+        num_edges: int,
+        cliques: typing.List[typing.List[int]],
+        hint: typing.List[int],
+        timelimit: float,
+    ) -> typing.Tuple[typing.List[int], bool]:
+        model = cp_model.CpModel()
+        x = [model.NewBoolVar(f"edge_{i}") for i in range(num_edges)]
+        for clique in cliques:
+            model.AddAtMostOne(x[i] for i in clique)
+        model.Maximize(sum(x))
+        hinted = set(hint)
+        if hinted:
+            for i, var in enumerate(x):
+                model.AddHint(var, i in hinted)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.num_workers = self.num_workers
+        solver.parameters.log_search_progress = self.log_search_progress
+        if math.isfinite(timelimit):
+            solver.parameters.max_time_in_seconds = timelimit
+        status = solver.Solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return [], False
+        selected = [i for i, var in enumerate(x) if solver.Value(var)]
+        return selected, status == cp_model.OPTIMAL
+
+
+CDS_BACKENDS: typing.Dict[str, typing.Callable[[], typing.Optional[CdsBackend]]] = {
+    "gurobi": lambda: None,  # solved in C++
+    "cpsat": CpSatCdsBackend,
+}
+
+
+def get_cds_backend(
+    backend: typing.Union[str, CdsBackend, None]
+) -> typing.Optional[CdsBackend]:
+    """
+    Returns the backend of the given name (see `CDS_BACKENDS`) as expected by
+    `LnsCds` and `AsyncLnsCds`, i.e., None for Gurobi. Functions are passed
+    through, None is Gurobi.
+    """
+    if backend is None or callable(backend):
+        return backend
+    if backend not in CDS_BACKENDS:
+        msg = f"Unknown CDS backend '{backend}'. Available: {', '.join(CDS_BACKENDS)}."
+        raise ValueError(msg)
+    return CDS_BACKENDS[backend]()
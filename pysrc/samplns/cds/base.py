@@ -2,16 +2,23 @@ import abc
 import math
 import typing
 
+import numpy as np
+
 Tuples = typing.Iterable[typing.Tuple[typing.Tuple[int, bool], typing.Tuple[int, bool]]]
+TupleIds = np.ndarray  # packed tuple ids, see samplns.utils.tuple_id
 Samples = typing.List[typing.Dict[int, bool]]
 
 
 class CdsAlgorithm(abc.ABC):
     @abc.abstractmethod
     def compute_independent_set(
-        self, tuples: typing.Optional[Tuples], timelimit: float = math.inf, ub=math.inf
-    ) -> Tuples:
+        self,
+        tuples: typing.Optional[TupleIds],
+        timelimit: float = math.inf,
+        ub=math.inf,
+    ) -> TupleIds:
         """
+        The tuples are given and returned as packed tuple ids.
         None refers to all.
         Default timelimit is "unlimited" (as indicated by math.inf).
         Can be passed a known upper bound.
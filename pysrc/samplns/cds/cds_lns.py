@@ -1,30 +1,45 @@
+import collections
 import logging
 import math
 import typing
 
+import numpy as np
+
 from ..preprocessor import IndexInstance
-from ..utils import Timer
+from ..utils import TUPLE_ID_DTYPE, Timer
 from ._cds_bindings import (
     AsyncLnsCds,
-    FeatureTuple,
     GreedyCds,
     LnsCds,
     TransactionGraph,
 )
-from .base import CdsAlgorithm, Samples, Tuples
+from .backend import CdsBackend, get_cds_backend
+from .base import CdsAlgorithm, Samples, TupleIds
 
 _logger = logging.getLogger("SampLNS.CdsLns")
 
 
 class CdsLns(CdsAlgorithm):
+    # number of local independent sets kept for warm starts
+    LOCAL_CACHE_SIZE = 16
+
     def __init__(
         self,
         instance: IndexInstance,
         initial_samples: Samples,
         logger: logging.Logger = _logger,
         iteration_timelimit: float = 60.0,
+        backend: typing.Union[str, CdsBackend, None] = None,
+        num_threads: int = 1,
     ) -> None:
+        """
+        :param backend: The solver for the CDS model of the neighborhoods, as
+            function or name in CDS_BACKENDS (default: "gurobi").
+        :param num_threads: The number of worker threads of the asynchronous
+            global CDS computation.
+        """
         self.instance = instance
+        self._backend = get_cds_backend(backend)
         self._iteration_timelimit = iteration_timelimit
         self._logger = logger
         self._logger.info(
@@ -49,15 +64,23 @@ class CdsLns(CdsAlgorithm):
             "All valid configurations were added to the transaction graph."
         )
 
-        self.solver = AsyncLnsCds(self.graph)
+        self.solver = AsyncLnsCds(
+            self.graph, backend=self._backend, num_threads=num_threads
+        )
         self.greedy_solver = GreedyCds(self.graph, self.cpp_sample)
         self.initial_cds_cpp = self.greedy_solver.optimize([])
+        # local solver for the subgraphs, reused over all calls
+        self._local_solver: typing.Optional[LnsCds] = None
+        self._local_cache: typing.Deque[TupleIds] = collections.deque(
+            maxlen=self.LOCAL_CACHE_SIZE
+        )
 
     def __enter__(self):
         self.solver.start(self.initial_cds_cpp, self._iteration_timelimit)
         self._logger.info(
-            "Async Solver started with iteration timelimit %d",
+            "Async Solver started with iteration timelimit %d and %d threads",
             self._iteration_timelimit,
+            self.solver.count_threads(),
         )
         return self
 
@@ -74,28 +97,63 @@ class CdsLns(CdsAlgorithm):
     def stop(self):
         self.solver.stop()
 
+    def _get_local_solver(self, edges: TupleIds) -> LnsCds:
+        """
+        Returns the local LNS restricted to the given subgraph. It is only
+        built once, as building it tests the whole transaction graph.
+        """
+        if self._local_solver is None:
+            self._local_solver = LnsCds(
+                self.graph,
+                subgraph_tuple_ids=edges,
+                use_heur=False,
+                backend=self._backend,
+            )
+        else:
+            self._local_solver.set_subgraph_tuple_ids(edges)
+        return self._local_solver
+
+    def _warm_start(self, edges: TupleIds) -> TupleIds:
+        """
+        Returns the largest restriction of the global CDS or of a cached local
+        CDS to the given tuples. Any subset of a CDS is again a CDS.
+        """
+        best = np.zeros(0, dtype=TUPLE_ID_DTYPE)
+        for cds in (self.solver.get_best_solution_tuple_ids(), *self._local_cache):
+            restricted = cds[np.isin(cds, edges)]
+            if len(restricted) > len(best):
+                best = restricted
+        return best
+
     def compute_independent_set(
-        self, edges: typing.Optional[Tuples], timelimit: float = math.inf, ub=math.inf
-    ) -> Tuples:
+        self,
+        edges: typing.Optional[TupleIds],
+        timelimit: float = math.inf,
+        ub=math.inf,
+    ) -> TupleIds:
         # Stop time
         timer = Timer(timelimit)
 
         # Filter by the edges passed as an argument
-        sol = self.__cpp_to_py_format(self.solver.get_best_solution())
+        sol = self.solver.get_best_solution_tuple_ids()
         if edges is not None:
-            edges = self.__py_to_cpp_format(edges)
+            edges = np.asarray(edges, dtype=TUPLE_ID_DTYPE)
 
-            greedy_sol = self.greedy_solver.optimize(edges)
+            # extend the known CDS of the tuples greedily, if it is not already
+            # good enough
+            seed = self._warm_start(edges)
+            if len(seed) < ub:
+                greedy_sol = self.greedy_solver.optimize_tuple_ids(edges, seed=seed)
+            else:
+                greedy_sol = seed
 
-            for p, q in greedy_sol:
-                assert self.graph.has_edge(p, q)
-            for p, q in edges:
-                assert self.graph.has_edge(p, q)
+            assert self.graph.has_tuple_ids(greedy_sol)
+            assert self.graph.has_tuple_ids(edges)
 
             sol = greedy_sol
 
             # While time left: call the lns solver
-            lns = LnsCds(self.graph, subgraph=edges, use_heur=False)
+            lns = self._get_local_solver(edges)
             iter_without_improvement = 0
             while timer:
                 assert (
@@ -109,7 +167,7 @@ class CdsLns(CdsAlgorithm):
                     )
                     break
 
-                new_sol = lns.optimize(
+                new_sol = lns.optimize_tuple_ids(
                     initial_solution=sol,
                     max_iterations=1,
                     time_limit=timer.remaining(),
@@ -130,25 +188,15 @@ class CdsLns(CdsAlgorithm):
                     if iter_without_improvement >= 10:
                         break
 
-            assert all(
-                e in edges for e in sol
-            ), "The solution contains edges that are not within the specified subgraph edges!"
-            sol = self.__cpp_to_py_format(sol)
+            assert np.isin(
+                sol, edges
+            ).all(), "The solution contains edges that are not within the specified subgraph edges!"
             self._logger.info(
-                "[Symmetry Breaking]: The greedy solver found %d tuples, the LNS found %d tuples!",
+                "[Symmetry Breaking]: The warm start had %d tuples, the greedy solver found %d tuples, the LNS found %d tuples!",
+                len(seed),
                 len(greedy_sol),
                 len(sol),
             )
+            self._local_cache.appendleft(sol)
 
         return sol
-
-    @staticmethod
-    def __py_to_cpp_format(sol):
-        return [
-            FeatureTuple(i + 1 if a else -(i + 1), j + 1 if b else -(j + 1))
-            for ((i, a), (j, b)) in sol
-        ]
-
-    @staticmethod
-    def __cpp_to_py_format(sol):
-        return [((abs(i) - 1, i > 0), (abs(j) - 1, j > 0)) for (i, j) in sol]
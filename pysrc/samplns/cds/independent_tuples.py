@@ -2,7 +2,8 @@ import itertools
 import math
 import random
 
-from .base import CdsAlgorithm, Samples, Tuples
+from ..utils import tuple_ids_from_tuples, tuple_ids_to_tuples
+from .base import CdsAlgorithm, Samples, TupleIds, Tuples
 
 
 class IndependentTuples(CdsAlgorithm):
@@ -63,8 +64,8 @@ class IndependentTuples(CdsAlgorithm):
         return (v, w) in self.coverage_count
 
     def compute_independent_set(
-        self, tuples: Tuples, timelimit: float = math.inf, ub=math.inf
-    ) -> Tuples:
+        self, tuples: TupleIds, timelimit: float = math.inf, ub=math.inf
+    ) -> TupleIds:
         """
         Compute an independent set from the given tuples.
         (Time limit not supported)
@@ -75,8 +76,9 @@ class IndependentTuples(CdsAlgorithm):
             raise NotImplementedError(msg)
 
         if tuples is None:
-            tuples = self.get_feasible_tuples()
-        sorted_tuples = list(tuples)
+            sorted_tuples = list(self.get_feasible_tuples())
+        else:
+            sorted_tuples = tuple_ids_to_tuples(tuples)
         random.shuffle(sorted_tuples)
         sorted_tuples.sort(key=lambda t: self.coverage_count[t])
         independent_tuples = []
@@ -94,7 +96,7 @@ class IndependentTuples(CdsAlgorithm):
         for v, w in sorted_tuples:
             if is_independent(v, w):
                 independent_tuples.append((v, w))
-        return independent_tuples
+        return tuple_ids_from_tuples(independent_tuples)
 
     def get_feasible_tuples(self) -> Tuples:
         """
@@ -28,7 +28,17 @@ from .parse_dimacs import parse_dimacs
 from .parser import parse, parse_solutions, parse_source
 
 # The rule elements
-from .sat_formula import AND, EQ, IMPL, OR, VAR, SatNode, VariableLabel
+from .sat_formula import (
+    AND,
+    EQ,
+    IMPL,
+    OR,
+    VAR,
+    SatNode,
+    VariableLabel,
+    iter_variables,
+    substitute_all,
+)
 
 __all__ = [
     "parse",
@@ -50,5 +60,7 @@ __all__ = [
     "IMPL",
     "SatNode",
     "VariableLabel",
+    "iter_variables",
+    "substitute_all",
     "Instance",
 ]
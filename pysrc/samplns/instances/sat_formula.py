@@ -19,16 +19,26 @@ class SatNode(abc.ABC):
         pass
 
     @abc.abstractmethod
+    def _children(self) -> typing.Sequence["SatNode"]:
+        """
+        The direct subformulas.
+        """
+
+    @abc.abstractmethod
+    def _with_children(self, children: typing.List["SatNode"]) -> "SatNode":
+        """
+        A node of the same type with the given subformulas.
+        """
+
     def substitute(
         self,
         direct: typing.Dict[VariableLabel, VariableLabel],
         inverse: typing.Dict[VariableLabel, VariableLabel],
     ):
-        pass
+        return substitute_all([self], direct, inverse)[0]
 
-    @abc.abstractmethod
     def all_variables(self) -> typing.Iterable[VariableLabel]:
-        pass
+        return iter_variables([self])
 
     @abc.abstractmethod
     def evaluate(self, assignment: typing.Dict[FeatureLabel, bool]):
@@ -77,6 +87,12 @@ class VAR(SatNode):
     def to_cnf(self):
         return self
 
+    def _children(self) -> typing.Sequence[SatNode]:
+        return ()
+
+    def _with_children(self, children: typing.List[SatNode]) -> SatNode:  # noqa: ARG002
+        return self
+
     def substitute(
         self,
         direct: typing.Dict[VariableLabel, VariableLabel],
@@ -128,20 +144,11 @@ class AND(SatNode):
     def to_cnf(self):
         return AND(*[e.to_cnf() for e in self.elements])
 
-    def substitute(
-        self,
-        direct: typing.Dict[VariableLabel, VariableLabel],
-        inverse: typing.Dict[VariableLabel, VariableLabel],
-    ):
-        return AND(*[e.substitute(direct, inverse) for e in self.elements])
+    def _children(self) -> typing.Sequence[SatNode]:
+        return self.elements
 
-    def all_variables(self) -> typing.Iterable[VariableLabel]:
-        already_yielded = []
-        for element in self.elements:
-            for var in element.all_variables():
-                if var not in already_yielded:
-                    already_yielded.append(var)
-                    yield var
+    def _with_children(self, children: typing.List[SatNode]) -> SatNode:
+        return AND(*children)
 
     def evaluate(self, assignment: typing.Dict[FeatureLabel, bool]):
         return all(element.evaluate(assignment) for element in self.elements)
@@ -191,20 +198,11 @@ class OR(SatNode):
         clauses.append(OR(*aux_vars))
         return AND(*clauses)
 
-    def substitute(
-        self,
-        direct: typing.Dict[VariableLabel, VariableLabel],
-        inverse: typing.Dict[VariableLabel, VariableLabel],
-    ):
-        return OR(*[e.substitute(direct, inverse) for e in self.elements])
+    def _children(self) -> typing.Sequence[SatNode]:
+        return self.elements
 
-    def all_variables(self) -> typing.Iterable[VariableLabel]:
-        already_yielded = []
-        for element in self.elements:
-            for var in element.all_variables():
-                if var not in already_yielded:
-                    already_yielded.append(var)
-                    yield var
+    def _with_children(self, children: typing.List[SatNode]) -> SatNode:
+        return OR(*children)
 
     def evaluate(self, assignment: typing.Dict[FeatureLabel, bool]):
         return any(element.evaluate(assignment) for element in self.elements)
@@ -229,25 +227,11 @@ class IMPL(SatNode):
     def to_cnf(self):
         return OR(self.condition.NEG(), self.implication).to_cnf()
 
-    def substitute(
-        self,
-        direct: typing.Dict[VariableLabel, VariableLabel],
-        inverse: typing.Dict[VariableLabel, VariableLabel],
-    ):
-        return IMPL(
-            self.condition.substitute(direct, inverse),
-            self.implication.substitute(direct, inverse),
-        )
+    def _children(self) -> typing.Sequence[SatNode]:
+        return (self.condition, self.implication)
 
-    def all_variables(self) -> typing.Iterable[VariableLabel]:
-        already_yielded = []
-        for var in self.condition.all_variables():
-            if var not in already_yielded:
-                yield var
-        for var in self.implication.all_variables():
-            if var not in already_yielded:
-                already_yielded.append(var)
-                yield var
+    def _with_children(self, children: typing.List[SatNode]) -> SatNode:
+        return IMPL(*children)
 
     def evaluate(self, assignment: typing.Dict[FeatureLabel, bool]):
         return (not self.condition.evaluate(assignment)) or self.implication.evaluate(
@@ -281,25 +265,11 @@ class EQ(SatNode):
     def to_cnf(self):
         return OR(AND(self.a, self.b), AND(self.a.NEG(), self.b.NEG())).to_cnf()
 
-    def substitute(
-        self,
-        direct: typing.Dict[VariableLabel, VariableLabel],
-        inverse: typing.Dict[VariableLabel, VariableLabel],
-    ):
-        return EQ(
-            self.a.substitute(direct, inverse), self.b.substitute(direct, inverse)
-        )
+    def _children(self) -> typing.Sequence[SatNode]:
+        return (self.a, self.b)
 
-    def all_variables(self) -> typing.Iterable[VariableLabel]:
-        already_yielded = []
-        for var in self.a.all_variables():
-            if var not in already_yielded:
-                already_yielded.append(var)
-                yield var
-        for var in self.b.all_variables():
-            if var not in already_yielded:
-                already_yielded.append(var)
-                yield var
+    def _with_children(self, children: typing.List[SatNode]) -> SatNode:
+        return EQ(*children)
 
     def evaluate(self, assignment: typing.Dict[FeatureLabel, bool]):
         return self.a.evaluate(assignment) == self.b.evaluate(assignment)
@@ -308,6 +278,76 @@ class EQ(SatNode):
         return {"type": "EQ", "a": self.a.to_json_data(), "b": self.b.to_json_data()}
 
 
+def iter_variables(nodes: typing.Iterable[SatNode]) -> typing.Iterator[VariableLabel]:
+    """
+    Yields the variables of all nodes, each once and in the order of their
+    first occurrence. The formulas are traversed without recursion.
+    """
+    yielded = set()
+    stack = list(nodes)
+    stack.reverse()
+    while stack:
+        node = stack.pop()
+        if isinstance(node, VAR):
+            if node.var_name not in yielded:
+                yielded.add(node.var_name)
+                yield node.var_name
+        else:
+            stack.extend(reversed(node._children()))
+
+
+def substitute_all(
+    nodes: typing.Iterable[SatNode],
+    direct: typing.Dict[VariableLabel, VariableLabel],
+    inverse: typing.Dict[VariableLabel, VariableLabel],
+) -> typing.List[SatNode]:
+    """
+    Substitutes the variables of all nodes by `direct` and, negated, by
+    `inverse` in a single pass without recursion. Both are merged into one
+    table beforehand, and every substituted literal is created only once.
+    """
+    # label -> (new label, flip), `direct` takes precedence as in VAR.substitute
+    table = {label: (new_label, True) for label, new_label in inverse.items()}
+    table.update((label, (new_label, False)) for label, new_label in direct.items())
+    literals: typing.Dict[typing.Tuple[VariableLabel, bool, bool], VAR] = {}
+
+    def substitute_var(var: VAR) -> VAR:
+        key = (var.var_name, var.negated, var.auxiliary)
+        literal = literals.get(key)
+        if literal is None:
+            if var.var_name in table:
+                new_label, flip = table[var.var_name]
+                literal = VAR(new_label, var.negated != flip, var.auxiliary)
+            else:
+                literal = var
+            literals[key] = literal
+        return literal
+
+    substituted: typing.List[SatNode] = []
+    stack = [(node, False) for node in nodes]
+    stack.reverse()
+    while stack:
+        node, children_done = stack.pop()
+        if isinstance(node, VAR):
+            substituted.append(substitute_var(node))
+            continue
+        children = node._children()
+        if children_done:
+            begin = len(substituted) - len(children)
+            substituted_children = substituted[begin:]
+            del substituted[begin:]
+            substituted.append(node._with_children(substituted_children))
+        elif all(isinstance(child, VAR) for child in children):
+            # e.g., a clause
+            substituted.append(
+                node._with_children([substitute_var(c) for c in children])
+            )
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+    return substituted
+
+
 def _sat_node_from_json(json_data):
     if "type" in json_data:
         t = json_data["type"]
@@ -31,9 +31,17 @@ Structure:
 - model.py: The model of the searching for the best neighbor using CP-SAT.
 - coverage_set.py: A tool for checking which tuples need to be covered.
 - neighborhood.py: Abstract neighborhood and implementation of random neighborhood.
+- solver_profile.py: Profiles for the CP-SAT parameters, e.g., the number of workers.
 """
 # flake8: noqa F401
 from .lns import LnsObserver, ModularLns
 from .neighborhood import RandomNeighborhood
+from .solver_profile import SOLVER_PROFILES, SolverProfile
 
-__all__ = ["ModularLns", "LnsObserver", "RandomNeighborhood"]
+__all__ = [
+    "ModularLns",
+    "LnsObserver",
+    "RandomNeighborhood",
+    "SolverProfile",
+    "SOLVER_PROFILES",
+]
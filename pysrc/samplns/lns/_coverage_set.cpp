@@ -5,167 +5,617 @@
  * feature tuples are covered by a given sample. This is used to check which
  * tuples are missing in a given sample for the Large Neighborhood Search.
  * Previously implemented in Python but it was too slower for larger instances.
- * @version 0.1
+ *
+ * The tuples are stored as a bit matrix with one row per literal (feature and
+ * value). A row is a packed array of 64-bit words, such that covering a
+ * configuration only needs to OR the literal mask of the configuration into
+ * the rows of its literals. As a tuple (a, b) is only stored in the row of
+ * the literal with the smaller feature, every row only keeps the words right
+ * of its own feature (upper triangle), halving the memory.
+ * To also allow removing configurations, the coverage set counts how often
+ * each tuple is covered. The counters are bit-sliced, i.e., stored as a few
+ * bit matrices (one per bit of the counter), such that they can be updated
+ * word-wise like the coverage itself.
+ * @version 0.2
  * @date 2023-07-13
  *
  * @copyright Copyright (c) 2023
  *
  */
 
+#include <algorithm>
+#include <cstdint>
+#include <stdexcept>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
 #include <pybind11/functional.h> // automatic conversion of lambdas/functions?
+#include <pybind11/numpy.h>      // direct access to the buffer of samples
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h> // automatic conversion of vectors
 
-class CoveredTuples {
+#if defined(_MSC_VER)
+#include <intrin.h>
+#endif
+
+namespace py = pybind11;
+
+using Word = uint64_t;
+static constexpr int WORD_BITS = 64;
+
+// Samples are passed as contiguous uint8 arrays with one row per configuration
+// and one column per concrete feature. Other buffers (e.g., lists of bools)
+// are converted by numpy.
+using SampleArray =
+    py::array_t<uint8_t, py::array::c_style | py::array::forcecast>;
+
+static inline int popcount(Word w) {
+#if defined(_MSC_VER)
+  return static_cast<int>(__popcnt64(w));
+#else
+  return __builtin_popcountll(w);
+#endif
+}
+
+static inline int count_trailing_zeros(Word w) {
+#if defined(_MSC_VER)
+  unsigned long index;
+  _BitScanForward64(&index, w);
+  return static_cast<int>(index);
+#else
+  return __builtin_ctzll(w);
+#endif
+}
+
+/**
+ * A bit matrix over the 2n literals of n features. Literal `2*f+val` is the
+ * literal of feature `f` with value `val`. Row `2*f+val` only stores the
+ * columns of literals of features larger than `f`, i.e., the words starting
+ * at the word containing the column `2*f+2`.
+ */
+class LiteralBitMatrix {
 public:
-  CoveredTuples(int num_concrete_features) {
-    this->num_concrete_features = num_concrete_features;
-    this->set_up_matrix();
+  explicit LiteralBitMatrix(int num_features)
+      : num_features{num_features},
+        words_per_row{(2 * static_cast<size_t>(num_features) + WORD_BITS - 1) /
+                      WORD_BITS} {
+    row_offsets.reserve(2 * num_features + 1);
+    size_t offset = 0;
+    for (int lit = 0; lit < 2 * num_features; lit++) {
+      row_offsets.push_back(offset);
+      offset += words_per_row - first_word(lit / 2);
+    }
+    row_offsets.push_back(offset);
+    words.assign(offset, 0);
+  }
+
+  /**
+   * The first word stored for the rows of feature f.
+   */
+  inline size_t first_word(int f) const { return (2 * f + 2) / WORD_BITS; }
+
+  /**
+   * Mask for the first stored word of the rows of feature f, removing the
+   * columns of the features <= f.
+   */
+  inline Word first_word_mask(int f) const {
+    const int shift = (2 * f + 2) % WORD_BITS;
+    return ~Word(0) << shift;
+  }
+
+  /**
+   * Pointer to the word `w` (global word index) of row `lit`. Only valid for
+   * `w >= first_word(lit/2)`.
+   */
+  inline Word *row(int lit, size_t w) {
+    return words.data() + row_offsets[lit] + (w - first_word(lit / 2));
   }
 
-  CoveredTuples(const std::vector<std::vector<bool>> &initial_sample,
-                int num_concrete_features) {
+  inline const Word *row(int lit, size_t w) const {
+    return words.data() + row_offsets[lit] + (w - first_word(lit / 2));
+  }
 
-    this->num_concrete_features = num_concrete_features;
-    this->set_up_matrix();
-    for (const auto &conf : initial_sample) {
-      if (conf.size() != this->num_concrete_features) {
-        throw std::invalid_argument(
-            "The number of concrete features in the initial sample does not "
-            "match the number of concrete features in the graph.");
+  /**
+   * Check the bit of the tuple (lit_a, lit_b), independent of the order.
+   */
+  inline bool get(int lit_a, int lit_b) const {
+    if (lit_a / 2 == lit_b / 2) {
+      return false; // a feature cannot have two values at once
+    }
+    if (lit_a > lit_b) {
+      std::swap(lit_a, lit_b);
+    }
+    const Word word = *row(lit_a, lit_b / WORD_BITS);
+    return (word >> (lit_b % WORD_BITS)) & 1;
+  }
+
+  /**
+   * ORs the literal mask of a configuration into the rows of its literals.
+   * Returns the number of newly set bits, i.e., newly covered tuples.
+   */
+  int64_t add_configuration(const std::vector<Word> &literal_mask,
+                            const uint8_t *conf) {
+    int64_t newly_set = 0;
+    for (int f = 0; f < num_features; f++) {
+      const int lit = 2 * f + (conf[f] ? 1 : 0);
+      const size_t w0 = first_word(f);
+      Word *data = row(lit, w0);
+      for (size_t w = w0; w < words_per_row; w++, data++) {
+        Word mask = literal_mask[w];
+        if (w == w0) {
+          mask &= first_word_mask(f);
+        }
+        newly_set += popcount(mask & ~*data);
+        *data |= mask;
       }
-      this->add_tuples_of_configuration(conf);
     }
+    return newly_set;
   }
 
-  void add_tuples_of_configuration(const std::vector<bool> &conf) {
-    for (int i = 0; i < this->num_concrete_features; i++) {
-      for (int j = i + 1; j < this->num_concrete_features; j++) {
-        this->set_feasible(i, conf[i], j, conf[j]);
+  /**
+   * Returns true if the tuples of the configuration (given as literal mask)
+   * are all contained in this matrix.
+   */
+  bool contains_configuration(const std::vector<Word> &literal_mask,
+                              const uint8_t *conf) const {
+    for (int f = 0; f < num_features; f++) {
+      const int lit = 2 * f + (conf[f] ? 1 : 0);
+      const size_t w0 = first_word(f);
+      const Word *data = row(lit, w0);
+      for (size_t w = w0; w < words_per_row; w++, data++) {
+        Word mask = literal_mask[w];
+        if (w == w0) {
+          mask &= first_word_mask(f);
+        }
+        if (mask & ~*data) {
+          return false;
+        }
       }
     }
+    return true;
   }
 
-  bool operator==(const CoveredTuples &other) const {
-    return this->feasibility_matrix == other.feasibility_matrix;
+  /**
+   * Builds the literal mask (one bit per literal) of a configuration.
+   */
+  std::vector<Word> literal_mask(const uint8_t *conf) const {
+    std::vector<Word> mask(words_per_row, 0);
+    for (int f = 0; f < num_features; f++) {
+      const size_t lit = 2 * f + (conf[f] ? 1 : 0);
+      mask[lit / WORD_BITS] |= Word(1) << (lit % WORD_BITS);
+    }
+    return mask;
   }
 
-  bool operator<=(const CoveredTuples &other) const {
-    for (int i = 0; i < 2 * this->num_concrete_features; i++) {
-      for (int j = 0; j < 2 * this->num_concrete_features; j++) {
-        if (this->feasibility_matrix[i][j] && !other.feasibility_matrix[i][j]) {
-          return false;
-        }
+  void clear() { std::fill(words.begin(), words.end(), 0); }
+
+  bool operator==(const LiteralBitMatrix &other) const {
+    return num_features == other.num_features && words == other.words;
+  }
+
+  /**
+   * Subset check on the set bits.
+   */
+  bool operator<=(const LiteralBitMatrix &other) const {
+    if (num_features != other.num_features) {
+      return false;
+    }
+    for (size_t i = 0; i < words.size(); i++) {
+      if (words[i] & ~other.words[i]) {
+        return false;
       }
     }
     return true;
   }
 
+  int num_features;
+  size_t words_per_row;
+  std::vector<size_t> row_offsets;
+  std::vector<Word> words;
+};
+
+/**
+ * Returns the data of a single configuration (1D array) after checking that it
+ * matches the number of concrete features.
+ */
+static const uint8_t *configuration_data(const SampleArray &conf,
+                                         int num_concrete_features) {
+  if (conf.ndim() != 1 || conf.shape(0) != num_concrete_features) {
+    throw std::invalid_argument(
+        "The number of concrete features in the configuration does not "
+        "match the number of concrete features of the coverage.");
+  }
+  return conf.data();
+}
+
+class CoveredTuples {
+public:
+  CoveredTuples(int num_concrete_features)
+      : num_concrete_features{num_concrete_features},
+        matrix{num_concrete_features} {}
+
+  CoveredTuples(const SampleArray &initial_sample, int num_concrete_features)
+      : num_concrete_features{num_concrete_features},
+        matrix{num_concrete_features} {
+    if (initial_sample.size() == 0) {
+      return; // an empty sample may not even have the right shape
+    }
+    if (initial_sample.ndim() != 2 ||
+        initial_sample.shape(1) != num_concrete_features) {
+      throw std::invalid_argument(
+          "The number of concrete features in the initial sample does not "
+          "match the number of concrete features in the graph.");
+    }
+    for (py::ssize_t i = 0; i < initial_sample.shape(0); i++) {
+      this->add_tuples_of_configuration(initial_sample.data(i, 0));
+    }
+  }
+
+  void add_tuples_of_configuration(const uint8_t *conf) {
+    this->num_covered_tuples +=
+        this->matrix.add_configuration(this->matrix.literal_mask(conf), conf);
+  }
+
+  bool contains_configuration(const uint8_t *conf) const {
+    return this->matrix.contains_configuration(this->matrix.literal_mask(conf),
+                                               conf);
+  }
+
+  bool operator==(const CoveredTuples &other) const {
+    return this->matrix == other.matrix;
+  }
+
+  bool operator<=(const CoveredTuples &other) const {
+    return this->matrix <= other.matrix;
+  }
+
   ~CoveredTuples() {}
 
   bool is_contained(int f1, bool v1, int f2, bool v2) const {
-    return this->feasibility_matrix[get_index(f1, v1)][get_index(f2, v2)];
+    return this->matrix.get(get_index(f1, v1), get_index(f2, v2));
+  }
+
+  void clear() {
+    this->matrix.clear();
+    this->num_covered_tuples = 0;
   }
 
   int num_concrete_features;
-  int num_covered_tuples = 0;
+  int64_t num_covered_tuples = 0;
+  LiteralBitMatrix matrix;
 
 private:
-  void set_up_matrix() {
-    this->feasibility_matrix.clear();
-    this->feasibility_matrix.reserve(2 * num_concrete_features);
-    for (int i = 0; i < 2 * num_concrete_features; i++) {
-      this->feasibility_matrix.push_back(
-          std::vector<bool>(2 * num_concrete_features, false));
+  static int get_index(int f, bool val) { return 2 * f + (val ? 1 : 0); }
+};
+
+/**
+ * Counts how many configurations cover each tuple. The counters are stored
+ * bit-sliced: plane i contains the i-th bit of every counter. Incrementing
+ * and decrementing a configuration is then a ripple-carry/borrow over the
+ * planes, performed on whole words. The number of planes grows with the
+ * largest counter.
+ */
+class TupleCounters {
+public:
+  explicit TupleCounters(int num_features) : num_features{num_features} {}
+
+  /**
+   * Increments the counters of all tuples of the configuration.
+   */
+  void increment(const std::vector<Word> &literal_mask, const uint8_t *conf) {
+    for (int f = 0; f < num_features; f++) {
+      const int lit = 2 * f + (conf[f] ? 1 : 0);
+      const size_t w0 = first_word(f);
+      for (size_t w = w0; w < words_per_row(); w++) {
+        Word carry = literal_mask[w];
+        if (w == w0) {
+          carry &= first_word_mask(f);
+        }
+        for (size_t p = 0; carry && p < planes.size(); p++) {
+          Word *data = planes[p].row(lit, w);
+          const Word overflow = *data & carry;
+          *data ^= carry;
+          carry = overflow;
+        }
+        if (carry) {
+          planes.emplace_back(num_features);
+          *planes.back().row(lit, w) = carry;
+        }
+      }
+    }
+  }
+
+  /**
+   * Decrements the counters of all tuples of the configuration. The
+   * configuration has to be counted before. Tuples whose counter drops to
+   * zero are removed from `covered`. Returns the number of these tuples.
+   */
+  int64_t decrement(const std::vector<Word> &literal_mask, const uint8_t *conf,
+                    LiteralBitMatrix &covered) {
+    int64_t uncovered = 0;
+    for (int f = 0; f < num_features; f++) {
+      const int lit = 2 * f + (conf[f] ? 1 : 0);
+      const size_t w0 = covered.first_word(f);
+      for (size_t w = w0; w < covered.words_per_row; w++) {
+        Word mask = literal_mask[w];
+        if (w == w0) {
+          mask &= covered.first_word_mask(f);
+        }
+        Word borrow = mask;
+        Word non_zero = 0;
+        for (auto &plane : planes) {
+          Word *data = plane.row(lit, w);
+          const Word underflow = ~*data & borrow;
+          *data ^= borrow;
+          borrow = underflow;
+          non_zero |= *data;
+        }
+        const Word zeroed = mask & ~non_zero;
+        *covered.row(lit, w) &= ~zeroed;
+        uncovered += popcount(zeroed);
+      }
+    }
+    return uncovered;
+  }
+
+  void clear() { planes.clear(); }
+
+private:
+  size_t first_word(int f) const { return (2 * f + 2) / WORD_BITS; }
+
+  Word first_word_mask(int f) const {
+    return ~Word(0) << ((2 * f + 2) % WORD_BITS);
+  }
+
+  size_t words_per_row() const {
+    return (2 * static_cast<size_t>(num_features) + WORD_BITS - 1) / WORD_BITS;
+  }
+
+  int num_features;
+  std::vector<LiteralBitMatrix> planes;
+};
+
+/**
+ * Enumerates the tuples that are feasible but not covered, without
+ * materializing all of them at once. Every tuple is written as four integers
+ * (i, i_val, j, j_val) with i < j. The matrices are not resized by the
+ * coverage set, so the cursor stays valid but does not see a consistent
+ * state if the coverage changes during the enumeration.
+ */
+class MissingTupleCursor {
+public:
+  MissingTupleCursor(const LiteralBitMatrix &feasible,
+                     const LiteralBitMatrix &covered)
+      : feasible{&feasible}, covered{&covered} {
+    load_word();
+  }
+
+  /**
+   * Writes up to `max_tuples` missing tuples to `out` (4 integers each) and
+   * returns how many have been written. Returns 0 if all tuples have been
+   * enumerated.
+   */
+  int64_t next(int64_t max_tuples, int32_t *out) {
+    return this->enumerate(max_tuples, [out](int64_t n, int lit, int other) {
+      out[4 * n] = lit / 2;
+      out[4 * n + 1] = lit % 2;
+      out[4 * n + 2] = other / 2;
+      out[4 * n + 3] = other % 2;
+    });
+  }
+
+  /**
+   * As `next` but writes the packed tuple ids `(lit << 32) | other_lit` of
+   * samplns.utils.tuple_id (one integer each).
+   */
+  int64_t next_ids(int64_t max_tuples, int64_t *out) {
+    return this->enumerate(max_tuples, [out](int64_t n, int lit, int other) {
+      out[n] = (int64_t(lit) << 32) | other;
+    });
+  }
+
+  bool done() const { return lit >= 2 * feasible->num_features; }
+
+private:
+  template <typename Output>
+  int64_t enumerate(int64_t max_tuples, const Output &output) {
+    int64_t n = 0;
+    while (n < max_tuples && !this->done()) {
+      if (!pending) {
+        this->next_word();
+        continue;
+      }
+      const int other_lit = w * WORD_BITS + count_trailing_zeros(pending);
+      pending &= pending - 1; // remove lowest bit
+      output(n, lit, other_lit);
+      n++;
     }
+    return n;
   }
 
-  void set_feasible(int f1, bool v1, int f2, bool v2) {
-    if (this->feasibility_matrix[get_index(f1, v1)][get_index(f2, v2)]) {
+  void next_word() {
+    w++;
+    if (w >= feasible->words_per_row) {
+      lit++;
+      w = feasible->first_word(lit / 2);
+    }
+    this->load_word();
+  }
+
+  void load_word() {
+    if (this->done() || w >= feasible->words_per_row) {
+      pending = 0;
       return;
     }
-    this->feasibility_matrix[get_index(f1, v1)][get_index(f2, v2)] = true;
-    this->feasibility_matrix[get_index(f2, v2)][get_index(f1, v1)] = true;
-    this->num_covered_tuples++;
+    pending = *feasible->row(lit, w) & ~*covered->row(lit, w);
   }
 
-  int get_index(int f, bool val) const { return 2 * f + (val ? 1 : 0); }
+  const LiteralBitMatrix *feasible;
+  const LiteralBitMatrix *covered;
+  int lit = 0;
+  size_t w = 0;
+  Word pending = 0;
+};
+
+/**
+ * Python iterator over the missing tuples of a coverage set, returning them
+ * in chunks of (up to) `chunk_size` rows as arrays as
+ * `CoverageSet::get_missing_tuples_array`.
+ */
+class MissingTupleChunks {
+public:
+  MissingTupleChunks(MissingTupleCursor cursor, int64_t chunk_size)
+      : cursor{cursor}, chunk_size{chunk_size} {
+    if (chunk_size <= 0) {
+      throw std::invalid_argument("The chunk size has to be positive.");
+    }
+  }
 
-  std::pair<int, bool> get_feature_and_value(int index) {
-    return std::make_pair(index / 2, index % 2 == 1);
+  py::array_t<int32_t> next() {
+    std::vector<int32_t> buffer(4 * chunk_size);
+    const int64_t n = cursor.next(chunk_size, buffer.data());
+    if (n == 0) {
+      throw py::stop_iteration();
+    }
+    py::array_t<int32_t> chunk({n, int64_t(4)});
+    std::copy(buffer.begin(), buffer.begin() + 4 * n, chunk.mutable_data());
+    return chunk;
   }
 
-  std::vector<std::vector<bool>> feasibility_matrix;
+private:
+  MissingTupleCursor cursor;
+  int64_t chunk_size;
 };
 
 class CoverageSet {
 public:
   CoverageSet(CoveredTuples feasible_tuples)
       : feasible_tuples{feasible_tuples},
-        covered_tuples{feasible_tuples.num_concrete_features} {}
+        covered_tuples{feasible_tuples.num_concrete_features},
+        cover_counters{feasible_tuples.num_concrete_features} {}
 
   ~CoverageSet() {}
 
-  void add_configuration(const std::vector<bool> &conf) {
-    this->covered_tuples.add_tuples_of_configuration(conf);
+  void add_configuration(const SampleArray &conf) {
+    this->add_configuration(
+        configuration_data(conf, this->feasible_tuples.num_concrete_features));
+  }
+
+  void add_configuration(const uint8_t *conf) {
     if (this->is_configuration_contradicting(conf)) {
       throw std::runtime_error("The covered tuples are not a subset of the "
                                "feasible tuples!");
     }
+    const auto literal_mask = this->covered_tuples.matrix.literal_mask(conf);
+    this->covered_tuples.num_covered_tuples +=
+        this->covered_tuples.matrix.add_configuration(literal_mask, conf);
+    this->cover_counters.increment(literal_mask, conf);
+    this->added_configurations[this->configuration_key(conf)] += 1;
   }
 
-  bool is_configuration_contradicting(const std::vector<bool> &conf) const {
-    for (int i = 0; i < this->feasible_tuples.num_concrete_features; i++) {
-      for (int j = i + 1; j < this->feasible_tuples.num_concrete_features;
-           j++) {
-        if (!this->feasible_tuples.is_contained(i, conf[i], j, conf[j])) {
-          return true; // contradiction found, configuration is invalid
-        }
-      }
+  /**
+   * Removes a configuration that has been added before. Tuples that are not
+   * covered by any other added configuration become missing again.
+   */
+  void remove_configuration(const SampleArray &conf) {
+    this->remove_configuration(
+        configuration_data(conf, this->feasible_tuples.num_concrete_features));
+  }
+
+  void remove_configuration(const uint8_t *conf) {
+    // Only the counters of configurations that have actually been added may be
+    // decremented, even if the tuples are covered by other configurations.
+    auto added = this->added_configurations.find(this->configuration_key(conf));
+    if (added == this->added_configurations.end()) {
+      throw std::runtime_error("The configuration to remove has not been "
+                               "added to the coverage set!");
     }
-    return false;
+    if (--added->second == 0) {
+      this->added_configurations.erase(added);
+    }
+    const auto literal_mask = this->covered_tuples.matrix.literal_mask(conf);
+    this->covered_tuples.num_covered_tuples -= this->cover_counters.decrement(
+        literal_mask, conf, this->covered_tuples.matrix);
+  }
+
+  bool is_configuration_contradicting(const uint8_t *conf) const {
+    return !this->feasible_tuples.contains_configuration(conf);
   }
 
-  int num_missing_tuples() {
+  int64_t num_missing_tuples() const {
     return this->feasible_tuples.num_covered_tuples -
            this->covered_tuples.num_covered_tuples;
   }
 
   void clear() {
-    this->covered_tuples =
-        CoveredTuples{this->feasible_tuples.num_concrete_features};
+    this->covered_tuples.clear();
+    this->cover_counters.clear();
+    this->added_configurations.clear();
   }
 
   std::vector<std::pair<std::pair<int, bool>, std::pair<int, bool>>>
-  get_missing_tuples() {
+  get_missing_tuples() const {
     std::vector<std::pair<std::pair<int, bool>, std::pair<int, bool>>>
         missing_tuples;
-    for (int i = 0; i < this->feasible_tuples.num_concrete_features; i++) {
-      for (int j = i + 1; j < this->feasible_tuples.num_concrete_features;
-           j++) {
-        for (bool i_val : {true, false}) {
-          for (bool j_val : {true, false}) {
-            if (this->feasible_tuples.is_contained(i, i_val, j, j_val) &&
-                !this->covered_tuples.is_contained(i, i_val, j, j_val)) {
-              missing_tuples.push_back(std::make_pair(
-                  std::make_pair(i, i_val), std::make_pair(j, j_val)));
-            }
-          }
-        }
-      }
+    missing_tuples.reserve(this->num_missing_tuples());
+    auto cursor = this->missing_tuples_cursor();
+    int32_t t[4];
+    while (cursor.next(1, t)) {
+      missing_tuples.push_back(std::make_pair(std::make_pair(t[0], t[1] == 1),
+                                              std::make_pair(t[2], t[3] == 1)));
     }
     return missing_tuples;
   }
 
+  /**
+   * All missing tuples as (m, 4) array with the rows (i, i_val, j, j_val).
+   */
+  py::array_t<int32_t> get_missing_tuples_array() const {
+    const int64_t m = this->num_missing_tuples();
+    py::array_t<int32_t> missing_tuples({m, int64_t(4)});
+    auto cursor = this->missing_tuples_cursor();
+    cursor.next(m, missing_tuples.mutable_data());
+    return missing_tuples;
+  }
+
+  /**
+   * All missing tuples as packed tuple ids (see samplns.utils.tuple_id).
+   */
+  py::array_t<int64_t> get_missing_tuple_ids() const {
+    const int64_t m = this->num_missing_tuples();
+    py::array_t<int64_t> missing_tuples(m);
+    auto cursor = this->missing_tuples_cursor();
+    cursor.next_ids(m, missing_tuples.mutable_data());
+    return missing_tuples;
+  }
+
+  MissingTupleCursor missing_tuples_cursor() const {
+    return MissingTupleCursor(this->feasible_tuples.matrix,
+                              this->covered_tuples.matrix);
+  }
+
 private:
+  std::string configuration_key(const uint8_t *conf) const {
+    std::string key(this->feasible_tuples.num_concrete_features, '0');
+    for (int f = 0; f < this->feasible_tuples.num_concrete_features; ++f) {
+      if (conf[f]) {
+        key[f] = '1';
+      }
+    }
+    return key;
+  }
+
   CoveredTuples feasible_tuples;
   CoveredTuples covered_tuples;
+  TupleCounters cover_counters;
+  // How often each configuration has been added (multiset).
+  std::unordered_map<std::string, int64_t> added_configurations;
 };
 
 PYBIND11_MODULE(_coverage_set, m) {
-  namespace py = pybind11;
   py::class_<CoveredTuples>(m, "CoveredTuples")
-      .def(py::init<const std::vector<std::vector<bool>> &, int>())
+      .def(py::init<const SampleArray &, int>())
       .def("is_contained", &CoveredTuples::is_contained)
       .def("__eq__", &CoveredTuples::operator==)
       .def("__le__", &CoveredTuples::operator<=)
@@ -174,8 +624,22 @@ PYBIND11_MODULE(_coverage_set, m) {
       .def_readonly("num_covered_tuples", &CoveredTuples::num_covered_tuples);
   py::class_<CoverageSet>(m, "CoverageSet")
       .def(py::init<CoveredTuples>())
-      .def("add_configuration", &CoverageSet::add_configuration)
+      .def("add_configuration", py::overload_cast<const SampleArray &>(
+                                    &CoverageSet::add_configuration))
+      .def("remove_configuration", py::overload_cast<const SampleArray &>(
+                                       &CoverageSet::remove_configuration))
       .def("num_missing_tuples", &CoverageSet::num_missing_tuples)
       .def("clear", &CoverageSet::clear)
-      .def("get_missing_tuples", &CoverageSet::get_missing_tuples);
+      .def("get_missing_tuples", &CoverageSet::get_missing_tuples)
+      .def("get_missing_tuples_array", &CoverageSet::get_missing_tuples_array)
+      .def("get_missing_tuple_ids", &CoverageSet::get_missing_tuple_ids)
+      .def(
+          "iter_missing_tuples",
+          [](const CoverageSet &self, int64_t chunk_size) {
+            return MissingTupleChunks(self.missing_tuples_cursor(), chunk_size);
+          },
+          py::arg("chunk_size") = 4096, py::keep_alive<0, 1>());
+  py::class_<MissingTupleChunks>(m, "MissingTupleChunks")
+      .def("__iter__", [](py::object self) { return self; })
+      .def("__next__", &MissingTupleChunks::next);
 }
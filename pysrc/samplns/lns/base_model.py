@@ -1,8 +1,11 @@
 """
 In this file we build the upper bound model using CP-SAT.
 """
+import collections
 import typing
+import weakref
 
+import numpy as np
 import ortools.sat.python.cp_model as cp_model
 
 from ..instances import (
@@ -17,14 +20,267 @@ from ..instances import (
     OrFeature,
     SatNode,
 )
-from ..preprocessor import IndexInstance
+from ..preprocessor import ClauseStore, IndexInstance
+
+
+def _negate(ref: int) -> int:
+    """
+    Negation of a literal reference (CP-SAT convention: `-ref-1`).
+    """
+    return -ref - 1
+
+
+def _merge_proto(target, source):
+    # Newer versions of OR-Tools use their own proto wrapper.
+    if hasattr(target, "merge_from"):
+        target.merge_from(source)
+    else:
+        target.MergeFrom(source)
+
+
+# Maximal length of a protobuf varint, enough for any int64.
+_VARINT_BYTES = 10
+
+
+def _varint(value: int) -> bytes:
+    """
+    The (shortest) protobuf varint of a non-negative integer.
+    """
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _fixed_varints(values: np.ndarray) -> np.ndarray:
+    """
+    Encodes int64 values as protobuf varints of the maximal length (padded with
+    continuation bits), such that the length of the encoding does not depend on
+    the value. Returns an uint8 array with one row per value.
+    """
+    unsigned = np.asarray(values, dtype=np.int64).view(np.uint64)
+    shifts = np.arange(_VARINT_BYTES, dtype=np.uint64) * np.uint64(7)
+    encoded = ((unsigned[:, None] >> shifts) & np.uint64(0x7F)).astype(np.uint8)
+    encoded[:, :-1] |= 0x80
+    return encoded
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _packed_header(field: int, n: int) -> bytes:
+    """
+    Header of a packed repeated field with n fixed-length varints.
+    """
+    return _varint(field << 3 | 2) + _varint(n * _VARINT_BYTES)
+
+
+class BaseModelTemplate:
+    """
+    The base model of an instance as compact constraint tables over the variable
+    indices 0, ..., n-1. A literal is referenced by its variable index or, if
+    negated, by `-index-1` (as in CP-SAT). Building the template requires to walk
+    the feature tree and the rules once, but it can then be replicated many times
+    into a CP-SAT model by only offsetting the variable indices, e.g., for the
+    k configurations of the LNS model.
+
+    The constraints are serialized once as protobuf fragment in which every
+    variable reference has a fixed length. A copy then only writes the offset
+    references into the fragment with NumPy and merges it in a single call.
+    OR-Tools versions whose model proto cannot parse serialized data get the
+    constraints added one by one instead, but the fragments are kept per
+    offset, such that models with the same layout can merge them.
+    """
+
+    # number of fragments kept for OR-Tools versions without binary parsing
+    MAX_CACHED_FRAGMENTS = 64
+
+    def __init__(self, n_variables: int):
+        self.n_variables = n_variables
+        # Clauses (BoolOr) as flat literal array with offsets (CSR).
+        self._clause_literals: typing.List[int] = []
+        self._clause_offsets: typing.List[int] = [0]
+        # Linear constraints lb <= sum(coeffs*vars) <= ub, also as CSR.
+        self._linear_vars: typing.List[int] = []
+        self._linear_coeffs: typing.List[int] = []
+        self._linear_offsets: typing.List[int] = [0]
+        self._linear_bounds: typing.List[typing.Tuple[int, int]] = []
+        self._variables_proto = None
+        self._clear_fragments()
+
+    def _clear_fragments(self):
+        # serialized constraints with zeros at the reference slots
+        self._fragment: typing.Optional[np.ndarray] = None
+        self._reference_slots: typing.Optional[np.ndarray] = None
+        self._references: typing.Optional[np.ndarray] = None
+        self._fragments_per_offset: collections.OrderedDict[
+            int, typing.Any
+        ] = collections.OrderedDict()
+
+    def add_clause(self, literals: typing.Iterable[int]):
+        self._clause_literals.extend(literals)
+        self._clause_offsets.append(len(self._clause_literals))
+        self._clear_fragments()
+
+    def add_clauses(self, clauses: ClauseStore):
+        """
+        Adds all clauses of the store, which uses the same literal references.
+        """
+        start = len(self._clause_literals)
+        self._clause_literals.extend(clauses.literals.tolist())
+        self._clause_offsets.extend((clauses.offsets[1:] + start).tolist())
+        self._clear_fragments()
+
+    def add_linear(
+        self, terms: typing.Iterable[typing.Tuple[int, int]], lb: int, ub: int
+    ):
+        """
+        Adds `lb <= sum(coeff*literal) <= ub` for terms (literal, coeff).
+        Negated literals are substituted by `1-var`.
+        """
+        for ref, coeff in terms:
+            var, weight = ref, coeff
+            if ref < 0:
+                lb -= coeff
+                ub -= coeff
+                var, weight = _negate(ref), -coeff
+            self._linear_vars.append(var)
+            self._linear_coeffs.append(weight)
+        self._linear_offsets.append(len(self._linear_vars))
+        self._linear_bounds.append((lb, ub))
+        self._clear_fragments()
+
+    def num_constraints(self) -> int:
+        return len(self._clause_offsets) - 1 + len(self._linear_bounds)
+
+    def _get_variables_proto(self):
+        """
+        A model proto with only the variables, to add them in bulk.
+        """
+        if self._variables_proto is None:
+            model = cp_model.CpModel()
+            for i in range(self.n_variables):
+                model.NewBoolVar(f"F{i}")
+            self._variables_proto = model.Proto()
+        return self._variables_proto
+
+    def _build_fragment(self):
+        """
+        Serializes the constraints as `CpModelProto` with fixed-length references.
+        """
+        fragment = bytearray()
+        slots: typing.List[int] = []  # byte position of every reference
+        references: typing.List[int] = []
+
+        def add_constraint(field: int, payload: bytes, positions: range):
+            constraint = _length_delimited(3, _length_delimited(field, payload))
+            start = len(fragment) + len(constraint) - len(payload)
+            slots.extend(start + pos for pos in positions)
+            fragment.extend(constraint)
+
+        offsets = self._clause_offsets
+        for i in range(len(offsets) - 1):
+            n = offsets[i + 1] - offsets[i]
+            header = _packed_header(1, n)
+            payload = header + bytes(n * _VARINT_BYTES)
+            add_constraint(3, payload, range(len(header), len(payload), _VARINT_BYTES))
+            references.extend(self._clause_literals[offsets[i] : offsets[i + 1]])
+        offsets = self._linear_offsets
+        for i, (lb, ub) in enumerate(self._linear_bounds):
+            n = offsets[i + 1] - offsets[i]
+            header = _packed_header(1, n)
+            variables = header + bytes(n * _VARINT_BYTES)
+            coeffs = self._linear_coeffs[offsets[i] : offsets[i + 1]]
+            payload = (
+                variables
+                + _packed_header(2, n)
+                + _fixed_varints(coeffs).tobytes()
+                + _packed_header(3, 2)
+                + _fixed_varints([lb, ub]).tobytes()
+            )
+            add_constraint(
+                12, payload, range(len(header), len(variables), _VARINT_BYTES)
+            )
+            references.extend(self._linear_vars[offsets[i] : offsets[i + 1]])
+        self._fragment = np.frombuffer(bytes(fragment), dtype=np.uint8)
+        self._reference_slots = (
+            np.asarray(slots, dtype=np.int64)[:, None]
+            + np.arange(_VARINT_BYTES, dtype=np.int64)
+        ).reshape(-1, _VARINT_BYTES)
+        self._references = np.asarray(references, dtype=np.int64)
+
+    def _serialize_constraints(self, offset: int) -> bytes:
+        """
+        The serialized constraints of a copy with the given variable offset.
+        """
+        if self._fragment is None:
+            self._build_fragment()
+        assert self._references is not None
+        references = self._references + np.where(self._references >= 0, offset, -offset)
+        fragment = self._fragment.copy()
+        fragment[self._reference_slots] = _fixed_varints(references)
+        return fragment.tobytes()
+
+    def _add_constraints(self, proto, offset: int):
+        """
+        Adds the constraints of a copy one by one.
+        """
+        literals = [
+            lit + offset if lit >= 0 else lit - offset for lit in self._clause_literals
+        ]
+        offsets = self._clause_offsets
+        for i in range(len(offsets) - 1):
+            proto.constraints.add().bool_or.literals.extend(
+                literals[offsets[i] : offsets[i + 1]]
+            )
+        linear_vars = [v + offset for v in self._linear_vars]
+        offsets = self._linear_offsets
+        for i, (lb, ub) in enumerate(self._linear_bounds):
+            linear = proto.constraints.add().linear
+            linear.vars.extend(linear_vars[offsets[i] : offsets[i + 1]])
+            linear.coeffs.extend(self._linear_coeffs[offsets[i] : offsets[i + 1]])
+            linear.domain.extend([lb, ub])
+
+    def _get_constraints_proto(self, offset: int):
+        """
+        The constraints of a copy with the given offset as model proto (cached).
+        """
+        fragments = self._fragments_per_offset
+        if offset in fragments:
+            fragments.move_to_end(offset)
+        else:
+            proto = cp_model.CpModel().Proto()
+            self._add_constraints(proto, offset)
+            fragments[offset] = proto
+            if len(fragments) > self.MAX_CACHED_FRAGMENTS:
+                fragments.popitem(last=False)
+        return fragments[offset]
+
+    def instantiate(self, model: cp_model.CpModel) -> int:
+        """
+        Adds a copy of the base model with new variables to the model. Returns the
+        offset of the variables, i.e., variable i of the template has the index
+        `offset+i` in the model (see `CpModel.GetBoolVarFromProtoIndex`).
+        """
+        proto = model.Proto()
+        offset = len(proto.variables)
+        _merge_proto(proto, self._get_variables_proto())
+        if hasattr(proto, "MergeFromString"):
+            proto.MergeFromString(self._serialize_constraints(offset))
+        else:
+            _merge_proto(proto, self._get_constraints_proto(offset))
+        return offset
 
 
 class BaseModelCreator:
     """
     This is a simple factory for creating the base model of the universe.
     Because the features are indexed, simply the model and a list of variables is
-    returned.
+    returned. The base model is first built as `BaseModelTemplate` (cached per
+    instance), such that creating further copies only has to replicate it.
     """
 
     def __init__(self, use_linear_parent_dependency: bool = False):
@@ -32,21 +288,19 @@ class BaseModelCreator:
         use_linear_parent_dependency seems to be minimally slower (54s vs 51s in one experiment)
         """
         self.use_linear_parent_dependency = use_linear_parent_dependency
+        self._templates: weakref.WeakKeyDictionary[
+            IndexInstance, BaseModelTemplate
+        ] = weakref.WeakKeyDictionary()
 
-    def _get_struct_var(
-        self, variables: typing.List[cp_model.IntVar], structure_node: FeatureNode
-    ) -> cp_model.IntVar:
+    def _get_struct_lit(self, structure_node: FeatureNode) -> int:
         assert isinstance(structure_node.feature_literal.var_name, int), "IndexInstance"
         if structure_node.feature_literal.negated:
-            return variables[structure_node.feature_literal.var_name].Not()
+            return _negate(structure_node.feature_literal.var_name)
         else:
-            return variables[structure_node.feature_literal.var_name]
+            return structure_node.feature_literal.var_name
 
     def _add_and_structure_constraint(
-        self,
-        structure: AndFeature,
-        model: cp_model.CpModel,
-        variables: typing.List[cp_model.IntVar],
+        self, structure: AndFeature, template: BaseModelTemplate
     ):
         assert all(
             x.feature_literal == structure.feature_literal or not x.mandatory
@@ -54,80 +308,74 @@ class BaseModelCreator:
         ), "Preprocessor should have substituted these."
         # if a child is active, the And-Feature has to be active too
         literals = [
-            self._get_struct_var(variables, element)
+            self._get_struct_lit(element)
             for element in structure.elements
             if not element.mandatory
         ]
         if not literals:
             return  # nothing to do
+        and_feature = self._get_struct_lit(structure)
         if self.use_linear_parent_dependency:
-            and_feature = self._get_struct_var(variables, structure)
-            model.Add(sum(literals) <= len(literals) * and_feature)
+            # sum(literals) <= len(literals) * and_feature
+            template.add_linear(
+                [(lit, 1) for lit in literals] + [(and_feature, -len(literals))],
+                -len(literals),
+                0,
+            )
         else:
             # forall elements: element active => or-feature active
-            and_feature = self._get_struct_var(variables, structure)
             for lit in literals:
-                # model.Add(lit <= and_feature) would be minimally slower
-                model.AddBoolOr([lit.Not(), and_feature])
+                # sum(literals) <= and_feature would be minimally slower
+                template.add_clause([_negate(lit), and_feature])
 
     def _add_alt_structure_constraint(
-        self,
-        structure: AltFeature,
-        model: cp_model.CpModel,
-        variables: typing.List[cp_model.IntVar],
+        self, structure: AltFeature, template: BaseModelTemplate
     ):
-        literals = [
-            self._get_struct_var(variables, element) for element in structure.elements
-        ]
+        literals = [self._get_struct_lit(element) for element in structure.elements]
         assert len(literals) > 1, "Should otherwise have been removed by preprocessor."
-        alt_feature = self._get_struct_var(variables, structure)
-        model.Add(sum(literals) == alt_feature)
+        alt_feature = self._get_struct_lit(structure)
+        # sum(literals) == alt_feature
+        template.add_linear([(lit, 1) for lit in literals] + [(alt_feature, -1)], 0, 0)
 
     def _add_or_structure_constraint(
-        self,
-        structure: OrFeature,
-        model: cp_model.CpModel,
-        variables: typing.List[cp_model.IntVar],
+        self, structure: OrFeature, template: BaseModelTemplate
     ):
         # Either a child is active, or the Or-feature is inactive
-        literals = [
-            self._get_struct_var(variables, element) for element in structure.elements
-        ]
-        model.AddBoolOr([*literals, self._get_struct_var(variables, structure).Not()])
+        literals = [self._get_struct_lit(element) for element in structure.elements]
+        or_feature = self._get_struct_lit(structure)
+        template.add_clause([*literals, _negate(or_feature)])
         # if a child is active, the Or-Feature has to be active too
         if self.use_linear_parent_dependency:
-            model.Add(sum(literals) <= self._get_struct_var(variables, structure))
+            # sum(literals) <= or_feature
+            template.add_linear(
+                [(lit, 1) for lit in literals] + [(or_feature, -1)],
+                -len(literals),
+                0,
+            )
         else:
-            or_feature = self._get_struct_var(variables, structure)
             for lit in literals:
-                model.AddBoolOr([lit.Not(), or_feature])
+                template.add_clause([_negate(lit), or_feature])
 
     def _add_structure_constraints(
-        self,
-        structure: FeatureNode,
-        model: cp_model.CpModel,
-        variables: typing.List[cp_model.IntVar],
+        self, structure: FeatureNode, template: BaseModelTemplate
     ):
         if isinstance(structure, ConcreteFeature):
             return  # Nothing needs to be added here
         assert isinstance(structure, CompositeFeature)
         if isinstance(structure, AndFeature):
-            self._add_and_structure_constraint(structure, model, variables)
+            self._add_and_structure_constraint(structure, template)
         elif isinstance(structure, OrFeature):
-            self._add_or_structure_constraint(structure, model, variables)
+            self._add_or_structure_constraint(structure, template)
         elif isinstance(structure, AltFeature):
-            self._add_alt_structure_constraint(structure, model, variables)
+            self._add_alt_structure_constraint(structure, template)
         else:
             msg = f"Unexpected node encountered: {structure}!"
             raise ValueError(msg)
         for element in structure.elements:
-            self._add_structure_constraints(element, model, variables)
+            self._add_structure_constraints(element, template)
 
     def _add_rule_constraints(
-        self,
-        rules: typing.List[SatNode],
-        model: cp_model.CpModel,
-        variables: typing.List[cp_model.IntVar],
+        self, rules: typing.List[SatNode], template: BaseModelTemplate
     ):
         for rule in rules:
             if isinstance(rule, OR):
@@ -135,34 +383,51 @@ class BaseModelCreator:
                     msg = "Rule is not in CNF!"
                     raise ValueError(msg)
                 elements: typing.List[VAR] = rule.elements
-                literals = [
-                    variables[lit.var_name]
-                    if not lit.negated
-                    else variables[lit.var_name].Not()
-                    for lit in elements
-                ]
-                model.AddBoolOr(literals)
+                template.add_clause(
+                    [
+                        lit.var_name if not lit.negated else _negate(lit.var_name)
+                        for lit in elements
+                    ]
+                )
             elif isinstance(rule, VAR):
                 # todo: should be detected and forced by preprocessor
-                model.Add(variables[rule.var_name] == (1 if not rule.negated else 0))
+                value = 1 if not rule.negated else 0
+                template.add_linear([(rule.var_name, 1)], value, value)
             else:
                 msg = "Rule is not in CNF!"
                 raise ValueError(msg)
 
-    def create(
-        self, instance: IndexInstance, model=None
-    ) -> typing.Tuple[cp_model.CpModel, typing.List[cp_model.IntVar]]:
-        model = cp_model.CpModel() if model is None else model
-        variables = [model.NewBoolVar(f"F{i}") for i in range(instance.n_all)]
+    def create_template(self, instance: IndexInstance) -> BaseModelTemplate:
+        """
+        Returns the base model of the instance as template. The template is
+        only built once per instance.
+        """
+        template = self._templates.get(instance)
+        if template is not None:
+            return template
+        template = BaseModelTemplate(instance.n_all)
         if instance.structure is not None:
-            self._add_structure_constraints(instance.structure, model, variables)
-        self._add_rule_constraints(instance.rules, model, variables)
+            self._add_structure_constraints(instance.structure, template)
+        if instance.clauses is not None:
+            template.add_clauses(instance.clauses)
+        else:
+            self._add_rule_constraints(instance.rules, template)
         # root node
         # if instance.structure.mandatory:
         if instance.structure is not None:
-            model.Add(
-                self._get_struct_var(variables, instance.structure) == 1
-            )  # enforce root node
+            # enforce root node
+            template.add_clause([self._get_struct_lit(instance.structure)])
+        self._templates[instance] = template
+        return template
+
+    def create(
+        self, instance: IndexInstance, model=None
+    ) -> typing.Tuple[cp_model.CpModel, typing.List[cp_model.IntVar]]:
+        model = cp_model.CpModel() if model is None else model
+        offset = self.create_template(instance).instantiate(model)
+        variables = [
+            model.GetBoolVarFromProtoIndex(offset + i) for i in range(instance.n_all)
+        ]
         return model, variables
 
 
@@ -5,6 +5,10 @@ Some code for keeping track on the interactions to cover.
 import logging
 import typing
 
+import numpy as np
+
+from ..utils import configuration_to_array, sample_to_array
+
 Configuration = typing.Dict[int, bool]
 Sample = typing.List[Configuration]
 Literal = typing.Tuple[int, bool]
@@ -19,37 +23,94 @@ _logger = logging.getLogger("SampLNS")
 class CoverageSet:
     """
     The coverage set is for computing which interactions are covered.
+    Samples and configurations can be passed as dictionaries or, without
+    any conversion, as uint8 arrays of the concrete features
+    (see `samplns.utils.sample_to_array`).
     """
 
-    def __init__(self, sample: Sample, n_concrete: int, logger=_logger):
+    def __init__(
+        self,
+        sample: typing.Union[Sample, np.ndarray],
+        n_concrete: int,
+        logger=_logger,
+    ):
         """
         sample: A feasible sample that can be used to deduce the feasible interactions
         n_concrete: The number of concrete features.
         """
         logger.info("Computing feasible tuples...")
-        _sample = [[conf[f] for f in range(n_concrete)] for conf in sample]
-        logger.info("Converted sample to list representation.")
+        if not isinstance(sample, np.ndarray):
+            sample = sample_to_array(sample, range(n_concrete))
+            logger.info("Converted sample to array representation.")
         self.n_concrete = n_concrete
-        self._feasible_tuples = _CoveredTuples(_sample, n_concrete)
+        self._feasible_tuples = _CoveredTuples(sample, n_concrete)
         self._covered_tuples = _CoverageSet(self._feasible_tuples)
         logger.info(
             "Instance has %d feasible tuples.", self._feasible_tuples.num_covered_tuples
         )
 
-    def cover(self, configuration: Configuration):
+    def _as_array(
+        self, configuration: typing.Union[Configuration, np.ndarray]
+    ) -> np.ndarray:
+        if isinstance(configuration, np.ndarray):
+            return configuration
+        return configuration_to_array(configuration, range(self.n_concrete))
+
+    def cover(self, configuration: typing.Union[Configuration, np.ndarray]):
         """
         Cover all interactions with a configuration
         """
-        self._covered_tuples.add_configuration(
-            [configuration[f] for f in range(self.n_concrete)]
-        )
+        self._covered_tuples.add_configuration(self._as_array(configuration))
+
+    def uncover(self, configuration: typing.Union[Configuration, np.ndarray]):
+        """
+        Remove a previously covered configuration again. Interactions that are
+        not covered by any other covered configuration become missing.
+        """
+        self._covered_tuples.remove_configuration(self._as_array(configuration))
 
-    def missing_tuples(self):
+    def missing_tuples(self) -> typing.List[typing.Tuple[Literal, Literal]]:
         """
         List of not covered interactions.
         """
         return self._covered_tuples.get_missing_tuples()
 
+    def missing_tuples_array(self) -> np.ndarray:
+        """
+        The not covered interactions as int32 array of shape (m, 4), where every
+        row is an interaction (i, i_val, j, j_val) with i < j. Much more compact
+        than `missing_tuples` for many missing interactions.
+        """
+        return self._covered_tuples.get_missing_tuples_array()
+
+    def missing_tuple_ids(self) -> np.ndarray:
+        """
+        The not covered interactions as packed tuple ids (see
+        `samplns.utils.tuple_id`).
+        """
+        return self._covered_tuples.get_missing_tuple_ids()
+
+    def iter_missing_tuples_chunks(
+        self, chunk_size: int = 4096
+    ) -> typing.Iterator[np.ndarray]:
+        """
+        Streams the not covered interactions in arrays of up to `chunk_size` rows
+        (same format as `missing_tuples_array`). The coverage set must not be
+        modified during the iteration.
+        """
+        return self._covered_tuples.iter_missing_tuples(chunk_size)
+
+    def iter_missing_tuples(
+        self, chunk_size: int = 4096
+    ) -> typing.Iterator[typing.Tuple[Literal, Literal]]:
+        """
+        Lazily yields the not covered interactions in the format of
+        `missing_tuples`, without materializing all of them.
+        """
+        for chunk in self.iter_missing_tuples_chunks(chunk_size):
+            for i, i_val, j, j_val in chunk.tolist():
+                yield ((i, bool(i_val)), (j, bool(j_val)))
+
     def num_missing(self) -> int:
         """
         Number of not covered interactions.
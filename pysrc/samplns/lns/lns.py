@@ -1,16 +1,24 @@
 """
 The LNS Algorithm
 """
+import contextlib
 import logging
+import math
 import typing
 
+import numpy as np
+
 from ..cds import CdsAlgorithm
 from ..preprocessor import IndexInstance
+from ..utils import Configuration
 from ..utils.timer import Timer
-from .model import TupleIndex, VectorizedEdgeModel
+from ..verify import FeasibilityChecker
+from .model import ReusableEdgeModel, VectorizedEdgeModel
 from .neighborhood import Neighborhood, NeighborhoodSelector
+from .portfolio import NeighborhoodPortfolio, merge_improvements
+from .solver_profile import SolverProfile, get_solver_profile
 
-InternalSolution = typing.List[typing.Dict[int, bool]]  # Solution for working instance
+InternalSolution = typing.List[Configuration]  # Solution for working instance
 
 _logger = logging.getLogger("SampLNS")
 
@@ -57,6 +65,12 @@ class ModularLns:
         ] = None,
         observer=LnsObserver(),
         logger: logging.Logger = _logger,
+        reuse_model: bool = False,
+        max_neighborhoods_per_model: int = 10,
+        model_capacity_factor: float = 1.2,
+        parallel_neighborhoods: int = 1,
+        workers_per_neighborhood: typing.Optional[int] = None,
+        solver_profile: typing.Union[str, SolverProfile, None] = None,
     ):
         """
         instance: The instance we want to find a sample for.
@@ -64,11 +78,28 @@ class ModularLns:
         neighborhood_selector: The heart of the LNS algorithm, its neighborhood.
         use_hints: Use CP-SAT hints using the previous solution.
         on_new_solution: A callback that notifies about every new solution.
+        reuse_model: Keep the CP-SAT model alive over multiple neighborhoods
+            instead of building a new one in every iteration.
+        max_neighborhoods_per_model: With `reuse_model`, the model is rebuilt
+            after this many neighborhoods, as their constraints accumulate.
+        model_capacity_factor: With `reuse_model`, a new model supports this factor
+            more configurations than needed, such that it can also be reused for
+            slightly larger neighborhoods.
+        parallel_neighborhoods: Number of neighborhoods optimized concurrently
+            in separate processes per iteration. Their improvements are merged.
+        workers_per_neighborhood: With `parallel_neighborhoods`, the number of
+            CP-SAT workers per neighborhood. By default, the threads are split evenly.
+        solver_profile: The CP-SAT parameters (thread count, subsolvers, etc.),
+            as `SolverProfile` or name in `SOLVER_PROFILES`.
         """
+        if parallel_neighborhoods > 1 and reuse_model:
+            msg = "Reusing the model is not supported for parallel neighborhoods."
+            raise ValueError(msg)
         self.log = logger
         self.index_instance = instance
+        self._feasibility = FeasibilityChecker(instance)
         self.neighborhood_selector = neighborhood_selector
-        solution = initial_solution
+        solution = [Configuration.from_dict(conf) for conf in initial_solution]
         self.neighborhood_selector.setup(self.index_instance, solution)
         self._cds = cds_algorithm
         self.lb = 0
@@ -76,6 +107,14 @@ class ModularLns:
         self.on_new_solution = on_new_solution
         self.observer = observer
         self._times_failed_to_build_model = 0
+        self._reuse_model = reuse_model
+        self._max_neighborhoods_per_model = max_neighborhoods_per_model
+        self._model_capacity_factor = model_capacity_factor
+        self._reusable_model: typing.Optional[ReusableEdgeModel] = None
+        self._parallel_neighborhoods = parallel_neighborhoods
+        self._workers_per_neighborhood = workers_per_neighborhood
+        self._portfolio: typing.Optional[NeighborhoodPortfolio] = None
+        self._solver_profile = get_solver_profile(solver_profile)
 
     def add_lower_bound(self, lb: int) -> None:
         """
@@ -106,7 +145,7 @@ class ModularLns:
         self.observer.report_new_solution(solution)
 
     def _build_neighborhood_model(
-        self, neighborhood: Neighborhood, independent: typing.List, timer: Timer
+        self, neighborhood: Neighborhood, independent: np.ndarray, timer: Timer
     ):
         """
         Build the CP-SAT model for optimizing the neighborhood.
@@ -114,20 +153,51 @@ class ModularLns:
         """
         k = len(neighborhood.initial_solution)
         self.log.info("Building model for neighborhood of size %d.", k)
-        model = VectorizedEdgeModel(self.index_instance, k, timer, logger=self.log)
-        self.log.info("Using %d tuples to break symmetries.", len(independent))
-        model.break_symmetries(
-            TupleIndex(t[0][0], t[0][1], t[1][0], t[1][1]) for t in independent
+        model = self._get_empty_model(k, timer)
+        model.add_neighborhood(
+            neighborhood.initial_solution,
+            neighborhood.missing_tuple_ids,
+            independent,
+            timer,
         )
-        timer.check()
-        model.set_initial_solution(neighborhood.initial_solution)
-        for i, t in enumerate(neighborhood.missing_tuples):
-            if i % 1000 == 0:
-                timer.check()
-            model.enforce_tuple(TupleIndex(t[0][0], t[0][1], t[1][0], t[1][1]))
         self.log.info("Model built.")
         return model
 
+    def _get_empty_model(self, k: int, timer: Timer) -> VectorizedEdgeModel:
+        """
+        Returns a model with k configurations but without neighborhood specific
+        constraints. A reusable model is only rebuilt if it is too small or has
+        been used for too many neighborhoods.
+        """
+        if not self._reuse_model:
+            return VectorizedEdgeModel(
+                self.index_instance,
+                k,
+                timer,
+                logger=self.log,
+                solver_profile=self._solver_profile,
+            )
+        model = self._reusable_model
+        if (
+            model is None
+            or model.capacity < k
+            or model.num_neighborhoods >= self._max_neighborhoods_per_model
+        ):
+            self._reusable_model = None  # free memory before building the new one
+            capacity = max(k, math.ceil(k * self._model_capacity_factor))
+            model = ReusableEdgeModel(
+                self.index_instance,
+                capacity,
+                timer,
+                logger=self.log,
+                solver_profile=self._solver_profile,
+            )
+            self._reusable_model = model
+        else:
+            self.log.info("Reusing model with capacity %d.", model.capacity)
+        model.begin_neighborhood(k)
+        return model
+
     def optimize_neighborhood(
         self,
         neighborhood: Neighborhood,
@@ -150,26 +220,20 @@ class ModularLns:
         k = len(neighborhood.initial_solution)
 
         # Trivial cases
-        if not neighborhood.missing_tuples:
+        if not len(neighborhood.missing_tuple_ids):
             self.log.info("No optimization necessary: no missing tuples.")
             return 0, 0, False
         if k <= 1:
             return k, k, False
-        independent = list(
-            self._cds.compute_independent_set(
-                neighborhood.missing_tuples,
-                timelimit=timer.remaining() * symmetry_breaking_time_frac,
-                ub=k,
-            )
+        independent = self._cds.compute_independent_set(
+            neighborhood.missing_tuple_ids,
+            timelimit=timer.remaining() * symmetry_breaking_time_frac,
+            ub=k,
         )
-        neighborhood.missing_tuples = [
-            (min(t), max(t)) for t in neighborhood.missing_tuples
-        ]
-        independent = [(min(t), max(t)) for t in independent]
         timer.lap("local_cds_computed")
-        # assert all(
-        #    t in neighborhood.missing_tuples for t in independent
-        # ), "All independent tuples should be missing tuples."
+        # assert np.isin(
+        #    independent, neighborhood.missing_tuple_ids
+        # ).all(), "All independent tuples should be missing tuples."
         if len(independent) == k:
             self.log.info(
                 "No optimization necessary: lower bound fits available solution."
@@ -192,8 +256,8 @@ class ModularLns:
                 assert all(
                     self.index_instance.is_fully_defined(conf) for conf in samples
                 ), "Solution should be fully defined."
-                assert all(
-                    self.index_instance.is_feasible(conf) for conf in samples
+                assert self._feasibility.is_feasible(
+                    samples
                 ), "Solution should be feasible. If this fails, there probably is a bug in the parser or CP-SAT model."
                 solution = neighborhood.fixed_samples + samples
                 self._add_new_solution(solution)
@@ -203,6 +267,94 @@ class ModularLns:
             self.log.info("Timeout in iteration.")
         return lb, k, True
 
+    def optimize_neighborhoods(
+        self,
+        neighborhoods: typing.List[Neighborhood],
+        timelimit: float,
+        timer: typing.Optional[Timer] = None,
+        symmetry_breaking_time_frac: float = 0.1,
+    ) -> typing.List[typing.Tuple[int, int, bool]]:
+        """
+        Optimizes neighborhoods of the current best solution concurrently and
+        merges their improvements into a single new solution. Returns lower and
+        upper bound and the not-skipped flag for every neighborhood, as
+        `optimize_neighborhood`.
+        """
+        assert self._portfolio is not None, "Only available during `optimize`."
+        assert symmetry_breaking_time_frac > 0.0
+        assert symmetry_breaking_time_frac < 1.0
+        if timer is None:
+            timer = Timer(timelimit)
+        results: typing.List[typing.Tuple[int, int, bool]] = []
+        tasks = []
+        for neighborhood in neighborhoods:
+            self.observer.report_neighborhood_optimization(neighborhood)
+            k = len(neighborhood.initial_solution)
+            if not len(neighborhood.missing_tuple_ids):
+                results.append((0, 0, False))
+                continue
+            if k <= 1:
+                results.append((k, k, False))
+                continue
+            independent = self._cds.compute_independent_set(
+                neighborhood.missing_tuple_ids,
+                timelimit=timer.remaining()
+                * symmetry_breaking_time_frac
+                / len(neighborhoods),
+                ub=k,
+            )
+            if len(independent) == k:
+                results.append((k, k, False))
+                continue
+            results.append((1, k, True))  # updated after solving
+            tasks.append((len(results) - 1, neighborhood, independent))
+        timer.lap("local_cds_computed")
+        if not tasks:
+            return results
+        solved = self._portfolio.solve(
+            [(neighborhood, independent) for _, neighborhood, independent in tasks],
+            max(1.0, timer.remaining()),
+        )
+        timer.lap("models_optimized")
+        improvements = []
+        for (i, neighborhood, _), (lb, samples, built) in zip(tasks, solved):
+            k = len(neighborhood.initial_solution)
+            if not built:
+                self._times_failed_to_build_model += 1
+            if samples is None:
+                results[i] = (lb, k, True)
+                continue
+            assert all(
+                self.index_instance.is_fully_defined(conf) for conf in samples
+            ), "Solution should be fully defined."
+            assert self._feasibility.is_feasible(
+                samples
+            ), "Solution should be feasible. If this fails, there probably is a bug in the parser or CP-SAT model."
+            results[i] = (lb, len(samples), True)
+            if len(samples) < k:
+                improvements.append((neighborhood, samples))
+        if improvements:
+            solution = merge_improvements(
+                self.get_best_solution(),
+                improvements,
+                self.index_instance.n_concrete,
+            )
+            self._add_new_solution(solution)
+        return results
+
+    def _neighborhood_portfolio(self):
+        """
+        The worker processes for optimizing multiple neighborhoods, if enabled.
+        """
+        if self._parallel_neighborhoods <= 1:
+            return contextlib.nullcontext()
+        return NeighborhoodPortfolio(
+            self.index_instance,
+            self._parallel_neighborhoods,
+            self._workers_per_neighborhood,
+            self._solver_profile,
+        )
+
     def optimize(
         self,
         iterations: int = 15,
@@ -222,7 +374,10 @@ class ModularLns:
             timelimit,
         )
         opt_timer = Timer(timelimit)
-        with self._cds(iteration_timelimit=iteration_timelimit):
+        with self._cds(
+            iteration_timelimit=iteration_timelimit
+        ), self._neighborhood_portfolio() as portfolio:
+            self._portfolio = portfolio
             self.add_lower_bound(self._cds.get_lb())  # Set initial lower bound
             opt_timer.lap("initial_lb_computed")
             for i in range(iterations):
@@ -234,19 +389,32 @@ class ModularLns:
                 self.observer.report_iteration_begin(i)
                 iter_timer = Timer(min(iteration_timelimit, opt_timer.remaining()))
                 # Optimize
-                nbrhd = self.neighborhood_selector.next()
-                self.log.info(
-                    "Selected neighborhood, removing %d configurations, leaving %d tuples uncovered.",
-                    len(nbrhd.initial_solution),
-                    len(nbrhd.missing_tuples),
-                )
+                if portfolio is None:
+                    nbrhds = [self.neighborhood_selector.next()]
+                else:
+                    nbrhds = self.neighborhood_selector.next_batch(
+                        self._parallel_neighborhoods
+                    )
+                for nbrhd in nbrhds:
+                    self.log.info(
+                        "Selected neighborhood, removing %d configurations, leaving %d tuples uncovered.",
+                        len(nbrhd.initial_solution),
+                        len(nbrhd.missing_tuple_ids),
+                    )
                 iter_timer.lap("neighborhood_selected")
-                lb, ub, not_skipped = self.optimize_neighborhood(
-                    nbrhd, iter_timer.remaining(), iter_timer
-                )
-                self.add_lower_bound(lb)
-
-                self.log.info("Optimized neighborhood, lb=%d, ub=%d.", lb, ub)
+                if portfolio is None:
+                    results = [
+                        self.optimize_neighborhood(
+                            nbrhds[0], iter_timer.remaining(), iter_timer
+                        )
+                    ]
+                else:
+                    results = self.optimize_neighborhoods(
+                        nbrhds, iter_timer.remaining(), iter_timer
+                    )
+                for lb, ub, _ in results:
+                    self.add_lower_bound(lb)
+                    self.log.info("Optimized neighborhood, lb=%d, ub=%d.", lb, ub)
                 iter_timer.lap("neighborhood_optimized")
 
                 # lb and ub are regarding neighborhood, not global.
@@ -261,15 +429,32 @@ class ModularLns:
                     iter_timer.get_laps(),
                 )
                 # Check optimality
-                complete_and_optimal = lb == ub and not nbrhd.fixed_samples
+                complete_and_optimal = any(
+                    lb == ub and not nbrhd.fixed_samples
+                    for nbrhd, (lb, ub, _) in zip(nbrhds, results)
+                )
                 solution_matches_lb = self.lb == len(self.get_best_solution())
                 if complete_and_optimal or solution_matches_lb:
+                    self._portfolio = None
                     return True  # optimal solution
                 # Tune size for next iteration
                 tu = iter_timer.time() / iteration_timelimit
-                if not_skipped or self._times_failed_to_build_model == 0:
+                feedback = [
+                    (nbrhd, lb, ub)
+                    for nbrhd, (lb, ub, not_skipped) in zip(nbrhds, results)
+                    if not_skipped or self._times_failed_to_build_model == 0
+                ]
+                if len(feedback) == 1:
+                    nbrhd, lb, ub = feedback[0]
                     self.neighborhood_selector.feedback(
                         nbrhd, lb=lb, ub=ub, time_utilization=tu
                     )
+                elif feedback:
+                    self.neighborhood_selector.feedback_batch(
+                        [nbrhd for nbrhd, _, _ in feedback],
+                        [(lb, ub) for _, lb, ub in feedback],
+                        time_utilization=tu,
+                    )
             opt_timer.lap("iterations_ended")
+            self._portfolio = None
         return False
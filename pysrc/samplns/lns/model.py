@@ -2,14 +2,15 @@
 The CP-SAT models for the optimization, as required by LNS.
 """
 import logging
-import multiprocessing
 import typing
 
+import numpy as np
 import ortools.sat.python.cp_model as cp_model
 
 from ..preprocessor import IndexInstance
-from ..utils import Timer
+from ..utils import Configuration, Timer, tuple_from_id, tuple_id
 from .base_model import BaseModelCreator
+from .solver_profile import SolverProfile, get_solver_profile
 
 
 class TupleIndex:
@@ -31,6 +32,17 @@ class TupleIndex:
     def to_tuple(self):
         return (self.i, self.i_pos, self.j, self.j_pos)
 
+    def to_id(self) -> int:
+        """
+        The packed tuple id (see `samplns.utils.tuple_id`).
+        """
+        return tuple_id(self.i, self.i_pos, self.j, self.j_pos)
+
+    @staticmethod
+    def from_id(id_: int) -> "TupleIndex":
+        (i, i_pos), (j, j_pos) = tuple_from_id(id_)
+        return TupleIndex(i, i_pos, j, j_pos)
+
     def __repr__(self):
         return f"TupleIndex[{self.i, self.i_pos, self.j, self.j_pos}]"
 
@@ -52,40 +64,65 @@ class _SubModel:
     def __init__(self, instance: IndexInstance, model: cp_model.CpModel, timer: Timer):
         timer.check()
         self.model = model
-        self.variables = self.bmc.create(instance, model)[1]
+        # The base model is only built once per instance and then replicated.
+        # The variables of this configuration are offset...offset+n_all-1.
+        self.n_variables = instance.n_all
+        self.offset = self.bmc.create_template(instance).instantiate(model)
+        self._variables = {}
         # A container with all the tuple variables.
         self.tuple_variables = {}
         # A variable to indicated, that this configuration is activated.
         self.activated = model.NewBoolVar(f"ACT[{id(self)}]")
         timer.check()
 
-    def get_configuration(self, solver):
-        return {i: bool(solver.Value(x)) for i, x in enumerate(self.variables)}
+    def variable(self, i: int) -> cp_model.IntVar:
+        """
+        The variable of feature i (only created as Python object on demand).
+        """
+        if i not in self._variables:
+            self._variables[i] = self.model.GetBoolVarFromProtoIndex(self.offset + i)
+        return self._variables[i]
+
+    def variable_indices(self) -> range:
+        """
+        The indices of the feature variables in the model proto.
+        """
+        return range(self.offset, self.offset + self.n_variables)
 
-    def set_hint(self, solution: typing.Dict[int, bool]):
+    def get_configuration(self, solution: typing.List[int]) -> Configuration:
+        """
+        Extracts the configuration from the values of all variables of the model.
+        """
+        return Configuration(solution[self.offset : self.offset + self.n_variables])
+
+    def set_hint(self, solution: typing.Mapping[int, bool]):
         """
         Set a hint for this submodel/configuration.
         """
         self.model.AddHint(self.activated, True)
-        for i, x in solution.items():
-            self.model.AddHint(self.variables[i], x)
+        hint = self.model.Proto().solution_hint
+        features = list(solution.keys())
+        hint.vars.extend([self.offset + i for i in features])
+        hint.values.extend([int(solution[i]) for i in features])
 
-    def get_tuple_variable(self, edge_index: TupleIndex):
+    def get_tuple_variable(self, edge_id: int):
         """
-        Creates and returns a variable that indicates if this tuple is covered.
+        Creates and returns a variable that indicates if this tuple (given as
+        packed tuple id) is covered.
         """
-        if edge_index in self.tuple_variables:
-            return self.tuple_variables[edge_index]
+        if edge_id in self.tuple_variables:
+            return self.tuple_variables[edge_id]
         # create new variable
-        edge_var = self.model.NewBoolVar(str(edge_index))
-        self.tuple_variables[edge_index] = edge_var
+        (i, i_pos), (j, j_pos) = tuple_from_id(edge_id)
+        edge_var = self.model.NewBoolVar(f"TupleIndex[{i, i_pos, j, j_pos}]")
+        self.tuple_variables[edge_id] = edge_var
 
         # corresponding feature variables
-        i_var = self.variables[edge_index.i]
-        if not edge_index.i_pos:
+        i_var = self.variable(i)
+        if not i_pos:
             i_var = i_var.Not()
-        j_var = self.variables[edge_index.j]
-        if not edge_index.j_pos:
+        j_var = self.variable(j)
+        if not j_pos:
             j_var = j_var.Not()
 
         # Enforce consistency
@@ -109,17 +146,25 @@ class VectorizedEdgeModel:
         timer: Timer,
         logger: logging.Logger,
         verbose=True,
+        num_workers: typing.Optional[int] = None,
+        solver_profile: typing.Optional[SolverProfile] = None,
     ):
+        """
+        num_workers: Maximal number of CP-SAT workers, e.g., if multiple models
+            are solved at the same time.
+        solver_profile: The CP-SAT parameters. The number of workers is updated
+            to the size of the neighborhood in `add_neighborhood`.
+        """
         self.log = logger
         self.model = cp_model.CpModel()
         self.submodels = [_SubModel(instance, self.model, timer) for _ in range(k)]
         self.model.Minimize(sum(submodel.activated for submodel in self.submodels))
         self.solver = cp_model.CpSolver()
+        self._solver_profile = get_solver_profile(solver_profile)
+        self._max_workers = num_workers
+        self._solver_profile.apply(self.solver.parameters)
         self.solver.parameters.num_search_workers = (
-            multiprocessing.cpu_count() - 1
-        )  # all but one thread
-        self.log.info(
-            "Using %d threads for search.", self.solver.parameters.num_search_workers
+            self._solver_profile.get_num_workers(max_workers=num_workers)
         )
         if verbose:
             self.solver.parameters.log_search_progress = True
@@ -128,18 +173,68 @@ class VectorizedEdgeModel:
             self.solver.log_callback = lambda msg: cpsat_logger.info(msg)  # (str)->None
         self.status = None
         self._symmetry_breaking_tuples = {}
+        # The number of submodels that can be used (see ReusableEdgeModel).
+        self.k = k
+        # Literals that enforce the constraints of the current neighborhood.
+        self._enforcement_literals = []
 
-    def break_symmetries(self, independent_tuples: typing.Iterable[TupleIndex]):
-        independent_tuples = list(independent_tuples)
+    def _enforce(self, constraint: cp_model.Constraint) -> cp_model.Constraint:
+        if self._enforcement_literals:
+            constraint.OnlyEnforceIf(self._enforcement_literals)
+        return constraint
+
+    def break_symmetries(self, independent_tuples: typing.Iterable[int]):
+        """
+        Assign the independent tuples (packed tuple ids) to the first submodels.
+        """
+        independent_tuples = [int(t) for t in independent_tuples]
         for i, t in enumerate(independent_tuples):
-            self.model.Add(self.submodels[i].get_tuple_variable(t) == 1)
+            self._enforce(self.model.Add(self.submodels[i].get_tuple_variable(t) == 1))
             self._symmetry_breaking_tuples[t] = i
-        for i, submodel in enumerate(self.submodels):
+        for i, submodel in enumerate(self.submodels[: self.k]):
             if i > len(independent_tuples):
-                self.model.Add(submodel.activated <= self.submodels[i - 1].activated)
-                self.model.Add(
-                    sum(submodel.variables) <= sum(self.submodels[i - 1].variables)
+                self._enforce(
+                    self.model.Add(
+                        submodel.activated <= self.submodels[i - 1].activated
+                    )
+                )
+                # sum(submodel.variables) <= sum(self.submodels[i - 1].variables)
+                constraint = self.model.Proto().constraints.add()
+                constraint.enforcement_literal.extend(
+                    lit.Index() for lit in self._enforcement_literals
                 )
+                linear = constraint.linear
+                linear.vars.extend(submodel.variable_indices())
+                linear.vars.extend(self.submodels[i - 1].variable_indices())
+                linear.coeffs.extend([1] * submodel.n_variables)
+                linear.coeffs.extend([-1] * submodel.n_variables)
+                linear.domain.extend([-submodel.n_variables, 0])
+
+    def add_neighborhood(
+        self,
+        initial_solution: typing.List[Configuration],
+        missing_tuple_ids: np.ndarray,
+        independent_tuples: np.ndarray,
+        timer: Timer,
+    ):
+        """
+        Fills the model for optimizing a neighborhood: Break the symmetries with
+        the independent tuples, hint the initial solution, and enforce the
+        missing tuples (all as packed tuple ids).
+        """
+        self.log.info("Using %d tuples to break symmetries.", len(independent_tuples))
+        self.break_symmetries(independent_tuples)
+        timer.check()
+        self.set_initial_solution(initial_solution)
+        for i, t in enumerate(missing_tuple_ids.tolist()):
+            if i % 1000 == 0:
+                timer.check()
+            self.enforce_tuple_id(t)
+        self.solver.parameters.num_search_workers = (
+            self._solver_profile.get_num_workers(
+                len(missing_tuple_ids), max_workers=self._max_workers
+            )
+        )
 
     def is_feasible(self) -> bool:
         """
@@ -147,30 +242,30 @@ class VectorizedEdgeModel:
         """
         return self.status == cp_model.OPTIMAL or self.status == cp_model.FEASIBLE
 
-    def set_initial_solution(self, solution: typing.List[typing.Dict[int, bool]]):
+    def set_initial_solution(self, solution: typing.List[Configuration]):
         """
         Set an initial solution, potentially speeding up the optimization process.
         """
         solution = list(solution)
-        for t, i in self._symmetry_breaking_tuples.items():
-            t: TupleIndex
+        for t_id, i in self._symmetry_breaking_tuples.items():
+            (t_i, t_i_pos), (t_j, t_j_pos) = tuple_from_id(t_id)
             sol = None
             for sol_ in solution:
-                if sol_.get(t.i, False) == t.i_pos and sol_.get(t.j, False) == t.j_pos:
+                if sol_.get(t_i, False) == t_i_pos and sol_.get(t_j, False) == t_j_pos:
                     sol = sol_
                     break
             assert sol is not None
 
             self.submodels[i].set_hint(sol)
             solution.remove(sol)
-        solution.sort(key=lambda d: sum(d.values()), reverse=True)
+        solution.sort(key=lambda c: c.num_true(), reverse=True)
 
-        submods = self.submodels[len(self._symmetry_breaking_tuples) :]
+        submods = self.submodels[len(self._symmetry_breaking_tuples) : self.k]
         assert len(solution) <= len(submods)
         if len(solution) < len(submods):
             self.log.warning(
                 "Unnecessary large k (%d). Initial solution is smaller (%d).",
-                len(self.submodels),
+                self.k,
                 len(solution) + len(self._symmetry_breaking_tuples),
             )
         for conf, submod in zip(solution, submods):
@@ -190,23 +285,88 @@ class VectorizedEdgeModel:
         Returns true if a feasible solution has been found.
         """
         self.solver.parameters.max_time_in_seconds = timelimit
+        self.log.info(
+            "Using %d threads for search.", self.solver.parameters.num_search_workers
+        )
         self.status = self.solver.Solve(self.model)
         return self.is_feasible()
 
-    def get_solution(self) -> typing.Iterable[typing.Dict[int, bool]]:
+    def get_solution(self) -> typing.Iterable[Configuration]:
         """
         Return the best solution. Requires a successful optimization before.
         """
         if not self.is_feasible():
             msg = "Cannot access solution without solving the model."
             raise ValueError(msg)
+        solution = list(self.solver.ResponseProto().solution)
         for submodel in self.submodels:
             if self.solver.Value(submodel.activated):
-                yield submodel.get_configuration(self.solver)
+                yield submodel.get_configuration(solution)
 
     def enforce_tuple(self, edge_index: TupleIndex):
         """
         Enforce a tuple to be covered by one of the configurations in the solution.
         """
-        vars = [submodel.get_tuple_variable(edge_index) for submodel in self.submodels]
-        self.model.AddBoolOr(vars)
+        self.enforce_tuple_id(edge_index.to_id())
+
+    def enforce_tuple_id(self, edge_id: int):
+        """
+        Enforce a tuple, given as packed tuple id, to be covered by one of the
+        configurations in the solution.
+        """
+        vars = [
+            submodel.get_tuple_variable(edge_id)
+            for submodel in self.submodels[: self.k]
+        ]
+        self._enforce(self.model.AddBoolOr(vars))
+
+
+class ReusableEdgeModel(VectorizedEdgeModel):
+    """
+    A VectorizedEdgeModel that is kept alive over multiple neighborhoods with up
+    to `capacity` configurations, such that the k copies of the base model only
+    have to be built once. Everything that is specific to a neighborhood (tuples
+    to cover, symmetry breaking, hints) is only enforced by a literal of the
+    neighborhood, which is assumed to be true while optimizing it. Unused
+    configurations are deactivated by assumptions. The tuple variables stay in
+    the model, as their definition does not depend on the neighborhood.
+    The constraints of previous neighborhoods are not removed, so the model
+    should be rebuilt after some neighborhoods (see `num_neighborhoods`).
+    """
+
+    def __init__(
+        self,
+        instance: IndexInstance,
+        capacity: int,
+        timer: Timer,
+        logger: logging.Logger,
+        verbose=True,
+        num_workers: typing.Optional[int] = None,
+        solver_profile: typing.Optional[SolverProfile] = None,
+    ):
+        super().__init__(
+            instance, capacity, timer, logger, verbose, num_workers, solver_profile
+        )
+        self.capacity = capacity
+        self.num_neighborhoods = 0
+
+    def begin_neighborhood(self, k: int):
+        """
+        Starts a new neighborhood with up to k configurations. Afterwards, the
+        model can be filled as a new VectorizedEdgeModel.
+        """
+        if k > self.capacity:
+            msg = f"The model only supports up to {self.capacity} configurations."
+            raise ValueError(msg)
+        self.num_neighborhoods += 1
+        self.k = k
+        self.status = None
+        self._symmetry_breaking_tuples = {}
+        neighborhood = self.model.NewBoolVar(f"NBRHD[{self.num_neighborhoods}]")
+        self._enforcement_literals = [neighborhood]
+        self.model.ClearHints()
+        self.model.ClearAssumptions()
+        self.model.AddAssumptions(
+            [neighborhood]
+            + [submodel.activated.Not() for submodel in self.submodels[k:]]
+        )
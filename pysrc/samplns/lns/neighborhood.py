@@ -8,7 +8,16 @@ import logging
 import random
 import typing
 
+import numpy as np
+
 from ..preprocessor import IndexInstance
+from ..utils import (
+    TUPLE_ID_DTYPE,
+    Configuration,
+    sample_to_array,
+    tuple_ids_from_tuples,
+    tuple_ids_to_tuples,
+)
 from .coverage_set import CoverageSet
 
 _logger = logging.getLogger("SampLNS")
@@ -19,25 +28,56 @@ class Neighborhood:
     Neighborhood for the LNS. Defines the fixed and relaxed part. Our implementation
     also requires an initial solution, so it also contains an initial solution
     for the relaxed part.
+    The missing tuples can be given as list of `((i, i_val), (j, j_val))` or as
+    array of packed tuple ids (see `samplns.utils.tuple_id`). Internally, only the
+    tuple ids are used.
     """
 
     def __init__(
         self,
-        fixed_samples: typing.List[typing.Dict[int, bool]],
-        missing_tuples: typing.List[
-            typing.Tuple[typing.Tuple[int, bool], typing.Tuple[int, bool]]
+        fixed_samples: typing.List[Configuration],
+        missing_tuples: typing.Union[
+            typing.List[typing.Tuple[typing.Tuple[int, bool], typing.Tuple[int, bool]]],
+            np.ndarray,
         ],
-        initial_solution: typing.List[typing.Dict[int, bool]],
+        initial_solution: typing.List[Configuration],
     ):
         self.fixed_samples = fixed_samples  # the fixed part of the solution
         self.missing_tuples = missing_tuples  # the free part of the solution
         # an initial solution to cover the free part
         self.initial_solution = initial_solution
 
+    @property
+    def missing_tuple_ids(self) -> np.ndarray:
+        """
+        The missing tuples as packed tuple ids.
+        """
+        return self._missing_tuple_ids
+
+    @property
+    def missing_tuples(
+        self,
+    ) -> typing.List[typing.Tuple[typing.Tuple[int, bool], typing.Tuple[int, bool]]]:
+        """
+        The missing tuples as list of `((i, i_val), (j, j_val))` with `i < j`.
+        """
+        if self._missing_tuples is None:
+            self._missing_tuples = tuple_ids_to_tuples(self._missing_tuple_ids)
+        return self._missing_tuples
+
+    @missing_tuples.setter
+    def missing_tuples(self, missing_tuples):
+        if isinstance(missing_tuples, np.ndarray):
+            self._missing_tuple_ids = missing_tuples.astype(TUPLE_ID_DTYPE, copy=False)
+            self._missing_tuples = None
+        else:
+            self._missing_tuple_ids = tuple_ids_from_tuples(missing_tuples)
+            self._missing_tuples = None  # decode again to get the ordered tuples
+
     def full_solution(
         self,
-        relaxed_solution: typing.Optional[typing.List[typing.Dict[int, bool]]] = None,
-    ) -> typing.List[typing.Dict[int, bool]]:
+        relaxed_solution: typing.Optional[typing.List[Configuration]] = None,
+    ) -> typing.List[Configuration]:
         """
         Returns the full solution the underlies this neighborhood.
         """
@@ -61,14 +101,14 @@ class NeighborhoodSelector(abc.ABC):
     def setup(
         self,
         instance: IndexInstance,
-        initial_solution: typing.List[typing.Dict[int, bool]],
+        initial_solution: typing.List[Configuration],
     ):
         """
         Called at the beginning. Use as a second constructor.
         """
 
     @abc.abstractmethod
-    def add_solution(self, solution: typing.List[typing.Dict[int, bool]]):
+    def add_solution(self, solution: typing.List[Configuration]):
         """
         Used by the solver to notify you about new solutions.
         """
@@ -79,6 +119,14 @@ class NeighborhoodSelector(abc.ABC):
         Return the next neighborhood.
         """
 
+    def next_batch(self, n: int) -> typing.List[Neighborhood]:
+        """
+        Return n neighborhoods of the current best solution that are optimized
+        concurrently. Improvements of overlapping neighborhoods can only be
+        combined partially, so they should free disjoint configurations if possible.
+        """
+        return [self.next() for _ in range(n)]
+
     @abc.abstractmethod
     def feedback(
         self,
@@ -92,6 +140,29 @@ class NeighborhoodSelector(abc.ABC):
         the previous.
         """
 
+    def feedback_batch(
+        self,
+        on_neighborhoods: typing.List[Neighborhood],
+        bounds: typing.List[typing.Tuple[int, int]],  # (lb, ub) per neighborhood
+        time_utilization: float,
+    ):
+        """
+        Feedback on a batch of neighborhoods optimized concurrently, given once
+        per iteration, such that the adaptation does not depend on the size of
+        the batch. By default, a single feedback with the summed bounds on the
+        largest neighborhood, i.e., optimal iff all are optimal.
+        """
+        largest = max(
+            range(len(on_neighborhoods)),
+            key=lambda i: len(on_neighborhoods[i].initial_solution),
+        )
+        self.feedback(
+            on_neighborhoods[largest],
+            ub=sum(ub for _, ub in bounds),
+            lb=sum(lb for lb, _ in bounds),
+            time_utilization=time_utilization,
+        )
+
 
 class RandomNeighborhood(NeighborhoodSelector):
     """
@@ -113,41 +184,86 @@ class RandomNeighborhood(NeighborhoodSelector):
         self.best_solution = None
         self.incr_factor = incr_factor
         self.decr_factor = decr_factor
+        # the concrete features of the best solution as array (one row per configuration)
+        self._best_solution_array = None
+        # rows of the best solution that are currently not covered
+        self._uncovered = []
 
     def setup(
         self,
         instance: IndexInstance,
-        initial_solution: typing.List[typing.Dict[int, bool]],
+        initial_solution: typing.List[Configuration],
     ):
         self.log.info("Setting up random neighborhood selector.")
         self.instance = instance
         self.best_solution = initial_solution
+        self._best_solution_array = sample_to_array(
+            initial_solution, range(instance.n_concrete)
+        )
         self.coverage_set = CoverageSet(
-            initial_solution, instance.n_concrete, logger=self.log
+            self._best_solution_array, instance.n_concrete, logger=self.log
         )
         self.n_interactions = len(self.coverage_set)
+        self._cover_best_solution()
         self.log.info("Neighborhood selector is ready.")
 
-    def add_solution(self, solution: typing.List[typing.Dict[int, bool]]):
+    def _cover_best_solution(self):
+        """
+        Let the coverage set count the full best solution.
+        """
+        self.coverage_set.clear()
+        for conf in self._best_solution_array:
+            self.coverage_set.cover(conf)
+        self._uncovered = []
+
+    def add_solution(self, solution: typing.List[Configuration]):
         if self.best_solution is None or len(solution) < len(self.best_solution):
             assert all(self.instance.is_fully_defined(conf) for conf in solution)
             self.best_solution = solution
+            self._best_solution_array = sample_to_array(
+                solution, range(self.instance.n_concrete)
+            )
+            self._cover_best_solution()
 
     def next(self) -> Neighborhood:
-        initial_solution = list(self.best_solution)
-        fixed_samples = []
-        self.coverage_set.clear()
+        return self._next(excluded=())
 
-        while True:
-            # print("num_missing", coverage_set.num_missing())
-            if self.coverage_set.num_missing() < self.n:
+    def next_batch(self, n: int) -> typing.List[Neighborhood]:
+        neighborhoods = []
+        used = set()
+        for _ in range(n):
+            neighborhoods.append(self._next(excluded=used))
+            used.update(self._uncovered)
+        return neighborhoods
+
+    def _next(self, excluded: typing.Collection[int]) -> Neighborhood:
+        """
+        Selects a random neighborhood. The configurations in `excluded` are only
+        freed if all others have been freed before.
+        """
+        # Restore the coverage of the full best solution.
+        for i in self._uncovered:
+            self.coverage_set.cover(self._best_solution_array[i])
+        fixed = [i for i in range(len(self.best_solution)) if i not in excluded]
+        random.shuffle(fixed)
+        fixed = list(excluded) + fixed  # the last ones are freed first
+        free = []
+
+        # Free random configurations as long as less than n tuples are missing.
+        while fixed:
+            to_free = self._best_solution_array[fixed[-1]]
+            self.coverage_set.uncover(to_free)
+            if self.coverage_set.num_missing() >= self.n:
+                self.coverage_set.cover(to_free)
                 break
-            to_fix = random.sample(initial_solution, 1)[0]
-            initial_solution.remove(to_fix)
-            self.coverage_set.cover(to_fix)
-            fixed_samples.append(to_fix)
-        free_tuples = list(self.coverage_set.missing_tuples())
-        return Neighborhood(fixed_samples, free_tuples, initial_solution)
+            free.append(fixed.pop())
+        self._uncovered = free
+        free_tuples = self.coverage_set.missing_tuple_ids()
+        return Neighborhood(
+            [self.best_solution[i] for i in fixed],
+            free_tuples,
+            [self.best_solution[i] for i in free],
+        )
 
     def feedback(
         self, on_neighborhood: Neighborhood, ub: int, lb: int, time_utilization: float
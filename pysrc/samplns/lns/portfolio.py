@@ -0,0 +1,203 @@
+"""
+Optimizing multiple neighborhoods concurrently in worker processes.
+CP-SAT releases the GIL, but building the models does not, so every
+neighborhood is optimized in its own process.
+"""
+import logging
+import multiprocessing
+import typing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+
+from ..preprocessor import IndexInstance
+from ..utils import Configuration, sample_to_array
+from ..utils.cpu import available_cpus
+from ..utils.timer import Timer
+from ._coverage_set import CoveredTuples
+from .model import VectorizedEdgeModel
+from .neighborhood import Neighborhood
+from .solver_profile import SolverProfile
+
+_logger = logging.getLogger("SampLNS")
+
+# The state of the worker process, i.e., the instance, set by `_init_worker`.
+_worker_state: typing.Dict[str, IndexInstance] = {}
+
+
+def _init_worker(instance: IndexInstance):
+    _worker_state["instance"] = instance
+
+
+def _solve_neighborhood(
+    initial_solution: typing.List[Configuration],
+    missing_tuple_ids: np.ndarray,
+    independent: np.ndarray,
+    timelimit: float,
+    num_workers: typing.Optional[int],
+    solver_profile: typing.Optional[SolverProfile],
+) -> typing.Tuple[int, typing.Optional[typing.List[Configuration]], bool]:
+    """
+    Builds and solves the model of a neighborhood in the worker process.
+    Returns the lower bound, the new solution for the free part of the
+    neighborhood (if one was found), and if the model could be built in time.
+    """
+    assert "instance" in _worker_state, "Worker has not been initialized."
+    timer = Timer(timelimit)
+    built = False
+    try:
+        model = VectorizedEdgeModel(
+            _worker_state["instance"],
+            len(initial_solution),
+            timer,
+            logger=_logger,
+            verbose=False,
+            num_workers=num_workers,
+            solver_profile=solver_profile,
+        )
+        model.add_neighborhood(initial_solution, missing_tuple_ids, independent, timer)
+        built = True
+        model.optimize(max(1.0, timer.remaining()))
+    except TimeoutError:
+        return 1, None, built
+    if model.is_feasible():
+        return model.get_lb(), list(model.get_solution()), True
+    return model.get_lb(), None, True
+
+
+class NeighborhoodPortfolio:
+    """
+    A pool of worker processes that optimize neighborhoods concurrently.
+    Use it as a context manager to start and stop the workers.
+    """
+
+    def __init__(
+        self,
+        instance: IndexInstance,
+        num_neighborhoods: int,
+        workers_per_neighborhood: typing.Optional[int] = None,
+        solver_profile: typing.Optional[SolverProfile] = None,
+    ):
+        """
+        instance: The instance, sent once to every worker process.
+        num_neighborhoods: Number of neighborhoods optimized at the same time.
+        workers_per_neighborhood: Number of CP-SAT workers per neighborhood. By
+            default, the available threads are split evenly.
+        solver_profile: The CP-SAT parameters for every neighborhood.
+        """
+        if num_neighborhoods < 1:
+            msg = "Need at least one neighborhood per batch."
+            raise ValueError(msg)
+        self.instance = instance
+        self.num_neighborhoods = num_neighborhoods
+        if workers_per_neighborhood is None:
+            workers_per_neighborhood = max(
+                1, (available_cpus() - 1) // num_neighborhoods
+            )
+        self.workers_per_neighborhood = workers_per_neighborhood
+        self.solver_profile = solver_profile
+        self._executor: typing.Optional[ProcessPoolExecutor] = None
+        self._futures: typing.List[Future] = []
+
+    def __enter__(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_neighborhoods,
+            # fork is unsafe with the threads of CP-SAT
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.instance,),
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        assert self._executor is not None
+        # `shutdown(cancel_futures=True)` needs Python 3.9
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def solve(
+        self,
+        tasks: typing.List[typing.Tuple[Neighborhood, np.ndarray]],
+        timelimit: float,
+    ) -> typing.List[
+        typing.Tuple[int, typing.Optional[typing.List[Configuration]], bool]
+    ]:
+        """
+        Optimizes the neighborhoods with their independent tuples concurrently.
+        Returns lower bound, new free solution (or None), and if the model could
+        be built for every task.
+        """
+        if self._executor is None:
+            msg = "The portfolio has to be entered before solving."
+            raise RuntimeError(msg)
+        self._futures = [
+            self._executor.submit(
+                _solve_neighborhood,
+                neighborhood.initial_solution,
+                neighborhood.missing_tuple_ids,
+                independent,
+                timelimit,
+                self.workers_per_neighborhood,
+                self.solver_profile,
+            )
+            for neighborhood, independent in tasks
+        ]
+        return [future.result() for future in self._futures]
+
+
+def _replace(
+    solution: typing.List[Configuration],
+    removed: typing.List[Configuration],
+    added: typing.List[Configuration],
+) -> typing.Optional[typing.List[Configuration]]:
+    """
+    Replaces the removed configurations of the solution by the added ones.
+    Returns None if a removed configuration is not part of the solution.
+    """
+    remaining = list(solution)
+    for conf in removed:
+        try:
+            remaining.remove(conf)
+        except ValueError:
+            return None
+    return remaining + added
+
+
+def merge_improvements(
+    solution: typing.List[Configuration],
+    improvements: typing.List[typing.Tuple[Neighborhood, typing.List[Configuration]]],
+    n_concrete: int,
+) -> typing.List[Configuration]:
+    """
+    Combines the improvements of neighborhoods of the same solution, starting
+    with the largest one. Further improvements are only applied if their free
+    configurations are still part of the combined solution and it still covers
+    the same tuples as the original solution.
+    """
+    improvements = sorted(
+        improvements,
+        key=lambda improvement: len(improvement[0].initial_solution)
+        - len(improvement[1]),
+        reverse=True,
+    )
+    features = range(n_concrete)
+    coverage = None
+    merged = solution
+    for neighborhood, samples in improvements:
+        candidate = _replace(merged, neighborhood.initial_solution, samples)
+        if candidate is None:
+            continue
+        if merged is not solution:
+            if coverage is None:
+                coverage = CoveredTuples(
+                    sample_to_array(solution, features), n_concrete
+                )
+            covered = CoveredTuples(sample_to_array(candidate, features), n_concrete)
+            if covered != coverage:
+                _logger.info("Could not merge improvement of overlapping neighborhood.")
+                continue
+        merged = candidate
+    return merged
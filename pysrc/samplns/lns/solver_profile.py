@@ -0,0 +1,102 @@
+"""
+Profiles for the parameters of CP-SAT when optimizing neighborhoods.
+"""
+import math
+import typing
+from dataclasses import dataclass
+
+from ..utils.cpu import available_cpus
+
+
+@dataclass
+class SolverProfile:
+    """
+    Parameters of CP-SAT for optimizing a neighborhood. Unset (None) parameters
+    keep the default of CP-SAT.
+    """
+
+    # Fixed number of workers. By default, all available CPUs (respecting cgroup
+    # quotas) except for `reserved_threads`.
+    num_workers: typing.Optional[int] = None
+    # Threads left for the rest, in particular the asynchronous CDS computation.
+    reserved_threads: int = 1
+    # Scale the workers with the neighborhood: one worker per this many tuples
+    # to cover, but at least `min_workers`. Small neighborhoods gain little
+    # from many workers.
+    tuples_per_worker: typing.Optional[int] = None
+    min_workers: int = 1
+    # The subsolvers of the workers, e.g., ["default_lp", "max_lp", "core"].
+    subsolvers: typing.Optional[typing.List[str]] = None
+    linearization_level: typing.Optional[int] = None
+    cp_model_presolve: typing.Optional[bool] = None
+    max_presolve_iterations: typing.Optional[int] = None
+
+    def get_num_workers(
+        self,
+        num_tuples: typing.Optional[int] = None,
+        max_workers: typing.Optional[int] = None,
+    ) -> int:
+        """
+        The number of workers for a neighborhood with `num_tuples` tuples to
+        cover (unknown if None), limited to `max_workers`.
+        """
+        if self.num_workers is not None:
+            workers = self.num_workers
+        else:
+            workers = available_cpus() - self.reserved_threads
+        if max_workers is not None:
+            workers = min(workers, max_workers)
+        if self.tuples_per_worker is not None and num_tuples is not None:
+            needed = math.ceil(num_tuples / self.tuples_per_worker)
+            workers = min(workers, max(self.min_workers, needed))
+        return max(1, workers)
+
+    def apply(self, parameters) -> None:
+        """
+        Sets the parameters, except for the number of workers, on the
+        `SatParameters` of a `CpSolver`.
+        """
+        if self.subsolvers is not None:
+            parameters.subsolvers.extend(self.subsolvers)
+        if self.linearization_level is not None:
+            parameters.linearization_level = self.linearization_level
+        if self.cp_model_presolve is not None:
+            parameters.cp_model_presolve = self.cp_model_presolve
+        if self.max_presolve_iterations is not None:
+            parameters.max_presolve_iterations = self.max_presolve_iterations
+
+
+SOLVER_PROFILES: typing.Dict[str, SolverProfile] = {
+    # All but one CPU, as before.
+    "default": SolverProfile(),
+    # Leave more room for other processes on the same machine.
+    "shared": SolverProfile(reserved_threads=2),
+    # Fewer workers for small neighborhoods.
+    "adaptive": SolverProfile(tuples_per_worker=500, min_workers=2),
+    # Cheap presolve and no LP relaxation. Good for many small neighborhoods.
+    "light": SolverProfile(
+        tuples_per_worker=500,
+        min_workers=2,
+        linearization_level=0,
+        max_presolve_iterations=1,
+    ),
+    # Stronger LP relaxation for proving lower bounds of large neighborhoods.
+    "thorough": SolverProfile(linearization_level=2),
+}
+
+
+def get_solver_profile(
+    profile: typing.Union[str, SolverProfile, None]
+) -> SolverProfile:
+    """
+    Returns the profile of the given name (see `SOLVER_PROFILES`). Profiles are
+    passed through, None is the default profile.
+    """
+    if profile is None:
+        return SOLVER_PROFILES["default"]
+    if isinstance(profile, SolverProfile):
+        return profile
+    if profile not in SOLVER_PROFILES:
+        msg = f"Unknown solver profile '{profile}'. Available: {', '.join(SOLVER_PROFILES)}."
+        raise ValueError(msg)
+    return SOLVER_PROFILES[profile]
@@ -6,7 +6,8 @@ index_instance = Preprocessor().preprocess(instance)
 ```
 """
 # flake8: noqa F401
+from .clauses import ClauseStore
 from .index_instance import IndexInstance
 from .preprocessing import Preprocessor
 
-__all__ = ["Preprocessor", "IndexInstance"]
+__all__ = ["Preprocessor", "IndexInstance", "ClauseStore"]
@@ -0,0 +1,112 @@
+"""
+The rules of an index instance in CNF as flat arrays (CSR): the literals of
+clause i are `literals[offsets[i]:offsets[i+1]]`. A literal is the index of its
+variable or, if negated, `-index-1` (as in CP-SAT and `BaseModelTemplate`).
+"""
+import typing
+
+import numpy as np
+
+from ..instances import OR, VAR, SatNode
+
+LITERAL_DTYPE = np.int64
+
+
+class ClauseStore:
+    """
+    An immutable list of clauses as literal and offset arrays. Compared to
+    `OR`/`VAR` objects, it needs a fraction of the memory, and checking an
+    assignment is a few array operations.
+    """
+
+    def __init__(
+        self,
+        literals: typing.Union[np.ndarray, typing.Sequence[int]],
+        offsets: typing.Union[np.ndarray, typing.Sequence[int]],
+    ):
+        self.literals = np.asarray(literals, dtype=LITERAL_DTYPE)
+        self.offsets = np.asarray(offsets, dtype=LITERAL_DTYPE)
+        if (
+            self.literals.ndim != 1
+            or self.offsets.ndim != 1
+            or len(self.offsets) == 0
+            or self.offsets[0] != 0
+            or self.offsets[-1] != len(self.literals)
+        ):
+            msg = "Offsets have to start at 0 and end at the number of literals."
+            raise ValueError(msg)
+        if (np.diff(self.offsets) <= 0).any():
+            msg = "Clauses must not be empty."
+            raise ValueError(msg)
+        self.literals.flags.writeable = False
+        self.offsets.flags.writeable = False
+        self._variables: typing.Optional[np.ndarray] = None
+
+    @staticmethod
+    def from_rules(rules: typing.Iterable[SatNode]) -> "ClauseStore":
+        """
+        Converts rules in CNF, i.e., `OR`s of `VAR`s or single `VAR`s over
+        integer labels.
+        """
+        literals: typing.List[int] = []
+        offsets = [0]
+        for rule in rules:
+            elements = rule.elements if isinstance(rule, OR) else [rule]
+            for lit in elements:
+                if not isinstance(lit, VAR) or not isinstance(lit.var_name, int):
+                    msg = "Rule is not in CNF!"
+                    raise ValueError(msg)
+                literals.append(-lit.var_name - 1 if lit.negated else lit.var_name)
+            offsets.append(len(literals))
+        return ClauseStore(literals, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.literals[self.offsets[i] : self.offsets[i + 1]]
+
+    def __iter__(self) -> typing.Iterator[np.ndarray]:
+        return (self[i] for i in range(len(self)))
+
+    def variables(self) -> np.ndarray:
+        """
+        The sorted indices of the variables that occur in the clauses.
+        """
+        if self._variables is None:
+            self._variables = np.unique(self._variable_per_literal())
+        return self._variables
+
+    def _variable_per_literal(self) -> np.ndarray:
+        return np.where(self.literals >= 0, self.literals, -self.literals - 1)
+
+    def to_rules(self) -> typing.List[SatNode]:
+        """
+        The clauses as `OR`s, or `VAR`s for single literals.
+        """
+        rules: typing.List[SatNode] = []
+        for clause in self:
+            lits = [
+                VAR(int(lit)) if lit >= 0 else VAR(int(-lit - 1), True)
+                for lit in clause
+            ]
+            rules.append(lits[0] if len(lits) == 1 else OR(*lits))
+        return rules
+
+    def is_satisfied(self, values: np.ndarray) -> bool:
+        """
+        Checks if the values of the variables (indexed by variable) satisfy
+        all clauses.
+        """
+        if not len(self):
+            return True
+        lit_values = values[self._variable_per_literal()].astype(bool)
+        lit_values ^= self.literals < 0
+        return bool(np.logical_or.reduceat(lit_values, self.offsets[:-1]).all())
+
+    def to_json_data(self):
+        return {"literals": self.literals.tolist(), "offsets": self.offsets.tolist()}
+
+    @staticmethod
+    def from_json_data(json_data) -> "ClauseStore":
+        return ClauseStore(json_data["literals"], json_data["offsets"])
@@ -1,19 +1,210 @@
+"""
+Converts the rules of an instance to CNF with a Tseitin-style encoding:
+- Every non-clausal subformula gets an auxiliary variable, but structurally equal
+  subformulas share it (an `AND` is hashed as the negated `OR` of its negated
+  elements, such that also a formula and its negation share one).
+- Only the directions of the definition that are needed for the polarity in
+  which a subformula occurs are added (Plaisted-Greenbaum).
+- Duplicate, tautological, and subsumed clauses are removed.
+"""
 import logging
+import typing
 
-from ..instances import AND, Instance
+from ..instances import AND, EQ, IMPL, OR, VAR, Instance, SatNode, VariableLabel
+
+# Polarities in which a subformula occurs, i.e., which directions of the
+# definition of its literal `l` are needed.
+_POSITIVE = 1  # l -> formula
+_NEGATIVE = 2  # formula -> l
+_BOTH = _POSITIVE | _NEGATIVE
+
+Clause = typing.Tuple[int, ...]
+
+
+def _flip(polarity: int) -> int:
+    return ((polarity & _POSITIVE) << 1) | ((polarity & _NEGATIVE) >> 1)
+
+
+class CnfEncoder:
+    """
+    Encodes formulas as clauses over integer literals (`i` and `-i` for the i-th
+    variable, starting at 1). Use `add_rule` for all rules and `get_clauses` for
+    the result.
+    """
+
+    def __init__(self):
+        self._variables: typing.Dict[VariableLabel, int] = {}
+        self._labels: typing.List[VAR] = []  # the variable of literal i at i-1
+        self._gates: typing.Dict[tuple, typing.Tuple[int, int]] = {}
+        self._nodes: typing.Dict[int, typing.Tuple[SatNode, int, int]] = {}
+        self._clauses: typing.List[Clause] = []
+        self.num_auxiliary = 0
+
+    def _variable(self, var: VAR) -> int:
+        if var.var_name not in self._variables:
+            self._labels.append(VAR(var.var_name, auxiliary=var.auxiliary))
+            self._variables[var.var_name] = len(self._labels)
+        return self._variables[var.var_name]
+
+    def _auxiliary(self) -> int:
+        self._labels.append(VAR.create_auxiliary())
+        self.num_auxiliary += 1
+        return len(self._labels)
+
+    def add_rule(self, rule: SatNode) -> None:
+        """
+        Adds the clauses that enforce the rule.
+        """
+        stack = [rule]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, AND):
+                stack.extend(node.elements)
+            elif isinstance(node, OR):
+                self._clauses.append(
+                    tuple(self._encode(e, _POSITIVE) for e in node.elements)
+                )
+            elif isinstance(node, IMPL):
+                stack.append(OR(node.condition.NEG(), node.implication))
+            elif isinstance(node, EQ):
+                a = self._encode(node.a, _BOTH)
+                b = self._encode(node.b, _BOTH)
+                self._clauses += [(-a, b), (a, -b)]
+            else:
+                self._clauses.append((self._encode(node, _POSITIVE),))
+
+    def _encode(self, node: SatNode, polarity: int) -> int:
+        """
+        Returns a literal that is equivalent to the node in the given polarity.
+        """
+        if isinstance(node, VAR):
+            variable = self._variable(node)
+            return -variable if node.negated else variable
+        if id(node) in self._nodes:
+            _, literal, done = self._nodes[id(node)]
+            if polarity & ~done == 0:
+                return literal
+        if isinstance(node, OR):
+            literals = [self._encode(e, polarity) for e in node.elements]
+            literal = self._or_gate(literals, polarity)
+        elif isinstance(node, AND):
+            literals = [-self._encode(e, polarity) for e in node.elements]
+            literal = -self._or_gate(literals, _flip(polarity))
+        elif isinstance(node, IMPL):
+            literals = [
+                -self._encode(node.condition, _flip(polarity)),
+                self._encode(node.implication, polarity),
+            ]
+            literal = self._or_gate(literals, polarity)
+        elif isinstance(node, EQ):
+            a = self._encode(node.a, _BOTH)
+            b = self._encode(node.b, _BOTH)
+            literal = self._eq_gate(a, b, polarity)
+        else:
+            msg = f"Unknown rule {node}."
+            raise ValueError(msg)
+        done = self._nodes[id(node)][2] if id(node) in self._nodes else 0
+        # keep the node alive, such that its id is not reused
+        self._nodes[id(node)] = (node, literal, done | polarity)
+        return literal
+
+    def _gate(self, key: tuple, polarity: int) -> typing.Tuple[int, int]:
+        """
+        Returns the auxiliary variable for the key and the directions of its
+        definition that still have to be added.
+        """
+        variable, done = self._gates.get(key, (0, 0))
+        if not variable:
+            variable = self._auxiliary()
+        self._gates[key] = (variable, done | polarity)
+        return variable, polarity & ~done
+
+    def _or_gate(self, literals: typing.List[int], polarity: int) -> int:
+        literals = sorted(set(literals))
+        if len(literals) == 1:
+            return literals[0]
+        x, missing = self._gate(("OR", *literals), polarity)
+        if missing & _POSITIVE:
+            self._clauses.append((-x, *literals))
+        if missing & _NEGATIVE:
+            self._clauses += [(x, -lit) for lit in literals]
+        return x
+
+    def _eq_gate(self, a: int, b: int, polarity: int) -> int:
+        # a == b is equal to -a == -b and to -(-a == b)
+        sign = -1 if (a < 0) != (b < 0) else 1
+        a, b = sorted((abs(a), abs(b)))
+        if sign < 0:
+            polarity = _flip(polarity)
+        x, missing = self._gate(("EQ", a, b), polarity)
+        if missing & _POSITIVE:
+            self._clauses += [(-x, -a, b), (-x, a, -b)]
+        if missing & _NEGATIVE:
+            self._clauses += [(x, a, b), (x, -a, -b)]
+        return sign * x
+
+    def get_clauses(self) -> typing.List[SatNode]:
+        """
+        The clauses without duplicates, tautologies, and subsumed clauses, as
+        `OR`s or, for single literals, `VAR`s.
+        """
+        clauses = _simplify(self._clauses)
+        rules: typing.List[SatNode] = []
+        for clause in clauses:
+            literals = [self._to_var(lit) for lit in clause]
+            rules.append(literals[0] if len(literals) == 1 else OR(*literals))
+        return rules
+
+    def _to_var(self, literal: int) -> VAR:
+        var = self._labels[abs(literal) - 1]
+        return VAR(var.var_name, literal < 0, var.auxiliary)
+
+
+def _simplify(clauses: typing.Iterable[Clause]) -> typing.List[Clause]:
+    """
+    Removes duplicate literals, tautologies, duplicates, and subsumed clauses,
+    keeping the order of the remaining clauses.
+    """
+    unique: typing.Dict[Clause, None] = {}
+    for clause in clauses:
+        literals = set(clause)
+        if any(-lit in literals for lit in literals):
+            continue
+        unique.setdefault(tuple(sorted(literals)), None)
+    result = list(unique)
+    occurrences: typing.Dict[int, typing.List[int]] = {}
+    for i, clause in enumerate(result):
+        for literal in clause:
+            occurrences.setdefault(literal, []).append(i)
+    removed = [False] * len(result)
+    # A clause can only be subsumed by a shorter one (duplicates are removed).
+    for i in sorted(range(len(result)), key=lambda i: len(result[i])):
+        if removed[i]:
+            continue
+        clause = result[i]
+        literals = set(clause)
+        rarest = min(clause, key=lambda lit: len(occurrences[lit]))
+        for j in occurrences[rarest]:
+            if (
+                not removed[j]
+                and len(result[j]) > len(clause)
+                and literals.issubset(result[j])
+            ):
+                removed[j] = True
+    return [clause for i, clause in enumerate(result) if not removed[i]]
 
 
 def to_cnf(instance: Instance, logger: logging.Logger):
     logger.info("Converting instance to CNF (%s).", str(instance))
-    rules = []
+    encoder = CnfEncoder()
     for rule in instance.rules:
-        rule = rule.to_cnf()
-        if isinstance(rule, AND):
-            for clause in rule.elements:
-                rules.append(clause)
-        else:
-            rules.append(rule)
+        encoder.add_rule(rule)
+    rules = encoder.get_clauses()
     cnf_instance = Instance(instance.features, instance.structure, rules)
     cnf_instance.instance_name = instance.instance_name + "|CNF"
-    logger.info("Finished converting instance to CNF (%s).", str(cnf_instance))
+    logger.info(
+        "Finished converting instance to CNF (%s, %d auxiliary variables).",
+        str(cnf_instance),
+        encoder.num_auxiliary,
+    )
     return cnf_instance
@@ -6,7 +6,15 @@ select at the same time.
 """
 import typing
 
-from ..instances import EQ, VAR, AndFeature, CompositeFeature, FeatureNode, Instance
+from ..instances import (
+    EQ,
+    VAR,
+    AndFeature,
+    CompositeFeature,
+    FeatureNode,
+    Instance,
+    substitute_all,
+)
 from .equivalence import EquivalenceClasses
 from .universe_mapping import UniverseMapping
 
@@ -70,7 +78,7 @@ class EqualityOptimizer:
             mapping.map(origin_element=key, target_element=val)
         for key, val in inverse.items():
             mapping.map(origin_element=key, target_element=val, inverse=True)
-        rules = [rule.substitute(direct, inverse) for rule in rules]
+        rules = substitute_all(rules, direct, inverse)
         struct = (
             instance.structure.substitute(direct, inverse)
             if instance.structure
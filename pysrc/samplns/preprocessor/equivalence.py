@@ -7,50 +7,77 @@ import pytest
 class EquivalenceClasses:
     """
     Saves which features are equivalent and provides unified substitutions
-    for the elements of equivalence classes.
+    for the elements of equivalence classes. The classes are a union-find
+    with path compression and union by rank, in which every label knows
+    whether it is inverse to its parent.
     """
 
     def __init__(self):
-        self._class = {}
-        self._class_counter = 1  # we use negative to indicate inverse.
-
-    def _merge(self, x: int, y: int):
-        if x == -y:
-            msg = "Trying to merge inverse!"
-            raise ValueError(msg)
-        for key, val in self._class.items():
-            if val == y:
-                self._class[key] = x
-            if val == -y:
-                self._class[key] = -x
+        self._parent: typing.Dict[str, str] = {}
+        self._inverse: typing.Dict[str, bool] = {}  # inverse to the parent?
+        self._rank: typing.Dict[str, int] = {}
+        # for the roots: are the labels equal to the root the inverse ones?
+        self._root_inverse: typing.Dict[str, bool] = {}
+
+    def _find(self, x: str) -> typing.Tuple[str, bool]:
+        """
+        Returns the root of the class of x and whether x is inverse to it.
+        """
+        path = []
+        while self._parent[x] != x:
+            path.append(x)
+            x = self._parent[x]
+        inverse = False
+        for y in reversed(path):  # compress the path, starting at the root
+            inverse ^= self._inverse[y]
+            self._inverse[y] = inverse
+            self._parent[y] = x
+        return x, inverse
+
+    def _add(self, x: str, root: str, inverse: bool):
+        self._parent[x] = root
+        self._inverse[x] = inverse
+        self._rank[x] = 0
+        if root == x:
+            self._root_inverse[x] = False
+        else:
+            self._rank[root] = max(self._rank[root], 1)
+
+    def _union(self, a: str, b: str, inverse: bool):
+        root_a, inverse_a = self._find(a)
+        root_b, inverse_b = self._find(b)
+        inverse ^= inverse_a ^ inverse_b  # relation of root_b to root_a
+        if root_a == root_b:
+            if inverse:
+                msg = "Trying to merge inverse!"
+                raise ValueError(msg)
+            return
+        # the substitutions of the class of a keep their direction
+        if self._rank[root_a] < self._rank[root_b]:
+            self._root_inverse[root_b] = self._root_inverse[root_a] ^ inverse
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._inverse[root_b] = inverse
+        del self._root_inverse[root_b]
+        if self._rank[root_a] == self._rank[root_b]:
+            self._rank[root_a] += 1
 
     def mark_equivalent(self, a: str, b: str, inverse: bool = False):
         """
         Mark two labels as equivalent (possibly inverse, i.e., a == not b).
         """
         a, b = min(a, b), max(a, b)
-        if a in self._class and b not in self._class:
-            if inverse:
-                self._class[b] = -self._class[a]
-            else:
-                self._class[b] = self._class[a]
-        elif b in self._class and a not in self._class:
-            if inverse:
-                self._class[a] = -self._class[b]
-            else:
-                self._class[a] = self._class[b]
-        elif a not in self._class and b not in self._class:
-            self._class_counter += 1
-            self._class[a] = self._class_counter
-            if inverse:
-                self._class[b] = -self._class_counter
-            else:
-                self._class[b] = self._class_counter
+        if a not in self._parent and b not in self._parent:
+            self._add(a, a, False)
+            self._add(b, a, inverse)
+        elif b not in self._parent:
+            root, inverse_a = self._find(a)
+            self._add(b, root, inverse_a ^ inverse)
+        elif a not in self._parent:
+            root, inverse_b = self._find(b)
+            self._add(a, root, inverse_b ^ inverse)
         else:
-            if inverse:
-                self._merge(self._class[a], -self._class[b])
-            else:
-                self._merge(self._class[a], self._class[b])
+            self._union(a, b, inverse)
 
     def get_substitutions(
         self,
@@ -61,13 +88,14 @@ class EquivalenceClasses:
         direct_subs = {}
         inverse_subs = {}
         subst = {}
-        for key, val in self._class.items():
-            if abs(val) not in subst:
-                subst[abs(val)] = f"SUB[{key}]"
-            if val < 0:
-                inverse_subs[key] = subst[abs(val)]
+        for key in self._parent:
+            root, inverse = self._find(key)
+            if root not in subst:
+                subst[root] = f"SUB[{key}]"
+            if inverse ^ self._root_inverse[root]:
+                inverse_subs[key] = subst[root]
             else:
-                direct_subs[key] = subst[abs(val)]
+                direct_subs[key] = subst[root]
         return direct_subs, inverse_subs
 
 
@@ -100,3 +128,17 @@ class EquTest(unittest.TestCase):
         ec = EquivalenceClasses()
         ec.mark_equivalent("a", "b", True)
         assert ec.get_substitutions() == ({"a": "SUB[a]"}, {"b": "SUB[a]"})
+
+    def test_merge_inv(self):
+        ec = EquivalenceClasses()
+        ec.mark_equivalent("a", "b")
+        ec.mark_equivalent("c", "d", True)
+        ec.mark_equivalent("e", "f")
+        ec.mark_equivalent("b", "e")
+        ec.mark_equivalent("c", "e")
+        assert ec.get_substitutions() == (
+            {"a": "SUB[a]", "b": "SUB[a]", "c": "SUB[a]", "e": "SUB[a]", "f": "SUB[a]"},
+            {"d": "SUB[a]"},
+        )
+        with pytest.raises(ValueError):
+            ec.mark_equivalent("d", "f")
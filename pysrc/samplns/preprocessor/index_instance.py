@@ -1,6 +1,10 @@
 import typing
+from collections.abc import Mapping
+
+import numpy as np
 
 from ..instances import FeatureLabel, FeatureNode, SatNode
+from .clauses import ClauseStore
 from .universe_mapping import UniverseMapping
 
 
@@ -9,23 +13,54 @@ class IndexInstance:
     The index instance is an instance where all labels are integers.
     For further simplification, the concrete features will be labeled 0 to n.
     This allows to directly use these indices for efficient querying.
+    Rules in CNF are stored as `ClauseStore`, and the `OR`/`VAR` objects are
+    only created if `rules` is accessed.
     """
 
     def __init__(
         self,
         structure: typing.Optional[FeatureNode],
-        rules: typing.List[SatNode],
+        rules: typing.Union[typing.List[SatNode], ClauseStore],
         n_concrete: int,
         n_all: int,
         to_original_universe: UniverseMapping,
     ):
         self.structure = structure
-        self.rules = rules
+        self._rules: typing.Optional[typing.List[SatNode]] = None
+        self._clauses: typing.Optional[ClauseStore] = None
+        if isinstance(rules, ClauseStore):
+            self._clauses = rules
+        else:
+            try:
+                self._clauses = ClauseStore.from_rules(rules)
+            except ValueError:  # not in CNF
+                self._rules = list(rules)
         self.n_concrete = n_concrete
         self.n_all = n_all
         self._to_original_universe = to_original_universe
         self.instance_name = None
 
+    @property
+    def rules(self) -> typing.List[SatNode]:
+        """
+        The rules as formulas. For rules in CNF, they are built from the clauses
+        on first access.
+        """
+        if self._rules is None:
+            assert self._clauses is not None
+            self._rules = self._clauses.to_rules()
+        return self._rules
+
+    @property
+    def clauses(self) -> typing.Optional[ClauseStore]:
+        """
+        The rules as clauses, or None if they are not in CNF.
+        """
+        return self._clauses
+
+    def num_rules(self) -> int:
+        return len(self._clauses) if self._clauses is not None else len(self._rules)
+
     def to_json_data(self):
         """
         Unfortunately, the parser is not deterministic.
@@ -36,14 +71,18 @@ class IndexInstance:
         that can be reimported, keeping the mapping to string labels
         and the integer indices intact.
         """
-        return {
+        data = {
             "name": self.instance_name,
             "n_all": self.n_all,
             "n_concrete": self.n_concrete,
             "to_original_universe": self._to_original_universe.to_json_data(),
-            "rules": [r.to_json_data() for r in self.rules],
             "structure": self.structure.to_json_data() if self.structure else None,
         }
+        if self._clauses is not None:
+            data["clauses"] = self._clauses.to_json_data()
+        else:
+            data["rules"] = [r.to_json_data() for r in self.rules]
+        return data
 
     @staticmethod
     def from_json_data(json_data):
@@ -51,7 +90,11 @@ class IndexInstance:
         umap.from_json_data(json_data["to_original_universe"])
         result = IndexInstance(
             structure=FeatureNode.from_json_data(json_data.get("structure", None)),
-            rules=[SatNode.from_json_data(j) for j in json_data["rules"]],
+            rules=(
+                ClauseStore.from_json_data(json_data["clauses"])
+                if "clauses" in json_data
+                else [SatNode.from_json_data(j) for j in json_data["rules"]]
+            ),
             n_concrete=json_data["n_concrete"],
             n_all=json_data["n_all"],
             to_original_universe=umap,
@@ -84,14 +127,14 @@ class IndexInstance:
         """
         Checks if a configuration is feasible, i.e., satisfies all rules and matches the structure.
         """
-        if not isinstance(conf, dict):
-            msg = "Configuration must be a dictionary"
+        if not isinstance(conf, Mapping):
+            msg = "Configuration must be a dictionary or mapping"
             raise ValueError(msg)
         if not self.is_fully_defined(conf):
             if verbose:
                 print("Not fully defined")
             return False
-        if not all(rule.evaluate(conf) for rule in self.rules):
+        if not self._satisfies_rules(conf):
             if verbose:
                 print("Does not satisfy rules")
             return False
@@ -101,8 +144,23 @@ class IndexInstance:
             return False
         return True
 
+    def _satisfies_rules(self, conf: typing.Mapping[int, bool]) -> bool:
+        if self._clauses is None:
+            return all(rule.evaluate(conf) for rule in self._rules)
+        values = np.zeros(self.n_all, dtype=bool)
+        defined = np.zeros(self.n_all, dtype=bool)
+        for i, value in conf.items():
+            if 0 <= i < self.n_all:
+                values[i] = value
+                defined[i] = True
+        variables = self._clauses.variables()
+        missing = variables[~defined[variables]]
+        if len(missing):
+            raise KeyError(int(missing[0]))
+        return self._clauses.is_satisfied(values)
+
     def __repr__(self):
         if self.instance_name:
-            return f"Instance[{self.instance_name}]<{self.n_concrete} features, {len(self.rules)} rules>"
+            return f"Instance[{self.instance_name}]<{self.n_concrete} features, {self.num_rules()} rules>"
         else:
-            return f"Instance[UNNAMED]<{self.n_concrete} features, {len(self.rules)} rules>"
+            return f"Instance[UNNAMED]<{self.n_concrete} features, {self.num_rules()} rules>"
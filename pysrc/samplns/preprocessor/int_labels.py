@@ -1,6 +1,6 @@
 import typing
 
-from ..instances import Instance
+from ..instances import Instance, iter_variables, substitute_all
 from .index_instance import IndexInstance
 from .universe_mapping import UniverseMapping
 
@@ -24,15 +24,12 @@ def substitute_with_int_labels(
     n_concrete = counter
 
     # rules
-    rules = []
-    for rule in instance.rules:
-        for var in rule.all_variables():
-            if var not in direct_substitutions:
-                direct_substitutions[var] = counter
-                mapping.map(origin_element=var, target_element=counter)
-                counter += 1
-        rule_ = rule.substitute(direct_substitutions, {})
-        rules.append(rule_)
+    for var in iter_variables(instance.rules):
+        if var not in direct_substitutions:
+            direct_substitutions[var] = counter
+            mapping.map(origin_element=var, target_element=counter)
+            counter += 1
+    rules = substitute_all(instance.rules, direct_substitutions, {})
 
     # variables
     if instance.structure:
@@ -2,11 +2,14 @@ import logging
 import typing
 
 from ..cds import CdsLns
+from ..cds.backend import CdsBackend
 from ..instances import Instance
 from ..lns._coverage_set import CoveredTuples
 from ..lns.lns import InternalSolution, LnsObserver, ModularLns
 from ..lns.neighborhood import NeighborhoodSelector, RandomNeighborhood
+from ..lns.solver_profile import SolverProfile
 from ..preprocessor import Preprocessor
+from ..utils import Configuration, sample_to_array
 from ..verify import have_equal_coverage
 
 ExternalSolution = typing.List[
@@ -33,6 +36,11 @@ class SampLns:
         observer=LnsObserver(),
         logger: logging.Logger = _logger,
         cds_iteration_time_limit: float = 60.0,
+        reuse_model: bool = False,
+        parallel_neighborhoods: int = 1,
+        solver_profile: typing.Union[str, SolverProfile, None] = None,
+        cds_backend: typing.Union[str, CdsBackend, None] = None,
+        cds_threads: int = 1,
     ):
         """
         :param instance: The instance we want to find a sample for.
@@ -41,6 +49,12 @@ class SampLns:
         :param on_new_solution: A callback that notifies about every new solution.
         :param observer: An observer that is notified about the progress.
         :param logger: A logger.
+        :param cds_iteration_time_limit: Time limit of an iteration of the lower bound computation.
+        :param reuse_model: Keep the CP-SAT model alive between iterations instead of rebuilding it.
+        :param parallel_neighborhoods: Number of neighborhoods optimized concurrently per iteration.
+        :param solver_profile: The CP-SAT parameters, as SolverProfile or name in SOLVER_PROFILES (default: "default").
+        :param cds_backend: The solver of the lower bound computation, as function or name in CDS_BACKENDS (default: "gurobi").
+        :param cds_threads: Number of worker threads of the lower bound computation.
         """
         self.log = logger
         self.original_instance = instance
@@ -63,6 +77,8 @@ class SampLns:
             solution,
             logger=self.log.getChild("CDS"),
             iteration_timelimit=cds_iteration_time_limit,
+            backend=cds_backend,
+            num_threads=cds_threads,
         )
 
         self._lns = ModularLns(
@@ -73,6 +89,9 @@ class SampLns:
             on_new_solution=on_new_solution_,
             observer=observer,
             logger=self.log,
+            reuse_model=reuse_model,
+            parallel_neighborhoods=parallel_neighborhoods,
+            solver_profile=solver_profile,
         )
 
     def _import_solution(self, solution: ExternalSolution) -> InternalSolution:
@@ -81,7 +100,9 @@ class SampLns:
         """
         assert all(self.original_instance.is_fully_defined(conf) for conf in solution)
         return [
-            self.index_instance.to_mapped_universe(configuration)
+            Configuration.from_dict(
+                self.index_instance.to_mapped_universe(configuration)
+            )
             for configuration in solution
         ]
 
@@ -114,10 +135,8 @@ class SampLns:
             final_solution = self._lns.get_best_solution()
             n = self.index_instance.n_concrete
             assert CoveredTuples(
-                [[conf[f] for f in range(n)] for conf in initial_solution], n
-            ) == CoveredTuples(
-                [[conf[f] for f in range(n)] for conf in final_solution], n
-            )
+                sample_to_array(initial_solution, range(n)), n
+            ) == CoveredTuples(sample_to_array(final_solution, range(n)), n)
         sol = self._export_solution(self._lns.get_best_solution())
         if verify:
             assert have_equal_coverage(
@@ -2,6 +2,31 @@
 General utils that do not have dependencies to any other parts of the code.
 """
 # flake8: noqa F401
+from .configuration import Configuration
+from .cpu import available_cpus
+from .sample_array import configuration_to_array, sample_to_array
 from .timer import Timer
+from .tuple_id import (
+    TUPLE_ID_DTYPE,
+    tuple_from_id,
+    tuple_id,
+    tuple_ids_from_array,
+    tuple_ids_from_tuples,
+    tuple_ids_to_array,
+    tuple_ids_to_tuples,
+)
 
-__all__ = ["Timer"]
+__all__ = [
+    "Timer",
+    "Configuration",
+    "available_cpus",
+    "sample_to_array",
+    "configuration_to_array",
+    "TUPLE_ID_DTYPE",
+    "tuple_id",
+    "tuple_from_id",
+    "tuple_ids_from_array",
+    "tuple_ids_to_array",
+    "tuple_ids_from_tuples",
+    "tuple_ids_to_tuples",
+]
@@ -0,0 +1,170 @@
+"""
+A compact representation of configurations over the features 0, ..., n-1.
+A dictionary needs around 100 bytes per feature, while this representation
+packs the values into single bits.
+"""
+
+import typing
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class Configuration(Mapping):
+    """
+    An immutable assignment of the features 0, ..., n-1 backed by a packed bit
+    array. It can be read like a `Dict[int, bool]`, e.g., `conf[i]`, `conf.get(i)`,
+    `conf.items()`, and compares equal to a dictionary with the same assignment.
+    Features can be left undefined (e.g., abstract features without a value).
+    """
+
+    __slots__ = ("_n", "_values", "_defined", "_hash")
+
+    def __init__(
+        self,
+        values: typing.Union[np.ndarray, typing.Sequence[bool]],
+        defined: typing.Optional[
+            typing.Union[np.ndarray, typing.Sequence[bool]]
+        ] = None,
+    ):
+        """
+        values: The value of each feature 0, ..., n-1.
+        defined: Optionally, which of the features have a value. All by default.
+        """
+        values = np.asarray(values, dtype=bool)
+        if values.ndim != 1:
+            msg = "Values of a configuration have to be one-dimensional."
+            raise ValueError(msg)
+        self._n = len(values)
+        self._values = np.packbits(values, bitorder="little").tobytes()
+        self._defined = None  # None if all features are defined
+        if defined is not None:
+            defined = np.asarray(defined, dtype=bool)
+            if defined.shape != values.shape:
+                msg = "Values and defined features need to have the same length."
+                raise ValueError(msg)
+            if not defined.all():
+                # Undefined features are always stored as False.
+                self._values = np.packbits(
+                    values & defined, bitorder="little"
+                ).tobytes()
+                self._defined = np.packbits(defined, bitorder="little").tobytes()
+        self._hash = None
+
+    @classmethod
+    def from_dict(cls, assignment: typing.Mapping[int, bool]) -> "Configuration":
+        """
+        Creates a configuration from an assignment of feature indices to values.
+        """
+        if isinstance(assignment, Configuration):
+            return assignment
+        n = max(assignment.keys(), default=-1) + 1
+        if n and min(assignment.keys()) < 0:
+            msg = "Features have to be non-negative indices."
+            raise ValueError(msg)
+        values = np.zeros(n, dtype=bool)
+        defined = np.zeros(n, dtype=bool)
+        keys = np.fromiter(assignment.keys(), dtype=np.int64, count=len(assignment))
+        values[keys] = np.fromiter(
+            assignment.values(), dtype=bool, count=len(assignment)
+        )
+        defined[keys] = True
+        return cls(values, defined)
+
+    def _bit(self, bits: bytes, feature: int) -> bool:
+        return bool((bits[feature >> 3] >> (feature & 7)) & 1)
+
+    def __getitem__(self, feature: int) -> bool:
+        if (
+            not isinstance(feature, (int, np.integer))
+            or feature < 0
+            or feature >= self._n
+            or (self._defined is not None and not self._bit(self._defined, feature))
+        ):
+            raise KeyError(feature)
+        return self._bit(self._values, feature)
+
+    def __contains__(self, feature) -> bool:
+        if not isinstance(feature, (int, np.integer)) or not 0 <= feature < self._n:
+            return False
+        return self._defined is None or self._bit(self._defined, feature)
+
+    def __len__(self) -> int:
+        if self._defined is None:
+            return self._n
+        return int(self._unpack(self._defined).sum())
+
+    def __iter__(self) -> typing.Iterator[int]:
+        if self._defined is None:
+            return iter(range(self._n))
+        return iter(np.flatnonzero(self._unpack(self._defined)).tolist())
+
+    def _unpack(self, bits: bytes) -> np.ndarray:
+        return np.unpackbits(
+            np.frombuffer(bits, dtype=np.uint8), count=self._n, bitorder="little"
+        )
+
+    def to_array(self, n: typing.Optional[int] = None) -> np.ndarray:
+        """
+        The values of the features 0, ..., n-1 as uint8 array. This is the format
+        of `samplns.utils.sample_to_array`. Raises a `KeyError` for the first of
+        these features that is undefined, like `conf[i]`.
+        """
+        n = self._n if n is None else n
+        if n > self._n:
+            raise KeyError(self._n)
+        if self._defined is not None:
+            undefined = np.flatnonzero(self._unpack(self._defined)[:n] == 0)
+            if len(undefined):
+                raise KeyError(int(undefined[0]))
+        return np.unpackbits(
+            np.frombuffer(self._values, dtype=np.uint8), count=n, bitorder="little"
+        )
+
+    def num_true(self) -> int:
+        """
+        Number of features that are set to True.
+        """
+        return int(np.unpackbits(np.frombuffer(self._values, dtype=np.uint8)).sum())
+
+    def _canonical(self) -> typing.Tuple[int, bytes, typing.Optional[bytes]]:
+        """
+        The packed assignment without trailing undefined features, such that
+        configurations with the same defined items have the same representation.
+        """
+        if self._defined is None:
+            return self._n, self._values, None
+        defined = self._unpack(self._defined).astype(bool)
+        n = int(np.flatnonzero(defined)[-1]) + 1 if defined.any() else 0
+        values = np.packbits(self._unpack(self._values)[:n], bitorder="little")
+        if defined[:n].all():
+            return n, values.tobytes(), None
+        return (
+            n,
+            values.tobytes(),
+            np.packbits(defined[:n], bitorder="little").tobytes(),
+        )
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Configuration):
+            if self._defined is None and other._defined is None:
+                return self._n == other._n and self._values == other._values
+            return self._canonical() == other._canonical()
+        if isinstance(other, Mapping):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(self._canonical())
+        return self._hash
+
+    def __getstate__(self):
+        return self._n, self._values, self._defined
+
+    def __setstate__(self, state):
+        self._n, self._values, self._defined = state
+        self._hash = None
+
+    def __repr__(self) -> str:
+        return f"Configuration({dict(self.items())})"
@@ -0,0 +1,59 @@
+"""
+Detecting the number of CPUs that are actually available to this process.
+"""
+import math
+import os
+import typing
+from pathlib import Path
+
+
+def _read(path: Path) -> typing.Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_quota(
+    root: typing.Union[str, Path] = "/sys/fs/cgroup"
+) -> typing.Optional[float]:
+    """
+    The CPU quota of the cgroup (e.g., of a container) in CPUs, or None if
+    there is no quota. Supports cgroup v2 (`cpu.max`) and v1 (`cpu.cfs_quota_us`).
+    """
+    root = Path(root)
+    cpu_max = _read(root / "cpu.max")
+    if cpu_max is not None:
+        try:
+            quota, period = cpu_max.split()[:2]
+            if quota == "max":
+                return None
+            return int(quota) / int(period)
+        except ValueError:
+            return None
+    quota = _read(root / "cpu" / "cpu.cfs_quota_us")
+    period = _read(root / "cpu" / "cpu.cfs_period_us")
+    if quota is None or period is None:
+        return None
+    try:
+        quota_, period_ = int(quota), int(period)
+    except ValueError:
+        return None
+    if quota_ <= 0 or period_ <= 0:
+        return None  # -1 means no quota
+    return quota_ / period_
+
+
+def available_cpus() -> int:
+    """
+    Number of CPUs this process can use. In contrast to `os.cpu_count`, this
+    respects the CPU affinity and the CPU quota of the cgroup.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on all platforms
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
@@ -0,0 +1,52 @@
+"""
+Samples as contiguous NumPy arrays. The native modules can directly work on the
+buffer of such an array, without converting a list of dictionaries first.
+"""
+
+import typing
+
+import numpy as np
+
+from .configuration import Configuration
+
+
+def sample_to_array(
+    sample: typing.Iterable[typing.Mapping[typing.Any, bool]],
+    features: typing.Sequence,
+) -> np.ndarray:
+    """
+    Converts a sample into a uint8 array with one row per configuration and one
+    column per feature (in the order of `features`).
+    """
+    sample = list(sample)
+    if _is_prefix(features) and all(isinstance(c, Configuration) for c in sample):
+        # Fast path: Directly unpack the bits of the configurations.
+        array = np.empty((len(sample), len(features)), dtype=np.uint8)
+        for i, configuration in enumerate(sample):
+            array[i] = configuration.to_array(len(features))
+        return array
+    features = list(features)
+    array = np.empty((len(sample), len(features)), dtype=np.uint8)
+    for i, configuration in enumerate(sample):
+        array[i] = [configuration[f] for f in features]
+    return array
+
+
+def configuration_to_array(
+    configuration: typing.Mapping[typing.Any, bool], features: typing.Sequence
+) -> np.ndarray:
+    """
+    Converts a single configuration into a uint8 array with one entry per feature.
+    """
+    if _is_prefix(features) and isinstance(configuration, Configuration):
+        return configuration.to_array(len(features))
+    return np.fromiter(
+        (configuration[f] for f in features), dtype=np.uint8, count=len(features)
+    )
+
+
+def _is_prefix(features: typing.Sequence) -> bool:
+    """
+    Checks if the features are 0, ..., n-1.
+    """
+    return isinstance(features, range) and features.start == 0 and features.step == 1
@@ -0,0 +1,89 @@
+"""
+Canonical encoding of feature literal tuples as packed 64-bit integers.
+
+The literal of feature `f` with value `v` has the index `2*f + v`. A tuple of
+two literals `a < b` of different features is encoded as `(a << 32) | b`.
+The encoding is unique, preserves the order of the literals, and is shared
+by the coverage set, the CDS bindings (`*_tuple_ids` methods), and the CP-SAT
+model, such that the tuples do not have to be converted between these
+components. The helpers below convert between this encoding and the other
+representations, vectorized with NumPy.
+"""
+
+import typing
+
+import numpy as np
+
+Tuple = typing.Tuple[typing.Tuple[int, bool], typing.Tuple[int, bool]]
+
+# dtype of arrays of tuple ids
+TUPLE_ID_DTYPE = np.int64
+_LITERAL_BITS = 32
+_LITERAL_MASK = (1 << _LITERAL_BITS) - 1
+
+
+def tuple_id(feature_i: int, i_val: bool, feature_j: int, j_val: bool) -> int:
+    """
+    The id of the tuple (feature_i=i_val, feature_j=j_val), independent of the
+    order of the two literals.
+    """
+    if feature_i == feature_j:
+        msg = "A tuple needs two different features."
+        raise ValueError(msg)
+    a = 2 * feature_i + int(i_val)
+    b = 2 * feature_j + int(j_val)
+    if a > b:
+        a, b = b, a
+    return (a << _LITERAL_BITS) | b
+
+
+def tuple_from_id(id_: int) -> Tuple:
+    """
+    Decodes a tuple id into `((i, i_val), (j, j_val))` with `i < j`.
+    """
+    id_ = int(id_)
+    a = id_ >> _LITERAL_BITS
+    b = id_ & _LITERAL_MASK
+    return ((a >> 1, bool(a & 1)), (b >> 1, bool(b & 1)))
+
+
+def tuple_ids_from_array(array: np.ndarray) -> np.ndarray:
+    """
+    Encodes an (m, 4) array of rows (i, i_val, j, j_val), e.g., as returned by
+    `CoverageSet.missing_tuples_array`.
+    """
+    array = np.asarray(array, dtype=TUPLE_ID_DTYPE).reshape(-1, 4)
+    a = 2 * array[:, 0] + array[:, 1]
+    b = 2 * array[:, 2] + array[:, 3]
+    if np.any(array[:, 0] == array[:, 2]):
+        msg = "A tuple needs two different features."
+        raise ValueError(msg)
+    return (np.minimum(a, b) << _LITERAL_BITS) | np.maximum(a, b)
+
+
+def tuple_ids_to_array(ids: np.ndarray) -> np.ndarray:
+    """
+    Decodes tuple ids into an (m, 4) array of rows (i, i_val, j, j_val) with i < j.
+    """
+    ids = np.asarray(ids, dtype=TUPLE_ID_DTYPE)
+    a = ids >> _LITERAL_BITS
+    b = ids & _LITERAL_MASK
+    return np.stack([a >> 1, a & 1, b >> 1, b & 1], axis=1)
+
+
+def tuple_ids_from_tuples(tuples: typing.Iterable[Tuple]) -> np.ndarray:
+    """
+    Encodes tuples in the format `((i, i_val), (j, j_val))`.
+    """
+    flat = [x for (i, i_val), (j, j_val) in tuples for x in (i, i_val, j, j_val)]
+    return tuple_ids_from_array(np.array(flat, dtype=TUPLE_ID_DTYPE))
+
+
+def tuple_ids_to_tuples(ids: np.ndarray) -> typing.List[Tuple]:
+    """
+    Decodes tuple ids into tuples in the format `((i, i_val), (j, j_val))`.
+    """
+    return [
+        ((i, bool(i_val)), (j, bool(j_val)))
+        for i, i_val, j, j_val in tuple_ids_to_array(ids).tolist()
+    ]
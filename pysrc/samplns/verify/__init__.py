@@ -3,5 +3,6 @@ This module shall provide tools for verifying solutions.
 """
 # flake8: noqa F401
 from .compare import have_equal_coverage
+from .feasibility import FeasibilityChecker
 
-__all__ = ["have_equal_coverage"]
+__all__ = ["have_equal_coverage", "FeasibilityChecker"]
@@ -10,66 +10,79 @@
  *
  */
 
+#include <cstdint>
 #include <iostream>
 #include <pybind11/functional.h> // automatic conversion of lambdas/functions?
+#include <pybind11/numpy.h>      // direct access to the buffer of samples
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h> // automatic conversion of vectors
 
+namespace py = pybind11;
+
 using Sample = std::vector<std::unordered_map<std::string, bool>>;
-using IntSample = std::vector<std::vector<bool>>;
+// One row per configuration, one column per concrete feature.
+using SampleArray =
+    py::array_t<uint8_t, py::array::c_style | py::array::forcecast>;
 
-bool have_equal_coverage(Sample sample_a, Sample sample_b,
-                         std::vector<std::string> concrete_features) {
-  if (sample_a.empty() || sample_b.empty()) {
-    throw std::invalid_argument("Empty sample.");
-  }
-  // Convert to int instances for faster comparison
-  IntSample int_sample_a;
-  IntSample int_sample_b;
-  int tuples_covered_by_a = 0;
-  int tuples_covered_by_b = 0;
-  int tuples_covered_by_both = 0;
-  try {
-    for (auto &conf : sample_a) {
-      std::vector<bool> int_conf;
-      for (auto &feature : concrete_features) {
-        int_conf.push_back(conf.at(feature));
+/**
+ * For every literal (2*feature + value), a bitset over the configurations of a
+ * sample that contain it. A tuple is covered if the bitsets of its two
+ * literals intersect.
+ */
+class LiteralOccurrences {
+public:
+  LiteralOccurrences(const uint8_t *sample, size_t num_configurations,
+                     size_t num_features)
+      : words_per_literal{(num_configurations + 63) / 64},
+        occurrences(2 * num_features * words_per_literal, 0) {
+    for (size_t c = 0; c < num_configurations; c++) {
+      for (size_t f = 0; f < num_features; f++) {
+        const size_t lit = 2 * f + (sample[c * num_features + f] ? 1 : 0);
+        occurrences[lit * words_per_literal + c / 64] |= uint64_t(1)
+                                                         << (c % 64);
       }
-      int_sample_a.push_back(int_conf);
     }
-    for (auto &conf : sample_b) {
-      std::vector<bool> int_conf;
-      for (auto &feature : concrete_features) {
-        int_conf.push_back(conf.at(feature));
+  }
+
+  bool covers(size_t f1, bool v1, size_t f2, bool v2) const {
+    const uint64_t *a =
+        occurrences.data() + (2 * f1 + (v1 ? 1 : 0)) * words_per_literal;
+    const uint64_t *b =
+        occurrences.data() + (2 * f2 + (v2 ? 1 : 0)) * words_per_literal;
+    for (size_t w = 0; w < words_per_literal; w++) {
+      if (a[w] & b[w]) {
+        return true;
       }
-      int_sample_b.push_back(int_conf);
     }
-  } catch (std::out_of_range &e) {
-    throw std::invalid_argument("Sample misses a concrete feature.");
+    return false;
+  }
+
+private:
+  size_t words_per_literal;
+  std::vector<uint64_t> occurrences;
+};
+
+bool have_equal_coverage(const uint8_t *sample_a, size_t size_a,
+                         const uint8_t *sample_b, size_t size_b, size_t n,
+                         const std::function<std::string(size_t)> &name) {
+  if (size_a == 0 || size_b == 0) {
+    throw std::invalid_argument("Empty sample.");
   }
+  const LiteralOccurrences occurrences_a(sample_a, size_a, n);
+  const LiteralOccurrences occurrences_b(sample_b, size_b, n);
+  int64_t tuples_covered_by_a = 0;
+  int64_t tuples_covered_by_b = 0;
+  int64_t tuples_covered_by_both = 0;
   // check for each tuple if it is covered in both samples
-  int n = concrete_features.size();
-  for (int v1 = 0; v1 < n; v1++) {
-    for (int v2 = v1 + 1; v2 < n; v2++) {
+  for (size_t v1 = 0; v1 < n; v1++) {
+    for (size_t v2 = v1 + 1; v2 < n; v2++) {
       for (bool v1_val : {true, false}) {
         for (bool v2_val : {true, false}) {
-          bool a = false;
-          bool b = false;
-          for (auto &conf : int_sample_a) {
-            if (conf[v1] == v1_val && conf[v2] == v2_val) {
-              a = true;
-              break;
-            }
-          }
+          const bool a = occurrences_a.covers(v1, v1_val, v2, v2_val);
+          const bool b = occurrences_b.covers(v1, v1_val, v2, v2_val);
           if (a) {
             tuples_covered_by_a++;
           }
-          for (auto &conf : int_sample_b) {
-            if (conf[v1] == v1_val && conf[v2] == v2_val) {
-              b = true;
-              break;
-            }
-          }
           if (b) {
             tuples_covered_by_b++;
           }
@@ -83,9 +96,8 @@ bool have_equal_coverage(Sample sample_a, Sample sample_b,
                       << tuples_covered_by_b << std::endl;
             std::cout << "Number of tuples covered by both: "
                       << tuples_covered_by_both << std::endl;
-            std::cout << "Missing tuple: " << concrete_features[v1] << "="
-                      << v1_val << ", " << concrete_features[v2] << "="
-                      << v2_val << std::endl;
+            std::cout << "Missing tuple: " << name(v1) << "=" << v1_val << ", "
+                      << name(v2) << "=" << v2_val << std::endl;
             std::cout << "a: " << a << ", b: " << b << std::endl;
             return false;
           }
@@ -102,9 +114,59 @@ bool have_equal_coverage(Sample sample_a, Sample sample_b,
   return true;
 }
 
+/**
+ * Check two samples given as arrays (one row per configuration, one column per
+ * concrete feature) for equal coverage. The buffers are used directly.
+ */
+bool have_equal_coverage_of_arrays(const SampleArray &sample_a,
+                                   const SampleArray &sample_b) {
+  if (sample_a.ndim() != 2 || sample_b.ndim() != 2 ||
+      sample_a.shape(1) != sample_b.shape(1)) {
+    throw std::invalid_argument(
+        "Samples have to be two-dimensional arrays with the same number of "
+        "concrete features.");
+  }
+  return have_equal_coverage(
+      sample_a.data(), sample_a.shape(0), sample_b.data(), sample_b.shape(0),
+      sample_a.shape(1), [](size_t f) { return std::to_string(f); });
+}
+
+std::vector<uint8_t> to_array(const Sample &sample,
+                              const std::vector<std::string> &features) {
+  std::vector<uint8_t> array;
+  array.reserve(sample.size() * features.size());
+  try {
+    for (auto &conf : sample) {
+      for (auto &feature : features) {
+        array.push_back(conf.at(feature));
+      }
+    }
+  } catch (std::out_of_range &e) {
+    throw std::invalid_argument("Sample misses a concrete feature.");
+  }
+  return array;
+}
+
+bool have_equal_coverage(Sample sample_a, Sample sample_b,
+                         std::vector<std::string> concrete_features) {
+  if (sample_a.empty() || sample_b.empty()) {
+    throw std::invalid_argument("Empty sample.");
+  }
+  // Convert to arrays for faster comparison
+  const auto array_a = to_array(sample_a, concrete_features);
+  const auto array_b = to_array(sample_b, concrete_features);
+  return have_equal_coverage(array_a.data(), sample_a.size(), array_b.data(),
+                             sample_b.size(), concrete_features.size(),
+                             [&](size_t f) { return concrete_features[f]; });
+}
+
 PYBIND11_MODULE(_verify, m) {
-  namespace py = pybind11;
   m.doc() = "Verify the correctness of a sample.";
-  m.def("have_equal_coverage", &have_equal_coverage,
+  m.def("have_equal_coverage",
+        py::overload_cast<Sample, Sample, std::vector<std::string>>(
+            &have_equal_coverage),
         "Check if two samples have the same coverage.");
+  m.def("have_equal_coverage", &have_equal_coverage_of_arrays,
+        "Check if two samples, given as uint8 arrays of the concrete "
+        "features, have the same coverage.");
 }
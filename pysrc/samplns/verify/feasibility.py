@@ -0,0 +1,183 @@
+"""
+Checks the feasibility of whole samples at once. The structure and the rules are
+flattened once into clauses and at-most-one constraints over the columns of a
+sample array, such that a sample is checked by a few NumPy operations instead of
+evaluating the feature tree and every rule per configuration.
+"""
+import typing
+
+import numpy as np
+
+from ..instances import (
+    AND,
+    EQ,
+    IMPL,
+    OR,
+    VAR,
+    AltFeature,
+    AndFeature,
+    CompositeFeature,
+    FeatureLabel,
+    FeatureLiteral,
+    FeatureNode,
+    Instance,
+    OrFeature,
+    SatNode,
+    iter_variables,
+)
+from ..preprocessor import IndexInstance
+from ..preprocessor.clauses import LITERAL_DTYPE
+from ..utils import sample_to_array
+
+
+class FeasibilityChecker:
+    """
+    Checks samples of an `Instance` or `IndexInstance`. A sample is either a list
+    of configurations or an array with one row per configuration and one column
+    per entry of `variables` (for an `IndexInstance`, the variables 0, ...,
+    n_all-1). Every configuration has to define all variables.
+
+    Literals are encoded as in `ClauseStore`: the column or, if negated,
+    `-column-1`. Rules that are not clauses are evaluated on whole columns.
+    """
+
+    def __init__(self, instance: typing.Union[Instance, IndexInstance]):
+        self._clause_literals: typing.List[int] = []
+        self._clause_offsets = [0]
+        self._amo_literals: typing.List[int] = []
+        self._amo_offsets = [0]
+        self._formulas: typing.List[SatNode] = []
+        if isinstance(instance, IndexInstance):
+            self.variables: typing.Sequence[FeatureLabel] = range(instance.n_all)
+            self._column: typing.Optional[typing.Dict[FeatureLabel, int]] = None
+            rules = [] if instance.clauses is not None else instance.rules
+        else:
+            rules = instance.rules
+            variables = list(dict.fromkeys(instance.features))
+            if instance.structure:
+                variables.extend(instance.structure.all_features())
+            variables.extend(iter_variables(rules))
+            self.variables = list(dict.fromkeys(variables))
+            self._column = {v: i for i, v in enumerate(self.variables)}
+        if instance.structure:
+            self._add_structure(instance.structure)
+        for rule in rules:
+            self._add_rule(rule)
+        clauses = instance.clauses if isinstance(instance, IndexInstance) else None
+        self._clauses = self._to_arrays(
+            self._clause_literals, self._clause_offsets, clauses
+        )
+        self._amos = self._to_arrays(self._amo_literals, self._amo_offsets)
+
+    def _column_of(self, label: FeatureLabel) -> int:
+        return label if self._column is None else self._column[label]
+
+    def _literal(self, literal: typing.Union[FeatureLiteral, VAR]) -> int:
+        column = self._column_of(literal.var_name)
+        return -column - 1 if literal.negated else column
+
+    def _add_clause(self, literals: typing.Iterable[int]) -> None:
+        self._clause_literals.extend(literals)
+        self._clause_offsets.append(len(self._clause_literals))
+
+    def _add_structure(self, structure: FeatureNode) -> None:
+        stack = [structure]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, CompositeFeature) or not node.elements:
+                continue
+            parent = self._literal(node.feature_literal)
+            children = [self._literal(e.feature_literal) for e in node.elements]
+            for child in children:  # child -> parent
+                self._add_clause((-child - 1, parent))
+            if isinstance(node, AndFeature):
+                for element in node.mandatory_elements():  # parent -> child
+                    self._add_clause(
+                        (-parent - 1, self._literal(element.feature_literal))
+                    )
+            elif isinstance(node, (OrFeature, AltFeature)):
+                self._add_clause([-parent - 1, *children])  # at least one
+                if isinstance(node, AltFeature):
+                    self._amo_literals.extend(children)
+                    self._amo_offsets.append(len(self._amo_literals))
+            stack.extend(node.elements)
+
+    def _add_rule(self, rule: SatNode) -> None:
+        elements = rule.elements if isinstance(rule, OR) else [rule]
+        if all(isinstance(lit, VAR) for lit in elements):
+            self._add_clause(self._literal(lit) for lit in elements)
+        else:
+            self._formulas.append(rule)
+
+    @staticmethod
+    def _to_arrays(literals, offsets, store=None):
+        literals = np.asarray(literals, dtype=LITERAL_DTYPE)
+        offsets = np.asarray(offsets, dtype=LITERAL_DTYPE)
+        if store is not None and len(store):
+            offsets = np.concatenate([offsets, store.offsets[1:] + len(literals)])
+            literals = np.concatenate([literals, store.literals])
+        columns = np.where(literals >= 0, literals, -literals - 1)
+        return columns, literals < 0, offsets[:-1]
+
+    def check(
+        self,
+        sample: typing.Union[
+            np.ndarray, typing.Iterable[typing.Mapping[FeatureLabel, bool]]
+        ],
+    ) -> np.ndarray:
+        """
+        Returns a boolean array that tells for every configuration if it is
+        feasible.
+        """
+        if not isinstance(sample, np.ndarray):
+            sample = sample_to_array(sample, self.variables)
+        if sample.ndim != 2 or sample.shape[1] != len(self.variables):
+            msg = "Sample needs one row per configuration and one column per variable."
+            raise ValueError(msg)
+        values = sample.astype(bool, copy=False)
+        feasible = np.ones(len(values), dtype=bool)
+        if not len(values):
+            return feasible
+        columns, negated, starts = self._clauses
+        if len(starts):
+            lit_values = values[:, columns] ^ negated
+            feasible &= np.logical_or.reduceat(lit_values, starts, axis=1).all(axis=1)
+        columns, negated, starts = self._amos
+        if len(starts):
+            lit_values = (values[:, columns] ^ negated).astype(np.int32)
+            feasible &= (np.add.reduceat(lit_values, starts, axis=1) <= 1).all(axis=1)
+        for formula in self._formulas:
+            feasible &= self._evaluate(formula, values)
+        return feasible
+
+    def is_feasible(
+        self,
+        sample: typing.Union[
+            np.ndarray, typing.Iterable[typing.Mapping[FeatureLabel, bool]]
+        ],
+    ) -> bool:
+        """
+        Checks if all configurations of the sample are feasible.
+        """
+        return bool(self.check(sample).all())
+
+    def _evaluate(self, rule: SatNode, values: np.ndarray) -> np.ndarray:
+        if isinstance(rule, VAR):
+            column = values[:, self._column_of(rule.var_name)]
+            return ~column if rule.negated else column
+        if isinstance(rule, AND):
+            return np.logical_and.reduce(
+                [self._evaluate(e, values) for e in rule.elements]
+            )
+        if isinstance(rule, OR):
+            return np.logical_or.reduce(
+                [self._evaluate(e, values) for e in rule.elements]
+            )
+        if isinstance(rule, IMPL):
+            return ~self._evaluate(rule.condition, values) | self._evaluate(
+                rule.implication, values
+            )
+        if isinstance(rule, EQ):
+            return self._evaluate(rule.a, values) == self._evaluate(rule.b, values)
+        msg = f"Unknown rule {rule}."
+        raise ValueError(msg)
@@ -0,0 +1,12 @@
+"""
+Helpers to easily read the benchmark instances and their solutions.
+"""
+from pathlib import Path
+
+
+def path_to_instance(path):
+    return str(Path(__file__).parent / "instances" / path)
+
+
+def path_to_solution(path):
+    return str(Path(__file__).parent / "solutions" / path)
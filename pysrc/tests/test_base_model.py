@@ -0,0 +1,49 @@
+import json
+
+import ortools.sat.python.cp_model as cp_model
+from ortools.sat import cp_model_pb2
+from samplns.instances import parse
+from samplns.lns.base_model import BaseModelCreator
+from samplns.preprocessor import Preprocessor
+
+from . import path_to_instance, path_to_solution
+
+
+def test_base_model_template_copies():
+    instance = parse(path_to_instance("toybox_2006-10-31_23-30-06/model.xml"))
+    index_instance = Preprocessor().preprocess(instance)
+    with open(path_to_solution("toybox_2006-10-31_23-30-06/yasa_sample.json")) as f:
+        sample = [index_instance.to_mapped_universe(conf) for conf in json.load(f)]
+    creator = BaseModelCreator()
+    template = creator.create_template(index_instance)
+    assert creator.create_template(index_instance) is template  # cached
+
+    # Two copies with different feasible configurations are feasible together.
+    model = cp_model.CpModel()
+    for conf in sample[:2]:
+        offset = template.instantiate(model)
+        for i, value in conf.items():
+            model.Add(model.GetBoolVarFromProtoIndex(offset + i) == int(value))
+    assert cp_model.CpSolver().Solve(model) == cp_model.OPTIMAL
+
+    assert len(model.Proto().constraints) >= 2 * template.num_constraints()
+    assert len(model.Proto().variables) == 2 * index_instance.n_all
+
+
+def test_base_model_template_serialized_copies():
+    instance = parse(path_to_instance("toybox_2006-10-31_23-30-06/model.xml"))
+    index_instance = Preprocessor().preprocess(instance)
+    template = BaseModelCreator().create_template(index_instance)
+    template.add_linear([(-1, 2), (3, -5)], -4, 1)  # negative coefficients
+    for offset in [0, 7, 1000]:
+        # the fragment with offset references parses to the same constraints
+        expected = cp_model_pb2.CpModelProto()
+        template._add_constraints(expected, offset)
+        serialized = cp_model_pb2.CpModelProto()
+        serialized.MergeFromString(template._serialize_constraints(offset))
+        assert serialized == expected
+    models = [cp_model.CpModel() for _ in range(2)]
+    for model in models:
+        for _ in range(3):
+            template.instantiate(model)
+    assert str(models[0].Proto()) == str(models[1].Proto())
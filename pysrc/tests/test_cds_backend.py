@@ -0,0 +1,88 @@
+import json
+import time
+
+import numpy as np
+from samplns.cds import CpSatCdsBackend, GreedyCds, LnsCds, TransactionGraph
+from samplns.cds._cds_bindings import AsyncLnsCds, FeatureTuple
+from samplns.instances import parse
+from samplns.simple import SampLns
+from samplns.utils import TUPLE_ID_DTYPE
+
+from . import path_to_instance, path_to_solution
+
+
+def _small_graph():
+    """
+    The transaction graph of a sample with 4 configurations over 4 features.
+    """
+    sample = [[1, 2, 3, 4], [-1, -2, 3, 4], [1, -2, -3, -4], [-1, 2, -3, 4]]
+    graph = TransactionGraph(4)
+    for conf in sample:
+        graph.add_valid_configuration(conf)
+    return graph, sample
+
+
+def test_cpsat_backend():
+    backend = CpSatCdsBackend()
+    # edge 0 conflicts with 1 and 2, which are compatible
+    selected, optimal = backend(3, [[0, 1], [0, 2]], [0], 10.0)
+    assert sorted(selected) == [1, 2]
+    assert optimal
+
+
+def test_lns_cds_cpsat():
+    graph, sample = _small_graph()
+    initial = GreedyCds(graph, sample).optimize([])
+    lns = LnsCds(graph, use_heur=False, backend=CpSatCdsBackend())
+    solution = lns.optimize(initial, max_iterations=3, time_limit=10.0)
+    assert len(solution) >= len(initial)
+    stats = lns.get_iteration_statistics()
+    assert all("model_build_time" in s for s in stats if "found_solution_size" in s)
+
+
+def test_samplns_cpsat_lower_bound():
+    instance = parse(path_to_instance("toybox_2006-10-31_23-30-06/model.xml"))
+    with open(path_to_solution("toybox_2006-10-31_23-30-06/yasa_sample.json")) as f:
+        solution = json.load(f)
+    samplns = SampLns(
+        instance, solution, cds_iteration_time_limit=5.0, cds_backend="cpsat"
+    )
+    samplns.optimize(iterations=3, iteration_timelimit=5.0, timelimit=30)
+    assert 0 < samplns.get_lower_bound() <= len(samplns.get_best_solution())
+
+
+def test_async_lns_cds_threads():
+    graph, sample = _small_graph()
+    initial = GreedyCds(graph, sample).optimize([])
+    solver = AsyncLnsCds(graph, backend=CpSatCdsBackend(), num_threads=2)
+    assert solver.count_threads() == 2
+    solver.start(initial, 5.0)
+    time.sleep(0.5)
+    solver.stop()
+    assert len(solver.get_best_solution()) >= len(initial)
+    assert {s["worker"] for s in solver.get_iteration_statistics()} <= {0, 1}
+
+
+def test_lns_cds_set_subgraph():
+    graph, sample = _small_graph()
+    greedy = GreedyCds(graph, sample)
+    first = [FeatureTuple(1, 2), FeatureTuple(3, 4)]
+    lns = LnsCds(graph, first, use_heur=False, backend=CpSatCdsBackend())
+    lns.optimize(greedy.optimize(first), max_iterations=2)
+    subgraph = [(-2, 3), (-1, 3), (-3, 1), (2, 4)]
+    lns.set_subgraph([FeatureTuple(*t) for t in subgraph])
+    solution = lns.optimize(
+        greedy.optimize([FeatureTuple(*t) for t in subgraph]), max_iterations=2
+    )
+    assert solution
+    assert all((t[0], t[1]) in subgraph for t in solution)
+
+
+def test_greedy_cds_seed():
+    graph, sample = _small_graph()
+    greedy = GreedyCds(graph, sample)
+    cds = greedy.optimize_tuple_ids(np.zeros(0, dtype=TUPLE_ID_DTYPE))
+    seed = cds[:2]
+    solution = greedy.optimize_tuple_ids(np.zeros(0, dtype=TUPLE_ID_DTYPE), seed=seed)
+    assert np.isin(seed, solution).all()
+    assert len(np.unique(solution)) == len(solution)
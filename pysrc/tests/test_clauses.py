@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from samplns.instances import OR, VAR
+from samplns.preprocessor import ClauseStore, IndexInstance
+from samplns.preprocessor.universe_mapping import UniverseMapping
+
+
+def test_clause_store_from_rules():
+    rules = [OR(VAR(0), VAR(1, True)), VAR(2, True)]
+    clauses = ClauseStore.from_rules(rules)
+    assert len(clauses) == 2
+    assert clauses[0].tolist() == [0, -2]
+    assert clauses[1].tolist() == [-3]
+    assert clauses.variables().tolist() == [0, 1, 2]
+    assert repr(clauses.to_rules()) == repr(rules)
+    assert clauses.is_satisfied(np.array([0, 0, 0]))
+    assert not clauses.is_satisfied(np.array([0, 1, 0]))
+    assert not clauses.is_satisfied(np.array([1, 0, 1]))
+    with pytest.raises(ValueError):
+        ClauseStore.from_rules([VAR("a")])
+
+
+def test_index_instance_clauses():
+    rules = [OR(VAR(0), VAR(1)), OR(VAR(0, True), VAR(2, True))]
+    instance = IndexInstance(None, rules, 2, 3, UniverseMapping())
+    assert instance.clauses is not None
+    assert instance.is_feasible({0: True, 1: False, 2: False})
+    assert not instance.is_feasible({0: False, 1: False, 2: False})
+    with pytest.raises(KeyError):
+        instance.is_feasible({0: True, 1: False})
+    data = instance.to_json_data()
+    assert "clauses" in data
+    assert repr(ClauseStore.from_json_data(data["clauses"]).to_rules()) == repr(rules)
@@ -0,0 +1,63 @@
+import itertools
+import random
+
+from samplns.instances import AND, EQ, IMPL, OR, VAR
+from samplns.preprocessor.cnf import CnfEncoder
+
+
+def _literals(clause):
+    return clause.elements if isinstance(clause, OR) else [clause]
+
+
+def _is_equisatisfiable(rules, clauses, variables):
+    auxiliary = sorted(
+        {v.var_name for c in clauses for v in _literals(c) if v.auxiliary}
+    )
+    for values in itertools.product([False, True], repeat=len(variables)):
+        assignment = dict(zip(variables, values))
+        expected = all(rule.evaluate(assignment) for rule in rules)
+        extendable = False
+        for aux_values in itertools.product([False, True], repeat=len(auxiliary)):
+            assignment.update(zip(auxiliary, aux_values))
+            if all(clause.evaluate(assignment) for clause in clauses):
+                extendable = True
+                break
+        if expected != extendable:
+            return False
+    return True
+
+
+def test_cnf_encoder_random_formulas():
+    rng = random.Random(0)
+    variables = ["a", "b", "c", "d"]
+
+    def random_formula(depth):
+        if depth == 0 or rng.random() < 0.3:
+            return VAR(rng.choice(variables), rng.random() < 0.5)
+        t = rng.choice([AND, OR, EQ, IMPL])
+        if t in (AND, OR):
+            return t(*[random_formula(depth - 1) for _ in range(rng.randint(2, 3))])
+        return t(random_formula(depth - 1), random_formula(depth - 1))
+
+    for _ in range(100):
+        rules = [random_formula(3) for _ in range(rng.randint(1, 3))]
+        encoder = CnfEncoder()
+        for rule in rules:
+            encoder.add_rule(rule)
+        assert _is_equisatisfiable(rules, encoder.get_clauses(), variables)
+
+
+def test_cnf_encoder_sharing():
+    a, b, c = VAR("a"), VAR("b"), VAR("c")
+    encoder = CnfEncoder()
+    # AND(a, b) and its negation OR(-a, -b) share one auxiliary variable
+    encoder.add_rule(OR(AND(a, b), c))
+    encoder.add_rule(OR(AND(b, a), VAR("d")))
+    encoder.add_rule(IMPL(OR(a.NEG(), b.NEG()), c))
+    assert encoder.num_auxiliary == 1
+    # OR(a, b, c) is subsumed by OR(a, b)
+    encoder = CnfEncoder()
+    encoder.add_rule(OR(a, b, c))
+    encoder.add_rule(OR(b, a))
+    encoder.add_rule(OR(a, a.NEG()))
+    assert [repr(c) for c in encoder.get_clauses()] == [repr(OR(a, b))]
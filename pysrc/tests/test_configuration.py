@@ -0,0 +1,55 @@
+import pickle
+
+import pytest
+from samplns.utils import Configuration, configuration_to_array, sample_to_array
+
+
+def test_configuration_reads_like_dict():
+    assignment = {0: True, 1: False, 2: True, 9: True}
+    conf = Configuration.from_dict(assignment)
+    assert conf == assignment
+    assert dict(conf.items()) == assignment
+    assert len(conf) == 4
+    assert conf[2]
+    assert not conf[1]
+    assert 3 not in conf
+    assert conf.get(3, "missing") == "missing"
+    with pytest.raises(KeyError):
+        conf[3]
+    assert conf.num_true() == 3
+
+
+def test_configuration_hashing_and_pickling():
+    a = Configuration([True, False, True])
+    b = Configuration.from_dict({2: True, 1: False, 0: True})
+    assert a == b
+    assert hash(a) == hash(b)
+    assert len({a, b}) == 1
+    assert a != Configuration([True, False, False])
+    assert pickle.loads(pickle.dumps(a)) == a
+    # trailing undefined features do not matter, as for dictionaries
+    c = Configuration([True, False, False], defined=[True, True, False])
+    assert a != c
+    assert Configuration([True, False]) == c
+    assert hash(Configuration([True, False])) == hash(c)
+    assert Configuration([], []) == Configuration([False], [False]) == {}
+
+
+def test_configuration_to_array():
+    sample = [Configuration([True, False, True]), Configuration([False, True, True])]
+    dicts = [dict(conf.items()) for conf in sample]
+    assert (sample_to_array(sample, range(2)) == sample_to_array(dicts, range(2))).all()
+    assert sample_to_array(sample, range(3)).tolist() == [[1, 0, 1], [0, 1, 1]]
+
+
+def test_configuration_to_array_undefined():
+    conf = Configuration.from_dict({0: True, 2: True})
+    assert conf.to_array(1).tolist() == [1]
+    # the fast path for ranges fails like the generic one
+    for features in (range(3), [0, 1, 2]):
+        with pytest.raises(KeyError):
+            sample_to_array([conf], features)
+    with pytest.raises(KeyError):
+        configuration_to_array(conf, range(3))
+    with pytest.raises(KeyError):
+        sample_to_array([Configuration([True])], range(2))
@@ -0,0 +1,97 @@
+import itertools
+import random
+
+import pytest
+
+from samplns.lns._coverage_set import CoveredTuples
+from samplns.lns.coverage_set import CoverageSet
+
+
+def _tuples(sample, n):
+    return {
+        ((i, conf[i]), (j, conf[j]))
+        for conf in sample
+        for i, j in itertools.combinations(range(n), 2)
+    }
+
+
+def test_coverage_set_matches_brute_force():
+    random.seed(0)
+    for n in [1, 2, 31, 32, 33, 70]:
+        sample = [{f: random.random() < 0.5 for f in range(n)} for _ in range(10)]
+        coverage_set = CoverageSet(sample, n)
+        assert len(coverage_set) == len(_tuples(sample, n))
+        assert coverage_set.num_missing() == len(coverage_set)
+        for conf in sample[:4]:
+            coverage_set.cover(conf)
+        missing = set(coverage_set.missing_tuples())
+        assert missing == _tuples(sample, n) - _tuples(sample[:4], n)
+        assert coverage_set.num_missing() == len(missing)
+        coverage_set.clear()
+        assert coverage_set.num_missing() == len(coverage_set)
+
+
+def test_covered_tuples_comparison():
+    n = 40
+    sample = [[random.random() < 0.5 for _ in range(n)] for _ in range(5)]
+    assert CoveredTuples(sample, n) == CoveredTuples(list(reversed(sample)), n)
+    assert CoveredTuples(sample[:3], n) <= CoveredTuples(sample, n)
+    conf = sample[0]
+    assert CoveredTuples(sample, n).is_contained(3, conf[3], 7, conf[7])
+    assert CoveredTuples(sample, n).is_contained(7, conf[7], 3, conf[3])
+
+
+def test_uncover():
+    random.seed(1)
+    n = 50
+    sample = [{f: random.random() < 0.5 for f in range(n)} for _ in range(20)]
+    coverage_set = CoverageSet(sample, n)
+    for conf in sample:
+        coverage_set.cover(conf)
+    coverage_set.cover(sample[0])  # covered twice
+    assert coverage_set.num_missing() == 0
+    for i in range(1, 6):
+        coverage_set.uncover(sample[i])
+    missing = set(coverage_set.missing_tuples())
+    assert missing == _tuples(sample, n) - _tuples(sample[:1] + sample[6:], n)
+    assert coverage_set.num_missing() == len(missing)
+    coverage_set.uncover(sample[0])
+    assert coverage_set.num_missing() == len(missing)
+    for i in range(1, 6):
+        coverage_set.cover(sample[i])
+    assert coverage_set.num_missing() == 0
+
+
+def test_missing_tuples_array_and_stream():
+    random.seed(3)
+    n = 40
+    sample = [[random.random() < 0.5 for _ in range(n)] for _ in range(12)]
+    coverage_set = CoverageSet(sample, n)
+    for conf in sample[:4]:
+        coverage_set.cover(conf)
+    missing = coverage_set.missing_tuples()
+    array = coverage_set.missing_tuples_array()
+    assert array.shape == (len(missing), 4)
+    assert [((i, bool(a)), (j, bool(b))) for i, a, j, b in array.tolist()] == missing
+    assert all(i < j for i, _, j, _ in array.tolist())
+    chunks = list(coverage_set.iter_missing_tuples_chunks(chunk_size=7))
+    assert all(len(chunk) <= 7 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == len(missing)
+    assert list(coverage_set.iter_missing_tuples(chunk_size=5)) == missing
+
+
+def test_uncover_unknown_configuration():
+    n = 3
+    sample = [[0, 0, 0], [0, 1, 1], [1, 0, 1], [1, 1, 0]]
+    coverage_set = CoverageSet(sample, n)
+    for conf in sample:
+        coverage_set.cover(conf)
+    # all tuples of [1, 1, 1] are covered by others, but it has not been added
+    with pytest.raises(RuntimeError):
+        coverage_set.uncover([1, 1, 1])
+    assert coverage_set.num_missing() == 0
+    coverage_set.uncover(sample[0])
+    with pytest.raises(RuntimeError):
+        coverage_set.uncover(sample[0])
+    missing = set(coverage_set.missing_tuples())
+    assert missing == _tuples(sample, n) - _tuples(sample[1:], n)
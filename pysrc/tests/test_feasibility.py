@@ -0,0 +1,68 @@
+import json
+import logging
+
+import numpy as np
+from samplns.instances import (
+    IMPL,
+    VAR,
+    AltFeature,
+    AndFeature,
+    ConcreteFeature,
+    FeatureLiteral,
+    Instance,
+    parse,
+)
+from samplns.preprocessor import Preprocessor
+from samplns.verify import FeasibilityChecker
+
+from . import path_to_instance, path_to_solution
+
+
+def test_feasibility_checker_instance():
+    logger = logging.getLogger("test")
+    alt = AltFeature(
+        FeatureLiteral("alt"),
+        [
+            ConcreteFeature(FeatureLiteral("a"), False),
+            ConcreteFeature(FeatureLiteral("b"), False),
+        ],
+        True,
+        logger,
+    )
+    root = AndFeature(
+        FeatureLiteral("root"),
+        [alt, ConcreteFeature(FeatureLiteral("c"), False)],
+        True,
+        logger,
+    )
+    instance = Instance(["a", "b", "c"], root, [IMPL(VAR("c"), VAR("a"))])
+    checker = FeasibilityChecker(instance)
+    assert checker.variables == ["a", "b", "c", "root", "alt"]
+    sample = [
+        {"a": True, "b": False, "c": True, "root": True, "alt": True},
+        {"a": True, "b": True, "c": False, "root": True, "alt": True},  # alt
+        {"a": False, "b": True, "c": True, "root": True, "alt": True},  # rule
+        {"a": False, "b": False, "c": False, "root": True, "alt": False},  # mandatory
+        {"a": False, "b": False, "c": False, "root": False, "alt": False},
+    ]
+    expected = [instance.is_feasible(conf) for conf in sample]
+    assert expected == [True, False, False, False, True]
+    assert checker.check(sample).tolist() == expected
+    assert not checker.is_feasible(sample)
+
+
+def test_feasibility_checker_index_instance():
+    instance = parse(path_to_instance("toybox_2006-10-31_23-30-06/model.xml"))
+    index_instance = Preprocessor().preprocess(instance)
+    with open(path_to_solution("toybox_2006-10-31_23-30-06/yasa_sample.json")) as f:
+        sample = [index_instance.to_mapped_universe(conf) for conf in json.load(f)]
+    checker = FeasibilityChecker(index_instance)
+    rng = np.random.default_rng(0)
+    array = rng.integers(2, size=(200, index_instance.n_all), dtype=np.uint8)
+    for i, conf in enumerate(sample):
+        array[i, list(conf.keys())] = list(conf.values())
+    confs = [dict(enumerate(map(bool, row))) for row in array]
+    expected = [index_instance.is_feasible(conf) for conf in confs]
+    assert any(expected)
+    assert not all(expected)
+    assert checker.check(array).tolist() == expected
@@ -1,23 +1,12 @@
 import json
 import logging
-import os
 
 from samplns.instances import parse
 from samplns.lns import RandomNeighborhood
 from samplns.preprocessor import Preprocessor
 from samplns.simple import SampLns
 
-"""
-A module to easily read the benchmark instances and their solutions.
-"""
-
-
-def path_to_instance(path):
-    return os.path.join(os.path.dirname(__file__), "instances", path)
-
-
-def path_to_solution(path):
-    return os.path.join(os.path.dirname(__file__), "solutions", path)
+from . import path_to_instance, path_to_solution
 
 
 def test_instance():
@@ -45,3 +34,39 @@ def test_lns():
     )
     lns.optimize(10, 60)
     print(len(lns.get_best_solution()))
+
+
+def test_lns_reusing_model():
+    instance = parse(path_to_instance("toybox_2006-10-31_23-30-06/model.xml"))
+
+    with open(path_to_solution("toybox_2006-10-31_23-30-06/yasa_sample.json")) as f:
+        best_solution = json.load(f)
+
+    lns = SampLns(
+        instance=instance,
+        initial_solution=best_solution,
+        neighborhood_selector=RandomNeighborhood(200),
+        reuse_model=True,
+    )
+    lns.optimize(10, 60)
+    assert len(lns.get_best_solution(verify=True, fast_verify=True)) <= len(
+        best_solution
+    )
+
+
+def test_lns_parallel_neighborhoods():
+    instance = parse(path_to_instance("toybox_2006-10-31_23-30-06/model.xml"))
+
+    with open(path_to_solution("toybox_2006-10-31_23-30-06/yasa_sample.json")) as f:
+        best_solution = json.load(f)
+
+    lns = SampLns(
+        instance=instance,
+        initial_solution=best_solution,
+        neighborhood_selector=RandomNeighborhood(200),
+        parallel_neighborhoods=2,
+    )
+    lns.optimize(5, 60)
+    assert len(lns.get_best_solution(verify=True, fast_verify=True)) <= len(
+        best_solution
+    )
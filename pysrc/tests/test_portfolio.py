@@ -0,0 +1,47 @@
+from samplns.lns import RandomNeighborhood
+from samplns.lns._coverage_set import CoveredTuples
+from samplns.lns.neighborhood import Neighborhood
+from samplns.lns.portfolio import merge_improvements
+from samplns.utils import Configuration, sample_to_array
+
+
+def _confs(*values):
+    return [Configuration([c == "1" for c in v]) for v in values]
+
+
+def _coverage(sample):
+    return CoveredTuples(sample_to_array(sample, range(3)), 3)
+
+
+def test_merge_improvements():
+    # 000, 011, 101, 110 cover all tuples over 3 features
+    solution = _confs("000", "011", "101", "110", "111", "001", "010")
+    # each removal keeps the coverage of the solution on its own
+    largest = (Neighborhood(solution[:4], [], _confs("111", "001")), [])
+    overlapping = (Neighborhood(solution[:6], [], _confs("011")), [])
+    disjoint = (Neighborhood(solution[:6], [], _confs("010")), [])
+    for neighborhood, samples in (largest, overlapping, disjoint):
+        candidate = [c for c in solution if c not in neighborhood.initial_solution]
+        assert _coverage(candidate + samples) == _coverage(solution)
+    # the largest one is applied first, then `overlapping` would lose the tuples
+    # (1, True), (2, True) together with it, but `disjoint` can be applied
+    merged = merge_improvements(solution, [overlapping, disjoint, largest], 3)
+    assert sorted(merged, key=repr) == sorted(
+        _confs("000", "011", "101", "110"), key=repr
+    )
+    assert _coverage(merged) == _coverage(solution)
+    # improvements of configurations that are no longer part of it are skipped
+    merged = merge_improvements(solution, [largest, largest], 3)
+    assert len(merged) == 5
+
+
+def test_feedback_batch_once_per_iteration():
+    confs = [Configuration([True, False]), Configuration([False, True])]
+    neighborhoods = [Neighborhood([], [], [conf]) for conf in confs]
+    selector = RandomNeighborhood(100, incr_factor=2.0, decr_factor=0.5)
+    selector.feedback_batch(neighborhoods, [(1, 1), (1, 1)], time_utilization=0.1)
+    assert selector.n == 200  # not 400
+    selector.feedback_batch(neighborhoods, [(10, 10), (9, 10)], time_utilization=0.1)
+    assert selector.n == 200  # neither optimal nor a large gap
+    selector.feedback_batch(neighborhoods, [(1, 2), (1, 2)], time_utilization=0.1)
+    assert selector.n == 100
@@ -0,0 +1,30 @@
+from samplns.instances import AND, IMPL, OR, VAR, iter_variables, substitute_all
+
+
+def test_all_variables_order():
+    rule = AND(OR(VAR("b"), VAR("a")), IMPL(VAR("a"), VAR("c", True)))
+    assert list(rule.all_variables()) == ["b", "a", "c"]
+    assert list(iter_variables([rule, VAR("d"), VAR("b")])) == ["b", "a", "c", "d"]
+
+
+def test_substitute_all():
+    rules = [OR(VAR("a"), VAR("b", True)), IMPL(VAR("a"), AND(VAR("b"), VAR("c")))]
+    substituted = substitute_all(rules, {"a": 0, "c": 2}, {"b": 1})
+    assert substituted[0].elements == [VAR(0), VAR(1)]
+    assert substituted[1].condition == VAR(0)
+    assert substituted[1].implication.elements == [VAR(1, True), VAR(2)]
+    # `direct` takes precedence, other variables and flags are kept
+    rules = [OR(VAR("a", True), VAR("x", auxiliary=True)), OR(VAR("a"), VAR("d"))]
+    substituted = substitute_all(rules, {"a": 0, "x": 1}, {"a": 2})
+    assert substituted[0].elements == [VAR(0, True), VAR(1, auxiliary=True)]
+    assert substituted[1].elements == [VAR(0), VAR("d")]
+
+
+def test_deep_formula():
+    # deeper than the recursion limit
+    rule = VAR(0)
+    for i in range(1, 5000):
+        rule = IMPL(VAR(i), rule)
+    assert len(list(rule.all_variables())) == 5000
+    substituted = rule.substitute({i: i + 1 for i in range(5000)}, {})
+    assert next(iter(substituted.all_variables())) == 4999 + 1
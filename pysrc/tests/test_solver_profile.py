@@ -0,0 +1,46 @@
+import pytest
+from ortools.sat.python import cp_model
+from samplns.lns import SOLVER_PROFILES, SolverProfile
+from samplns.lns.solver_profile import get_solver_profile
+from samplns.utils import available_cpus
+from samplns.utils.cpu import cgroup_cpu_quota
+
+
+def test_cgroup_cpu_quota(tmp_path):
+    assert cgroup_cpu_quota(tmp_path) is None
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpu_quota(tmp_path) is None
+    (tmp_path / "cpu.max").write_text("250000 100000\n")
+    assert cgroup_cpu_quota(tmp_path) == 2.5
+    (tmp_path / "cpu.max").unlink()
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000")
+    assert cgroup_cpu_quota(tmp_path) is None
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("300000")
+    assert cgroup_cpu_quota(tmp_path) == 3.0
+    assert available_cpus() >= 1
+
+
+def test_solver_profile_workers():
+    profile = SolverProfile(num_workers=16, tuples_per_worker=100, min_workers=2)
+    assert profile.get_num_workers() == 16
+    assert profile.get_num_workers(max_workers=4) == 4
+    assert profile.get_num_workers(num_tuples=10) == 2
+    assert profile.get_num_workers(num_tuples=550) == 6
+    assert profile.get_num_workers(num_tuples=10_000) == 16
+    assert SolverProfile(num_workers=0).get_num_workers() == 1
+
+
+def test_solver_profile_parameters():
+    solver = cp_model.CpSolver()
+    SolverProfile(
+        subsolvers=["default_lp"], linearization_level=0, cp_model_presolve=False
+    ).apply(solver.parameters)
+    assert list(solver.parameters.subsolvers) == ["default_lp"]
+    assert solver.parameters.linearization_level == 0
+    assert not solver.parameters.cp_model_presolve
+    assert get_solver_profile("light") is SOLVER_PROFILES["light"]
+    assert get_solver_profile(None) is SOLVER_PROFILES["default"]
+    with pytest.raises(ValueError):
+        get_solver_profile("unknown")
@@ -0,0 +1,44 @@
+import numpy as np
+from samplns.cds import GreedyCds, TransactionGraph
+from samplns.lns.coverage_set import CoverageSet
+from samplns.utils import (
+    tuple_from_id,
+    tuple_id,
+    tuple_ids_from_array,
+    tuple_ids_from_tuples,
+    tuple_ids_to_array,
+    tuple_ids_to_tuples,
+)
+
+
+def test_tuple_id_roundtrip():
+    tuples = [((3, False), (1, True)), ((0, True), (7, False)), ((2, True), (5, True))]
+    ids = tuple_ids_from_tuples(tuples)
+    assert ids.tolist() == [tuple_id(*a, *b) for a, b in tuples]
+    ordered = [(min(t), max(t)) for t in tuples]
+    assert tuple_ids_to_tuples(ids) == ordered
+    assert [tuple_from_id(i) for i in ids] == ordered
+    assert (tuple_ids_from_array(tuple_ids_to_array(ids)) == ids).all()
+    # the order of the ids matches the order of the literals
+    assert np.argsort(ids).tolist() == [1, 0, 2]
+
+
+def test_coverage_set_tuple_ids():
+    sample = [[True, False, True, False], [False, True, True, True]]
+    coverage_set = CoverageSet(sample, 4)
+    coverage_set.cover(sample[0])
+    ids = coverage_set.missing_tuple_ids()
+    assert tuple_ids_to_tuples(ids) == coverage_set.missing_tuples()
+
+
+def test_cds_tuple_ids():
+    sample = [[1, -2, 3], [-1, 2, 3], [1, 2, -3]]
+    graph = TransactionGraph(3)
+    for conf in sample:
+        graph.add_valid_configuration(conf)
+    ids = tuple_ids_from_tuples([((0, True), (1, False)), ((0, False), (1, True))])
+    assert graph.has_tuple_ids(ids)
+    assert not graph.has_tuple_ids(tuple_ids_from_tuples([((0, False), (1, False))]))
+    cds = GreedyCds(graph, sample).optimize_tuple_ids(ids)
+    assert np.isin(cds, ids).all()
+    assert len(cds) == 2
@@ -0,0 +1,29 @@
+import random
+
+import numpy as np
+import pytest
+from samplns.instances import Instance
+from samplns.utils import sample_to_array
+from samplns.verify import have_equal_coverage
+from samplns.verify._verify import have_equal_coverage as _have_equal_coverage
+
+
+def test_have_equal_coverage_arrays_and_dicts():
+    random.seed(0)
+    features = [f"f{i}" for i in range(12)]
+    instance = Instance(features, None, [])
+    sample = [{f: random.random() < 0.5 for f in features} for _ in range(8)]
+    # duplicating configurations does not change the coverage
+    for sample_b, expected in [(sample + sample[:3], True), (sample[1:], False)]:
+        array_a = sample_to_array(sample, features)
+        array_b = sample_to_array(sample_b, features)
+        assert _have_equal_coverage(sample, sample_b, features) == expected
+        assert _have_equal_coverage(array_a, array_b) == expected
+        assert have_equal_coverage(instance, sample, sample_b) == expected
+    assert not _have_equal_coverage(array_a, np.ones_like(array_a))
+
+
+def test_have_equal_coverage_missing_feature():
+    instance = Instance(["a", "b"], None, [])
+    with pytest.raises(ValueError, match="misses a concrete feature"):
+        have_equal_coverage(instance, [{"a": True, "b": False}], [{"a": True}])
@@ -16,7 +16,7 @@ CDSSolverInterface::optimize(std::vector<Edge> initial_solution,
     return std::vector<Edge>();
   }
 
-  ensure_threadsafety_mtx.lock();
+  std::lock_guard<std::mutex> lock(ensure_threadsafety_mtx);
 
   if (!initial_solution.empty()) {
     try {
@@ -76,8 +76,6 @@ CDSSolverInterface::optimize(std::vector<Edge> initial_solution,
   // check solution
   cds_check_solution(*graph, solution);
 
-  ensure_threadsafety_mtx.unlock();
-
   return solution;
 }
 
@@ -97,10 +95,12 @@ bool AsyncCDSSolverInterface::start(std::vector<Edge> initial_solution,
   this->do_stop.store(false);
   this->time_limit.store(iteration_timelimit);
 
-  std::function<void(std::vector<Edge>)> task = std::bind(
-      &AsyncCDSSolverInterface::worker_optimize, this, std::placeholders::_1);
-  std::thread worker(task, initial_solution);
-  worker.detach();
+  this->running_workers.store(solvers.size());
+  for (size_t i = 0; i < solvers.size(); i++) {
+    std::thread worker(&AsyncCDSSolverInterface::worker_optimize, this, i,
+                       initial_solution);
+    worker.detach();
+  }
 
   return true;
 }
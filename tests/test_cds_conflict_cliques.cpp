@@ -0,0 +1,78 @@
+// Randomized test of cds_conflict_cliques: the cliques have to cover exactly
+// the pairs of edges that are not clique disjoint. Run via `ctest`.
+#include "cds/cds_conflict_cliques.hpp"
+#include "graph.hpp"
+
+#include <cstdlib>
+#include <fmt/core.h>
+#include <random>
+#include <set>
+#include <vector>
+
+using namespace samplns;
+
+static void check(bool condition, const std::string &message) {
+  if (!condition) {
+    fmt::print(stderr, "FAILED: {}\n", message);
+    std::exit(1);
+  }
+}
+
+static TransactionGraph random_graph(size_t num_vars, double density,
+                                     std::mt19937 &rng) {
+  TransactionGraph graph(num_vars);
+  std::bernoulli_distribution has_edge(density);
+  const auto n = static_cast<feature_id>(num_vars);
+  for (feature_id a = -n; a <= n; a++) {
+    for (feature_id b = a + 1; b <= n; b++) {
+      if (a != 0 && b != 0 && has_edge(rng)) {
+        graph.add_edge(a, b);
+      }
+    }
+  }
+  return graph;
+}
+
+int main() {
+  std::mt19937 rng(0);
+  for (int round = 0; round < 300; round++) {
+    const size_t num_vars = std::uniform_int_distribution<size_t>(2, 40)(rng);
+    const double density = std::uniform_real_distribution<>(0.2, 0.95)(rng);
+    const auto graph = random_graph(num_vars, density, rng);
+    // a random subset of the edges, in random order
+    auto edges = graph.get_all_edges();
+    std::shuffle(edges.begin(), edges.end(), rng);
+    edges.resize(std::min<size_t>(
+        edges.size(), std::uniform_int_distribution<size_t>(0, 200)(rng)));
+
+    const auto cliques = cds_conflict_cliques(graph, edges);
+    std::set<std::pair<size_t, size_t>> covered;
+    for (const auto &clique : cliques) {
+      check(!clique.empty(), "empty clique");
+      for (size_t a = 0; a < clique.size(); a++) {
+        check(clique[a] < edges.size(), "edge index out of range");
+        for (size_t b = a + 1; b < clique.size(); b++) {
+          const size_t i = std::min(clique[a], clique[b]);
+          const size_t j = std::max(clique[a], clique[b]);
+          check(i != j, "edge repeated in a clique");
+          check(!graph.are_edges_clique_disjoint(edges[i], edges[j]),
+                fmt::format("clique contains the clique disjoint edges {} "
+                            "and {}",
+                            i, j));
+          covered.insert({i, j});
+        }
+      }
+    }
+    for (size_t i = 0; i < edges.size(); i++) {
+      for (size_t j = i + 1; j < edges.size(); j++) {
+        if (!graph.are_edges_clique_disjoint(edges[i], edges[j])) {
+          check(
+              covered.count({i, j}),
+              fmt::format("conflicting edges {} and {} share no clique", i, j));
+        }
+      }
+    }
+  }
+  fmt::print("cds_conflict_cliques: all tests passed.\n");
+  return 0;
+}
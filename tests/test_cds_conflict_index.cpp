@@ -0,0 +1,113 @@
+// Randomized test of CDSConflictIndex against
+// TransactionGraph::are_edges_clique_disjoint. Run via `ctest`.
+#include "cds/cds_conflict_index.hpp"
+#include "graph.hpp"
+
+#include <cstdlib>
+#include <fmt/core.h>
+#include <random>
+#include <set>
+#include <vector>
+
+using namespace samplns;
+
+static void check(bool condition, const std::string &message) {
+  if (!condition) {
+    fmt::print(stderr, "FAILED: {}\n", message);
+    std::exit(1);
+  }
+}
+
+static TransactionGraph random_graph(size_t num_vars, double density,
+                                     std::mt19937 &rng) {
+  TransactionGraph graph(num_vars);
+  std::bernoulli_distribution has_edge(density);
+  const auto n = static_cast<feature_id>(num_vars);
+  for (feature_id a = -n; a <= n; a++) {
+    for (feature_id b = a + 1; b <= n; b++) {
+      if (a != 0 && b != 0 && has_edge(rng)) {
+        graph.add_edge(a, b);
+      }
+    }
+  }
+  return graph;
+}
+
+/// @brief Checks is_compatible and for_each_conflict for every query edge.
+static void check_queries(const TransactionGraph &graph,
+                          const CDSConflictIndex &index,
+                          const std::set<feature_pair> &cds,
+                          const std::vector<feature_pair> &queries) {
+  for (const auto &e : queries) {
+    std::set<feature_pair> expected;
+    for (const auto &f : cds) {
+      if (!graph.are_edges_clique_disjoint(e, f)) {
+        expected.insert(f);
+      }
+    }
+    std::set<feature_pair> conflicts;
+    index.for_each_conflict(e, [&](const feature_pair &f) {
+      check(conflicts.insert(f).second, "conflict reported twice");
+    });
+    const auto edge = fmt::format("({}, {})", e.first, e.second);
+    check(conflicts == expected, "wrong conflicts of " + edge);
+    check(index.is_compatible(e) == expected.empty(),
+          "wrong compatibility of " + edge);
+  }
+}
+
+int main() {
+  std::mt19937 rng(0);
+  for (int round = 0; round < 200; round++) {
+    const size_t num_vars = std::uniform_int_distribution<size_t>(2, 24)(rng);
+    const double density = std::uniform_real_distribution<>(0.2, 0.95)(rng);
+    const auto graph = random_graph(num_vars, density, rng);
+    auto edges = graph.get_all_edges();
+    if (edges.empty()) {
+      continue;
+    }
+    // all edges of the graph, which includes the edges of the CDS themselves
+    // and edges sharing an endpoint with them, and some non-edges
+    auto queries = edges;
+    const auto n = static_cast<int>(num_vars);
+    std::uniform_int_distribution<int> literal(1, 2 * n);
+    for (int i = 0; i < 20; i++) {
+      const feature_id a = literal(rng) - n - 1;
+      const feature_id b = literal(rng) - n - 1;
+      if (a != b && a >= -n && b >= -n && a != 0 && b != 0 &&
+          !graph.has_edge(a, b)) {
+        queries.push_back({std::min(a, b), std::max(a, b)});
+      }
+    }
+
+    CDSConflictIndex index(graph);
+    std::set<feature_pair> cds;
+    std::shuffle(edges.begin(), edges.end(), rng);
+    // insertions and removals, such that slots are reused and the index grows
+    std::bernoulli_distribution remove(0.3);
+    for (size_t i = 0; i < edges.size() && i < 100; i++) {
+      if (remove(rng) && !cds.empty()) {
+        const auto f = *cds.begin();
+        check(index.remove(f), "removing a contained edge failed");
+        cds.erase(f);
+        check(!index.remove(f), "removing a missing edge succeeded");
+      }
+      index.insert(edges[i]);
+      index.insert(edges[i]); // inserting twice does nothing
+      cds.insert(edges[i]);
+      check(index.size() == cds.size(), "wrong size");
+      if (i % 25 == 0) {
+        check_queries(graph, index, cds, queries);
+      }
+    }
+    for (const auto &f : cds) {
+      check(index.contains(f), "edge of the CDS missing");
+    }
+    check_queries(graph, index, cds, queries);
+    index.clear();
+    check(index.size() == 0, "clear failed");
+    check_queries(graph, index, {}, queries);
+  }
+  fmt::print("CDSConflictIndex: all tests passed.\n");
+  return 0;
+}